@@ -0,0 +1,541 @@
+"""
+asyncio sync engine for Snipe-IT.
+
+An alternative to the threaded requests path in snipe-IT.py. Snipe-IT lookups
+and writes go through one aiohttp session with a semaphore bounding the
+requests in flight, and the blocking Google pager (plus Gemini/category cache
+calls) run in a thread executor, so hundreds of requests can be outstanding on
+one core without a thread per request. Payloads are built and diffed by
+hardware_payloads and every sync decision (status, exact model match, write
+results, checkouts) is made by sync_decisions exactly as in the threaded path.
+Lookups share the same LookupCache and RateLimiter, and concurrent misses on
+one status label, category or model share a single request.
+
+aiohttp is only required when this engine is used.
+"""
+
+import asyncio
+import itertools
+import json as jsonlib
+import logging
+import time
+
+from tqdm import tqdm
+
+import metrics
+from category_cache import normalize_model_name
+from config import Config
+from hardware_payloads import build_create_payload, build_update_payload, diff_payload, format_mac
+from lookup_cache import normalize_key
+from rate_limiter import backoff_delay, parse_retry_after
+from sync_decisions import (DUPLICATE, assignee, assignment_requests, create_result, exact_model_id, first_id,
+                            fixed_status_id, mark_checked_out, matching_row, merge_assignment, model_create_payload,
+                            needs_fieldset, write_result)
+from sync_stats import CREATED, SKIPPED, UNCHANGED, UPDATED
+
+logger = logging.getLogger(__name__)
+
+
+def require_aiohttp():
+    """
+    Import aiohttp, which only the async engine needs.
+
+    Raises:
+        RuntimeError: If aiohttp is not installed.
+    """
+    try:
+        import aiohttp
+    except ImportError as e:
+        raise RuntimeError("The async engine requires aiohttp (pip install aiohttp)") from e
+    return aiohttp
+
+
+class AsyncResponse:
+    """A fully read response exposing the parts of requests.Response the sync code uses."""
+
+    def __init__(self, status_code, headers, text):
+        self.status_code = status_code
+        self.headers = headers
+        self.text = text
+
+    def json(self):
+        return jsonlib.loads(self.text)
+
+
+class AsyncSnipeITClient:
+    """aiohttp-backed client for the Snipe-IT REST API."""
+
+    def __init__(self, base_url, api_key, rate_limiter, max_in_flight=100, timeout=(10, 60),
+                 max_retries=4, retry_delay=20, backoff_factor=1.0, max_delay=120):
+        """
+        Args:
+            base_url (str): Base URL of the Snipe-IT API (e.g. https://host/api/v1).
+            api_key (str): Snipe-IT API token.
+            rate_limiter (RateLimiter): Limiter shared by all clients in the process.
+            max_in_flight (int): Maximum requests awaiting a response at once.
+            timeout (tuple): (connect, read) timeout in seconds for each request.
+            max_retries (int): Attempts per request before giving up.
+            retry_delay (float): Base delay for backoff when no Retry-After is sent.
+            backoff_factor (float): Exponential growth of the backoff delay.
+            max_delay (float): Upper bound for a single backoff sleep.
+        """
+        self.base_url = base_url.rstrip('/')
+        self.api_key = api_key
+        self.rate_limiter = rate_limiter
+        self.max_in_flight = max(1, max_in_flight)
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.backoff_factor = backoff_factor
+        self.max_delay = max_delay
+        self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        self._session = None
+        self._errors = (asyncio.TimeoutError,)
+
+    def session(self):
+        """The underlying `aiohttp.ClientSession`, created on first use inside the event loop."""
+        if self._session is None:
+            aiohttp = require_aiohttp()
+            connect, read = self.timeout
+            self._session = aiohttp.ClientSession(
+                headers={
+                    'Authorization': f'Bearer {self.api_key}',
+                    'Accept': 'application/json',
+                },
+                timeout=aiohttp.ClientTimeout(sock_connect=connect, sock_read=read),
+                connector=aiohttp.TCPConnector(limit=self.max_in_flight),
+            )
+            self._errors = (aiohttp.ClientError, asyncio.TimeoutError)
+        return self._session
+
+    def url(self, path):
+        """Build a full URL from an API path; full URLs are returned unchanged."""
+        if path.startswith('http://') or path.startswith('https://'):
+            return path
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def endpoint(self, path):
+        """Metrics label for a path, e.g. '/hardware/{id}'."""
+        if path.startswith(self.base_url):
+            path = path[len(self.base_url):]
+        return metrics.endpoint_label('/' + path.lstrip('/'))
+
+    async def request(self, method, path, json=None, params=None, retries=None, delay=None):
+        """
+        Send a request, retrying on 429 responses and connection errors.
+
+        Args:
+            method (str): HTTP method.
+            path (str): API path (e.g. '/hardware') or full URL.
+            json (dict, optional): JSON body.
+            params (dict, optional): Query parameters.
+            retries (int, optional): Attempts before giving up.
+            delay (float, optional): Base backoff in seconds.
+
+        Returns:
+            AsyncResponse: The response, or None if every attempt failed.
+        """
+        session = self.session()
+        url = self.url(path)
+        endpoint = self.endpoint(path)
+        retries = retries or self.max_retries
+        delay = self.retry_delay if delay is None else delay
+
+        for attempt in range(1, retries + 1):
+            metrics.SNIPEIT_SLEEP_SECONDS.labels('rate_limit').inc(await self.rate_limiter.acquire_async())
+            try:
+                async with self._semaphore:
+                    started = time.monotonic()
+                    async with session.request(method, url, json=json, params=params) as resp:
+                        response = AsyncResponse(resp.status, dict(resp.headers), await resp.text())
+            except self._errors as e:
+                metrics.SNIPEIT_REQUEST_SECONDS.labels(endpoint, method).observe(time.monotonic() - started)
+                metrics.SNIPEIT_REQUESTS.labels(endpoint, method, 'error').inc()
+                if attempt == retries:
+                    msg = f"Request error on {method} {url}: {e!r}. Attempt {attempt} of {retries}."
+                    tqdm.write(msg)
+                    logger.error(msg)
+                    break
+                metrics.SNIPEIT_RETRIES.labels(endpoint, method, 'error').inc()
+                wait = backoff_delay(attempt, delay, self.backoff_factor, self.max_delay)
+                metrics.SNIPEIT_SLEEP_SECONDS.labels('backoff').inc(wait)
+                msg = f"Request error on {method} {url}: {e!r}. Attempt {attempt} of {retries}. Retrying in {wait:.1f} seconds..."
+                tqdm.write(msg)
+                logger.error(msg)
+                await asyncio.sleep(wait)
+                continue
+
+            metrics.SNIPEIT_REQUEST_SECONDS.labels(endpoint, method).observe(time.monotonic() - started)
+            metrics.SNIPEIT_REQUESTS.labels(endpoint, method, response.status_code).inc()
+            self.rate_limiter.observe(response.headers)
+            if response.status_code == 429:
+                metrics.SNIPEIT_RATE_LIMITED.labels(endpoint, method).inc()
+                if attempt == retries:
+                    msg = f"Rate limited on {url}. Attempt {attempt} of {retries}."
+                    tqdm.write(msg)
+                    logger.warning(msg)
+                    break
+                metrics.SNIPEIT_RETRIES.labels(endpoint, method, 'rate_limited').inc()
+                wait = parse_retry_after(response.headers.get('Retry-After'))
+                if wait is None:
+                    wait = backoff_delay(attempt, delay, self.backoff_factor, self.max_delay)
+                msg = f"Rate limited on {url}. Attempt {attempt} of {retries}. Retrying in {wait:.1f} seconds..."
+                tqdm.write(msg)
+                logger.warning(msg)
+                self.rate_limiter.pause(wait)
+                continue
+            return response
+
+        msg = f"Max retries exceeded for {method} {url}"
+        tqdm.write(msg)
+        logger.error(msg)
+        return None
+
+    async def get(self, path, params=None, **kwargs):
+        return await self.request("GET", path, params=params, **kwargs)
+
+    async def post(self, path, json=None, **kwargs):
+        return await self.request("POST", path, json=json, **kwargs)
+
+    async def patch(self, path, json=None, **kwargs):
+        return await self.request("PATCH", path, json=json, **kwargs)
+
+    async def close(self):
+        """Close pooled connections."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+class AsyncSyncEngine:
+    """Syncs Google device records into Snipe-IT with asyncio."""
+
+    def __init__(self, client, hardware_index, lookup_cache, resolve_category, max_in_flight=100,
+                 creation_lock=None, model_table=None, user_index=None):
+        """
+        Args:
+            client (AsyncSnipeITClient): Client used for every Snipe-IT call.
+            hardware_index (HardwareIndex): Preloaded Snipe-IT hardware.
+            lookup_cache (LookupCache): Cache of model/status/category IDs.
+            resolve_category (callable): Blocking `resolve_category(model_name)`;
+                run in the executor since it may call Gemini.
+            max_in_flight (int): Devices processed concurrently is twice this.
+            creation_lock (sharding.ProcessLock, optional): Cross-process lock
+                held while creating a model, when running as one of several shards.
+            model_table (ModelTable, optional): Models already resolved for every
+                device (snipe-IT.resolve_models); model IDs then come only from it.
+            user_index (UserIndex, optional): Snipe-IT users; when given, active
+                assets are checked out to the user matching their Google user.
+        """
+        self.client = client
+        self.hardware_index = hardware_index
+        self.lookup_cache = lookup_cache
+        self.resolve_category = resolve_category
+        self.max_devices = max(1, max_in_flight) * 2
+        self.creation_lock = creation_lock
+        self.model_table = model_table
+        self.user_index = user_index
+        self._tasks = {}
+
+    async def _shared(self, key, make):
+        """
+        Awaits `make()` once per key at a time; concurrent callers await the same task.
+
+        The async counterpart of category_cache.SingleFlight, so a status
+        label, category or model missed by many devices at once is fetched
+        (or created) once.
+        """
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(make())
+            self._tasks[key] = task
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+        return await task
+
+    async def _lookup(self, entity, name, path, params, pick, fresh=False):
+        """
+        Cached `GET path` returning the ID picked from the result rows.
+
+        Concurrent misses on the same name share one request. `fresh` skips
+        the cache and the sharing (used to re-check under the creation lock).
+        """
+        if not fresh:
+            found, value = self.lookup_cache.get(entity, name)
+            if found:
+                return value
+            return await self._shared((entity, normalize_key(name)),
+                                      lambda: self._fetch(entity, name, path, params, pick))
+        return await self._fetch(entity, name, path, params, pick)
+
+    async def _fetch(self, entity, name, path, params, pick):
+        response = await self.client.get(path, params=params)
+        if response is None:
+            return None
+        if response.status_code != 200:
+            tqdm.write(f"API request failed with status code: {response.status_code}")
+            tqdm.write(f"Response text: {response.text}")
+            return None
+        value = pick(response.json().get('rows', []), name)
+        if value is None:
+            tqdm.write(f"No {entity} found with name: {name}")
+        else:
+            self.lookup_cache.set(entity, name, value)
+        return value
+
+    async def get_status_id(self, status_name):
+        status_id = fixed_status_id(status_name)
+        if status_id is not None:
+            return status_id
+        try:
+            return await self._lookup('statuslabels', status_name, '/statuslabels', {'name': status_name},
+                                      lambda rows, name: first_id(rows))
+        except Exception as e:
+            tqdm.write(f"Status lookup failed: {e}")
+            logger.error(f"Status lookup error for status_name '{status_name}': {e}")
+            return Config.SNIPE_IT_DEFAULT_STATUS_ID
+
+    async def get_category_id(self, category_name):
+        return await self._lookup('categories', category_name, '/categories', {'name': category_name},
+                                  lambda rows, name: first_id(rows))
+
+    async def get_model_id(self, model_name, fresh=False):
+        """Exact-name model lookup (see sync_decisions.exact_model_id)."""
+        return await self._lookup('models', model_name, '/models', {'search': model_name}, exact_model_id,
+                                  fresh=fresh)
+
+    async def get_or_create_model_id(self, model_name):
+        """
+        Returns the model ID for a name, creating the model if needed.
+
+        Concurrent callers for the same model await one shared task, so a
+        model is never created twice.
+        """
+        if model_name is None:
+            return Config.SNIPE_IT_DEFAULT_MODEL_ID
+        if self.model_table is not None:
+            return self.model_table.get(model_name)
+        return await self._shared(('create model', normalize_model_name(model_name)),
+                                  lambda: self._resolve_model(model_name))
+
+    async def _resolve_model(self, model_name):
+        model_id = await self.get_model_id(model_name)
+        if model_id:
+            return model_id
+        if self.creation_lock is None:
+            tqdm.write(f"Model '{model_name}' not found. Creating new model...")
+            return await self.create_model(model_name)
+
+        await asyncio.get_running_loop().run_in_executor(None, self.creation_lock.acquire)
+        try:
+            # Another shard may have created the model while we waited for the lock
+            model_id = await self.get_model_id(model_name, fresh=True)
+            if model_id:
+                return model_id
+            tqdm.write(f"Model '{model_name}' not found. Creating new model...")
+            return await self.create_model(model_name)
+        finally:
+            self.creation_lock.release()
+
+    async def create_model(self, model_name):
+        """Creates a model with the configured fieldset, classifying its category first."""
+        loop = asyncio.get_running_loop()
+        category_name = await loop.run_in_executor(None, self.resolve_category, model_name)
+        if not category_name:
+            tqdm.write(f"Cannot create model '{model_name}': no category rule matches and Gemini is not configured")
+            return None
+        category_id = await self.get_category_id(category_name)
+        response = await self.client.post("/models", json=model_create_payload(model_name, category_id))
+        status_code, model_payload = write_result(response, f"creating model '{model_name}'")
+        if status_code != 200:
+            tqdm.write(f"Failed to create model '{model_name}': {model_payload}")
+            return None
+
+        model_payload = model_payload or {}
+        model_id = model_payload.get('id')
+        tqdm.write(f"Model created successfully: {model_payload.get('name')}")
+        self.lookup_cache.invalidate('models', model_name)
+        self.lookup_cache.set('models', model_name, model_id)
+        if not needs_fieldset(model_payload):
+            return model_id
+
+        fieldset = await self.client.patch(f"/models/{model_id}", json={'fieldset_id': Config.SNIPE_IT_FIELDSET_ID})
+        if fieldset is None:
+            tqdm.write(f"Failed to assign fieldset: no response for model {model_id}")
+        elif fieldset.status_code == 200:
+            tqdm.write(f"Fieldset successfully assigned to model {model_id}")
+        else:
+            tqdm.write(f"Failed to assign fieldset: {fieldset.status_code}, {fieldset.text}")
+        return model_id
+
+    async def find_hardware(self, asset_tag):
+        """
+        Async counterpart of snipe-IT.find_hardware.
+
+        Returns:
+            tuple: (200, row), or (status_code, error) if there is no such asset or the search failed.
+        """
+        response = await self.client.get("/hardware", params={'search': asset_tag})
+        if response is None:
+            return 503, f"No response searching for {asset_tag}"
+        if response.status_code != 200:
+            tqdm.write(f"Failed to search for hardware: {response.status_code} - {response.text}")
+            return response.status_code, response.text
+        device = matching_row(response.json().get("rows", []), asset_tag)
+        if device is not None:
+            return 200, device
+        tqdm.write(f"No matching device found for asset tag '{asset_tag}'")
+        return 404, f"No matching device found for asset tag '{asset_tag}'"
+
+    async def update_hardware(self, asset_tag, model_id, status_id, macAddress=None, createdDate=None,
+                              ipAddress=None, last_User=None, eol=None, matched_device=None):
+        """
+        Async counterpart of snipe-IT.update_hardware: PATCHes only changed fields.
+
+        Returns:
+            tuple: (200, UPDATED), (200, UNCHANGED), or (status_code, error) on failure.
+        """
+        if matched_device is None:
+            status_code, matched_device = await self.find_hardware(asset_tag)
+            if status_code != 200:
+                return status_code, matched_device
+
+        desired = build_update_payload(asset_tag, model_id, status_id, macAddress, createdDate,
+                                       ipAddress, last_User, eol)
+        update_payload = diff_payload(desired, matched_device)
+        if not update_payload:
+            return 200, UNCHANGED
+
+        response = await self.client.patch(f"/hardware/{matched_device['id']}", json=update_payload)
+        status_code, result = write_result(response, f"updating {asset_tag}")
+        if status_code != 200:
+            tqdm.write(f"Failed to update hardware {asset_tag}: {status_code} - {result}")
+            return status_code, result
+        tqdm.write(f"Updated hardware: {asset_tag} ({', '.join(sorted(update_payload))})")
+        return 200, UPDATED
+
+    async def sync_assignment(self, row, user_email):
+        """
+        Async counterpart of snipe-IT.sync_assignment.
+
+        Returns:
+            tuple: (200, True) if the asset was checked out, (200, False) if
+                nothing changed, or (status_code, error) on failure.
+        """
+        if self.user_index is None:
+            return 200, False
+        user_id = self.user_index.get(user_email)
+        steps = assignment_requests(row, user_id)
+        for path, payload in steps:
+            status_code, error = write_result(await self.client.post(path, json=payload), f"for {path}")
+            if status_code != 200:
+                tqdm.write(f"Failed to assign {row.get('asset_tag')} to {user_email} ({path}): {error}")
+                return status_code, error
+        if steps:
+            mark_checked_out(row, user_id)
+        return 200, bool(steps)
+
+    async def with_assignment(self, outcome, row, user_email):
+        """Follows a successful hardware write with sync_assignment; see sync_decisions.merge_assignment."""
+        if outcome[0] != 200:
+            return outcome
+        return merge_assignment(outcome, await self.sync_assignment(row, user_email))
+
+    async def create_hardware(self, asset_tag, status_name, model_name, macAddress, createdDate,
+                              userEmail=None, ipAddress=None, eol=None, existing=None):
+        """
+        Async counterpart of snipe-IT.create_hardware.
+
+        Returns:
+            tuple: (200, outcome) where outcome is CREATED, UPDATED or UNCHANGED,
+                or (status_code, error) on failure.
+        """
+        status_id = await self.get_status_id(status_name)
+        model_id = await self.get_or_create_model_id(model_name)
+        if not model_id:
+            return 500, f"Could not resolve or create model '{model_name}'"
+        macAddress = format_mac(macAddress)
+        user_email = assignee(status_name, userEmail)
+
+        async def update(matched_device):
+            outcome = await self.update_hardware(asset_tag, model_id, status_id, macAddress, createdDate,
+                                                 ipAddress, userEmail, eol, matched_device=matched_device)
+            return await self.with_assignment(outcome, matched_device, user_email)
+
+        if existing is not None:
+            return await update(existing)
+
+        hardware = build_create_payload(asset_tag, model_id, status_id, macAddress, createdDate,
+                                        ipAddress, userEmail, eol)
+        kind, result = create_result(await self.client.post("/hardware", json=hardware), asset_tag)
+        if kind == CREATED:
+            self.hardware_index.add(result or hardware)
+            return await self.with_assignment((200, CREATED), result, user_email)
+        if kind == DUPLICATE:
+            tqdm.write(f"Duplicate asset found for {asset_tag}. Updating instead.")
+            status_code, existing = await self.find_hardware(asset_tag)
+            if status_code != 200:
+                return status_code, existing
+            return await update(existing)
+
+        tqdm.write(f"Error creating hardware {asset_tag}: {result[0]} - {result[1]}")
+        return result
+
+    async def process_device(self, device):
+        """Async counterpart of snipe-IT.process_device."""
+        active_time = device.get('Active Date')
+        if not active_time:
+            logger.error("Active Time Not Set")
+
+        serial = device.get('Serial Number')
+        if not serial:
+            logger.warning(f"Skipping device {device.get('Device ID')} without a serial number")
+            return 200, SKIPPED
+
+        existing = self.hardware_index.lookup(asset_tag=serial, serial=serial)
+        return await self.create_hardware(
+            serial, device.get('Status'), device.get('Model'), device.get('Mac Address'), active_time,
+            device.get('Device User'), device.get('Last Known IP Address'), device.get('EOL'),
+            existing=existing
+        )
+
+    async def run(self, devices, on_done, chunk_size=300):
+        """
+        Syncs every device, keeping at most `max_devices` in progress.
+
+        Devices are pulled from the (blocking) iterable `chunk_size` at a time
+        in the default thread executor, so Google paging overlaps with the
+        Snipe-IT requests of earlier devices.
+
+        Args:
+            devices (iterable): Device records, e.g. a Google paging generator.
+            on_done (callable): Called as `on_done(device, result, error)` on the
+                event loop thread once each device finishes, like `run_bounded`.
+            chunk_size (int): Devices pulled per executor call (a Google page).
+        """
+        loop = asyncio.get_running_loop()
+        iterator = iter(devices)
+        pending = {}
+
+        def take():
+            return list(itertools.islice(iterator, chunk_size))
+
+        async def drain(return_when):
+            done, _ = await asyncio.wait(pending, return_when=return_when)
+            for task in done:
+                device = pending.pop(task)
+                error = task.exception()
+                on_done(device, None if error else task.result(), error)
+
+        try:
+            while True:
+                chunk = await loop.run_in_executor(None, take)
+                if not chunk:
+                    break
+                for device in chunk:
+                    while len(pending) >= self.max_devices:
+                        await drain(asyncio.FIRST_COMPLETED)
+                    pending[asyncio.ensure_future(self.process_device(device))] = device
+            while pending:
+                await drain(asyncio.FIRST_COMPLETED)
+        finally:
+            await self.client.close()
@@ -0,0 +1,68 @@
+"""
+Benchmark: memory per device for dict records vs DeviceRecord.
+
+Builds a synthetic fleet of Directory resources (benchmarks/fake_directory.py),
+then builds the normalized device records twice, once as plain dicts (as
+googleAuth produced before DeviceRecord) and once as DeviceRecords, and
+reports the bytes retained per device measured with tracemalloc, plus the
+size of the container object alone. The raw resources are built before
+measuring, so both figures cover only the records and the values they
+create.
+
+Usage:
+    python benchmarks/bench_device_memory.py [--devices 100k]
+"""
+
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+import googleAuth  # noqa: E402
+from device_normalization import normalize_device  # noqa: E402
+from device_record import DeviceRecord  # noqa: E402
+from fake_directory import parse_fleet_size, synthetic_device  # noqa: E402
+
+
+def as_dict(resource):
+    return normalize_device(googleAuth.device_info_from_api(resource))
+
+
+def as_record(resource):
+    return DeviceRecord.from_dict(as_dict(resource))
+
+
+def retained_bytes(build, resources):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    records = [build(resource) for resource in resources]
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return records, after - before
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--devices", default="100k", help="Fleet size: 1k, 10k, 100k or a number.")
+    args = parser.parse_args()
+
+    size = parse_fleet_size(args.devices)
+    print(f"Building {size} synthetic Directory resources...\n")
+    resources = [synthetic_device(i) for i in range(size)]
+
+    print(f"{'record type':<14}{'bytes/device':>14}{'container':>11}{'fleet MiB':>11}")
+    for name, build in (("dict", as_dict), ("DeviceRecord", as_record)):
+        records, retained = retained_bytes(build, resources)
+        print(f"{name:<14}{retained / size:>14.0f}{sys.getsizeof(records[0]):>11}{retained / 2 ** 20:>11.1f}")
+        del records
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+Benchmark: Directory API device listing with BASIC vs FULL vs field-masked responses.
+
+Measures, per page of devices, the bytes transferred (raw and gzip, which is
+what the Google client actually receives) and the client-side page latency
+(JSON decode plus mapping every device through googleAuth.device_info_from_api),
+plus the estimated transfer time at a given bandwidth.
+
+By default it runs against the recorded FULL-projection fixture pages in
+benchmarks/fixtures, deriving the BASIC and masked variants offline. BASIC is
+approximated by dropping the FULL-only fields. With --live it instead lists
+one real page per mode using the configured service account.
+
+Usage:
+    python benchmarks/bench_directory_fields.py [--page-size 300] [--mbps 50] [--live]
+"""
+
+import argparse
+import glob
+import gzip
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import googleAuth  # noqa: E402
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# Fields only returned with projection=FULL
+FULL_ONLY_FIELDS = {
+    "recentUsers", "activeTimeRanges", "lastKnownNetwork", "cpuStatusReports",
+    "diskVolumeReports", "systemRamFreeReports", "cpuInfo", "deviceFiles",
+    "screenshotFiles", "osUpdateStatus", "tpmVersionInfo", "backlightInfo", "fanInfo",
+}
+
+
+def _parse_mask(mask):
+    """Parse a partial-response mask like 'a,b(c,d/e)' into a nested dict tree."""
+    tree, stack, token = {}, [], ""
+    node = tree
+
+    def add(name, current):
+        parts = [p for p in name.strip().split("/") if p]
+        for part in parts[:-1]:
+            current = current.setdefault(part, {})
+        return current.setdefault(parts[-1], {}) if parts else current
+
+    for char in mask:
+        if char == "(":
+            stack.append(node)
+            node = add(token, node)
+            token = ""
+        elif char == ")":
+            if token:
+                add(token, node)
+            token = ""
+            node = stack.pop()
+        elif char == ",":
+            if token:
+                add(token, node)
+            token = ""
+        else:
+            token += char
+    if token:
+        add(token, node)
+    return tree
+
+
+def apply_fields_mask(value, tree):
+    """Emulate the server-side partial response for `value` given a parsed mask."""
+    if not tree:
+        return value
+    if isinstance(value, list):
+        return [apply_fields_mask(item, tree) for item in value]
+    if not isinstance(value, dict):
+        return value
+    return {key: apply_fields_mask(value[key], sub) for key, sub in tree.items() if key in value}
+
+
+def load_fixture_pages():
+    """Load the recorded FULL-projection pages."""
+    pages = []
+    for path in sorted(glob.glob(os.path.join(FIXTURE_DIR, "chromeosdevices_*.json"))):
+        with open(path, "r", encoding="utf-8") as f:
+            pages.append(json.load(f))
+    if not pages:
+        sys.exit(f"No fixture pages found in {FIXTURE_DIR}")
+    return pages
+
+
+def resize_page(page, page_size):
+    """Repeat a page's devices (with unique IDs) up to `page_size` devices."""
+    devices = page.get("chromeosdevices", [])
+    resized = []
+    for i in range(page_size):
+        device = dict(devices[i % len(devices)])
+        device["deviceId"] = f"{device.get('deviceId')}-{i}"
+        device["serialNumber"] = f"{device.get('serialNumber')}{i}"
+        resized.append(device)
+    return dict(page, chromeosdevices=resized)
+
+
+def variants(page):
+    """Build the FULL, BASIC and field-masked versions of a recorded FULL page."""
+    basic = dict(page, chromeosdevices=[
+        {k: v for k, v in device.items() if k not in FULL_ONLY_FIELDS}
+        for device in page["chromeosdevices"]
+    ])
+    masked = apply_fields_mask(page, _parse_mask(googleAuth.fields_mask()))
+    return {"FULL": page, "BASIC": basic, "MASKED": masked}
+
+
+def page_latency(body, iterations):
+    """Median seconds to decode a page body and map its devices."""
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        data = json.loads(body)
+        for device in data.get("chromeosdevices", []):
+            googleAuth.device_info_from_api(device)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def missing_fields(page, reference):
+    """Device record keys that come back empty compared with the FULL page."""
+    missing = set()
+    for device, full in zip(page["chromeosdevices"], reference["chromeosdevices"]):
+        got, want = googleAuth.device_info_from_api(device), googleAuth.device_info_from_api(full)
+        missing.update(key for key in want if want[key] is not None and got[key] != want[key])
+    return sorted(missing)
+
+
+def run_offline(args):
+    """
+    Bytes are measured on the recorded pages as-is and scaled per device, since
+    repeating identical devices would make gzip look unrealistically good.
+    Decode+map latency is measured on pages resized to --page-size.
+    """
+    print(f"Per page of {args.page_size} devices; transfer estimated at {args.mbps} Mbit/s\n")
+    print(f"{'mode':<8}{'raw KiB':>10}{'gzip KiB':>10}{'transfer ms':>13}{'decode+map ms':>15}  missing fields")
+    for page in load_fixture_pages():
+        recorded = variants(page)
+        resized = variants(resize_page(page, args.page_size))
+        count = len(page.get("chromeosdevices", [])) or 1
+        for mode, data in recorded.items():
+            body = json.dumps(data).encode("utf-8")
+            raw_kib = len(body) / count * args.page_size / 1024
+            gzip_kib = len(gzip.compress(body)) / count * args.page_size / 1024
+            transfer_ms = gzip_kib * 1024 * 8 / (args.mbps * 1_000_000) * 1000
+            latency_ms = page_latency(json.dumps(resized[mode]).encode("utf-8"), args.iterations) * 1000
+            missing = ", ".join(missing_fields(data, recorded["FULL"])) or "-"
+            print(f"{mode:<8}{raw_kib:>10.1f}{gzip_kib:>10.1f}{transfer_ms:>13.1f}{latency_ms:>15.2f}  {missing}")
+
+
+def run_live(args):
+    creds = googleAuth.auth()
+    if not creds:
+        sys.exit("Authentication failed.")
+    service = googleAuth.build("admin", "directory_v1", credentials=creds)
+    modes = {
+        "FULL": {"projection": "FULL"},
+        "BASIC": {"projection": "BASIC"},
+        "MASKED": {"projection": "FULL", "fields": googleAuth.fields_mask()},
+    }
+    print(f"{'mode':<8}{'devices':>9}{'JSON KiB':>10}{'page ms':>10}")
+    for mode, params in modes.items():
+        start = time.perf_counter()
+        result = service.chromeosdevices().list(
+            customerId="my_customer", maxResults=args.page_size,
+            orderBy="lastSync", sortOrder="DESCENDING", **params
+        ).execute()
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        size = len(json.dumps(result).encode("utf-8"))
+        print(f"{mode:<8}{len(result.get('chromeosdevices', [])):>9}{size / 1024:>10.1f}{elapsed_ms:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--page-size", type=int, default=300)
+    parser.add_argument("--mbps", type=float, default=50.0, help="Bandwidth used to estimate transfer time.")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--live", action="store_true", help="List one real page per mode instead of fixtures.")
+    args = parser.parse_args()
+    if args.live:
+        run_live(args)
+    else:
+        run_offline(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Benchmark: run-to-run inventory diff on a synthetic fleet.
+
+Builds a fleet of synthetic Directory devices (benchmarks/fake_directory.py)
+mapped through googleAuth.device_info_from_api, writes it as an inventory
+snapshot, then changes the IP address of a fraction of the devices,
+adds and removes a few, and times each step of
+InventorySnapshot.changed_devices against the saved snapshot (building this
+run's frame, reading the snapshot, the diff, selecting the records to sync)
+and the whole call end to end, next to a plain per-record Python comparison
+of the two in-memory listings for reference.
+
+Needs pandas; Parquet and Feather also need pyarrow (without it the snapshot
+is written as gzip CSV).
+
+Usage:
+    python benchmarks/bench_inventory_diff.py [--devices 100k] [--changed 0.01] [--format parquet]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+import googleAuth  # noqa: E402
+import inventory_snapshot  # noqa: E402
+from fake_directory import parse_fleet_size, synthetic_device  # noqa: E402
+
+
+def build_fleet(size):
+    return [googleAuth.device_info_from_api(synthetic_device(i)) for i in range(size)]
+
+
+def next_run(devices, changed_fraction):
+    """This run's listing: every 1/fraction-th device changed, a few new ones, a few gone."""
+    step = max(1, round(1 / changed_fraction)) if changed_fraction else len(devices) + 1
+    listing = []
+    for i, device in enumerate(devices):
+        device = dict(device, ETag=f'"fake-{i}-v2"')  # an ignored column
+        if i % step == 0:
+            device['Last Known IP Address'] = f"172.16.{i >> 8 & 255}.{i & 255}"
+        listing.append(device)
+    added = [googleAuth.device_info_from_api(synthetic_device(len(devices) + i)) for i in range(10)]
+    return listing[10:] + added
+
+
+def python_diff(previous, current, ignore):
+    """Per-record comparison, for reference."""
+    before = {inventory_snapshot.device_key(d): d for d in previous}
+    changed = 0
+    for device in current:
+        old = before.get(inventory_snapshot.device_key(device))
+        if old is not None and any(old.get(k) != v for k, v in device.items() if k not in ignore):
+            changed += 1
+    return changed
+
+
+def timed(func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--devices", default="100k", help="Fleet size: 1k, 10k, 100k or a number.")
+    parser.add_argument("--changed", type=float, default=0.01, help="Fraction of devices changed between runs.")
+    parser.add_argument("--format", choices=["parquet", "feather", "csv.gz"], default="parquet")
+    args = parser.parse_args()
+
+    size = parse_fleet_size(args.devices)
+    print(f"Building {size} synthetic devices...")
+    previous_devices = build_fleet(size)
+    current_devices = next_run(previous_devices, args.changed)
+
+    inventory_snapshot.require_pandas()  # keep the import out of the timings
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, f"inventory.{args.format}")
+        # Last run: build and save the baseline snapshot
+        previous, baseline_s = timed(inventory_snapshot.to_frame, previous_devices)
+        written, write_s = timed(inventory_snapshot.write_frame, previous, path)
+        # This run, step by step
+        current, build_s = timed(inventory_snapshot.to_frame, current_devices)
+        loaded, read_s = timed(inventory_snapshot.read_frame, written)
+        (added, removed, changed), diff_s = timed(inventory_snapshot.diff_frames, loaded, current)
+        wanted = set(added.index).union(changed.index)
+        selected, select_s = timed(lambda: [d for d in current_devices
+                                            if inventory_snapshot.device_key(d) in wanted])
+        # This run, as the sync calls it
+        inventory = inventory_snapshot.InventorySnapshot(written)
+        synced, total_s = timed(inventory.changed_devices, current_devices)
+        reference, python_s = timed(python_diff, previous_devices, current_devices,
+                                    set(inventory_snapshot.DEFAULT_IGNORE))
+
+        print(f"snapshot file     {os.path.basename(written)} ({os.path.getsize(written) / 1024:.0f} KiB)")
+        print(f"write snapshot    {write_s * 1000:8.1f} ms  (baseline frame built in {baseline_s * 1000:.1f} ms)")
+        print(f"build frame       {build_s * 1000:8.1f} ms")
+        print(f"read snapshot     {read_s * 1000:8.1f} ms")
+        print(f"vectorized diff   {diff_s * 1000:8.1f} ms  "
+              f"({len(added)} added, {len(changed)} changed, {len(removed)} removed)")
+        print(f"select records    {select_s * 1000:8.1f} ms  ({len(selected)} to sync)")
+        print(f"end to end        {total_s * 1000:8.1f} ms  (InventorySnapshot.changed_devices, {len(synced)} to sync)")
+        print(f"per-record diff   {python_s * 1000:8.1f} ms  ({reference} changed; in memory, no snapshot I/O)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Benchmark: batch vs per-device normalization of Google device records.
+
+Builds synthetic Directory devices (benchmarks/fake_directory.py), maps them
+through googleAuth.device_info_from_api, varies the MAC, status, IP and
+user formatting, and times:
+
+- device_normalization.normalize_device over every record,
+- normalize_devices over Directory-page batches and over the whole fleet,
+- with pandas installed, the same steps as pandas string operations on
+  columns (pyarrow strings when available), for reference.
+
+Every path must produce identical records.
+
+Usage:
+    python benchmarks/bench_normalization.py [--devices 100k] [--batch-size 300]
+"""
+
+import argparse
+import copy
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+import device_normalization as dn  # noqa: E402
+import googleAuth  # noqa: E402
+from fake_directory import parse_fleet_size, synthetic_device  # noqa: E402
+
+
+def raw_record(i):
+    """A device record with the formatting variations Google data shows."""
+    device = googleAuth.device_info_from_api(synthetic_device(i))
+    mac = device['Mac Address']
+    if i % 3 == 1:
+        device['Mac Address'] = ':'.join(mac[j:j + 2] for j in range(0, 12, 2))
+    elif i % 3 == 2:
+        device['Mac Address'] = '-'.join(mac[j:j + 2] for j in range(0, 12, 2)).upper()
+    if i % 7 == 0:
+        device['Device User'] = f"  {device['Device User'] or ''}".upper()
+    if i % 11 == 0:
+        device['Last Known IP Address'] = ''
+    device['Status'] = device['Status'].lower() if i % 2 else device['Status']
+    return device
+
+
+def pandas_normalize(devices):
+    """The normalization as vectorized pandas string operations, writing back into the records."""
+    import pandas as pd
+
+    try:
+        import pyarrow  # noqa: F401
+        dtype = 'string[pyarrow]'
+    except ImportError:
+        dtype = object
+
+    def blank(values, text):
+        return values.isna().to_numpy() | (text == '').to_numpy()
+
+    def macs(values):
+        text = values.astype(str)
+        keep = blank(values, text) | text.str.contains(':', regex=False).to_numpy()
+        cleaned = text.str.lower().str.replace('-', '', regex=False).str.strip()
+        return values.where(keep, cleaned.str.replace(r'(?s)^(..)(..)(..)(..)(..)(..)$',
+                                                      r'\1:\2:\3:\4:\5:\6', regex=True))
+
+    def dates(values):
+        text = values.astype(str)
+        return text.str.slice(0, 10).where(~blank(values, text), None)
+
+    def texts(values, case=None):
+        text = values.astype(str).str.strip()
+        if case:
+            text = getattr(text.str, case)()
+        return text.where(~blank(values, text), None)
+
+    transforms = {dn.MAC: macs, dn.ACTIVE_DATE: dates, dn.EOL: dates,
+                  dn.STATUS: lambda v: texts(v, 'upper'), dn.IP_ADDRESS: texts,
+                  dn.USER: lambda v: texts(v, 'lower')}
+    for key, transform in transforms.items():
+        values = transform(pd.Series([device[key] for device in devices], dtype=dtype)).astype(object)
+        for device, value in zip(devices, values.where(values.notna(), None).tolist()):
+            device[key] = value
+    return devices
+
+
+def timed(func, records):
+    records = copy.deepcopy(records)
+    started = time.perf_counter()
+    result = func(records)
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--devices", default="100k", help="Fleet size: 1k, 10k, 100k or a number.")
+    parser.add_argument("--batch-size", type=int, default=300, help="Records per batch (a Directory page).")
+    args = parser.parse_args()
+
+    size = parse_fleet_size(args.devices)
+    print(f"Building {size} synthetic devices...\n")
+    records = [raw_record(i) for i in range(size)]
+
+    runs = [
+        ("per-device", lambda r: [dn.normalize_device(d) for d in r]),
+        (f"batches of {args.batch_size}", lambda r: list(dn.normalize_batches(r, args.batch_size))),
+        ("whole fleet", dn.normalize_devices),
+    ]
+    try:
+        import pandas  # noqa: F401
+        runs.append(("pandas columns", pandas_normalize))
+    except ImportError:
+        print("pandas not installed; skipping the pandas reference\n")
+
+    expected = None
+    for name, func in runs:
+        result, seconds = timed(func, records)
+        expected = result if expected is None else expected
+        print(f"{name:<20}{seconds * 1000:8.1f} ms  {'' if result == expected else 'OUTPUT DIFFERS'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Benchmark: cold start latency, from process launch to the first Snipe-IT request.
+
+Each sample is a fresh Python process that imports snipe-IT.py (as the timer
+would) and sends one request to a local fake Snipe-IT server
+(benchmarks/fake_snipeit.py). It reports the time from launch to the end of
+the imports and to the first response, and whether the Gemini SDK and the
+Google API client were imported eagerly. Both should be imported on first use.
+
+With --directory it also times building the Directory API client through
+googleAuth.build, first with no cached discovery document and then from the
+GOOGLE_DISCOVERY_CACHE_FILE copy written by the first build. This needs
+google-api-python-client; no Google credentials or network are used.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 10] [--directory]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from fake_snipeit import FakeSnipeIT, FakeSnipeITServer  # noqa: E402
+
+
+def run_child(options):
+    """Child process: import snipe-IT.py, send one request and report timings as JSON."""
+    started = time.perf_counter()
+    import importlib.util
+
+    sys.path.insert(0, ROOT)
+    spec = importlib.util.spec_from_file_location("snipe_it", os.path.join(ROOT, "snipe-IT.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    imported = time.perf_counter()
+
+    response = module.get_client().get("/hardware", params={"limit": 1})
+    first_request = time.perf_counter()
+
+    result = {
+        "launched_to_response": time.time(),
+        "import_seconds": imported - started,
+        "first_request_seconds": first_request - imported,
+        "status": response.status_code if response is not None else None,
+        "gemini_sdk_imported": "google.generativeai" in sys.modules,
+        "googleapiclient_imported": "googleapiclient" in sys.modules,
+    }
+
+    if options.get("directory"):
+        from google.auth.credentials import AnonymousCredentials
+
+        import googleAuth
+
+        for name in ("build_uncached_seconds", "build_cached_seconds"):
+            start = time.perf_counter()
+            googleAuth.build("admin", "directory_v1", credentials=AnonymousCredentials())
+            result[name] = time.perf_counter() - start
+    print(json.dumps(result))
+
+
+def run_one(server, tmp, directory):
+    env = dict(
+        os.environ,
+        API_TOKEN="bench",
+        ENDPOINT_URL=server.base_url,
+        DELEGATED_ADMIN="admin@example.org",
+        GOOGLE_SERVICE_ACCOUNT_FILE=os.path.join(tmp, "service_account.json"),
+        Gemini_APIKEY="bench",
+        LOG_FILE=os.path.join(tmp, "sync.log"),
+        LOOKUP_CACHE_FILE="",
+        GEMINI_CATEGORY_CACHE_FILE=os.path.join(tmp, "category_cache.sqlite3"),
+        GOOGLE_DISCOVERY_CACHE_FILE=os.path.join(tmp, f"discovery-{time.monotonic_ns()}.json"),
+    )
+    launched = time.time()
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", json.dumps({"directory": directory})],
+        cwd=tmp, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    result["launch_to_first_response_seconds"] = result.pop("launched_to_response") - launched
+    return result
+
+
+def summarize(results, key):
+    values = [r[key] for r in results if key in r]
+    if not values:
+        return None
+    return f"median {statistics.median(values) * 1000:8.1f} ms   min {min(values) * 1000:8.1f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10, help="Cold starts to sample (default 10)")
+    parser.add_argument("--directory", action="store_true",
+                        help="Also time building the Directory client without and with a cached discovery document")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(json.loads(args.child))
+        return
+
+    results = []
+    with FakeSnipeITServer(FakeSnipeIT()) as server, tempfile.TemporaryDirectory(prefix="g2s-startup-") as tmp:
+        with open(os.path.join(tmp, "service_account.json"), "w") as f:
+            f.write("{}")
+        for _ in range(args.runs):
+            results.append(run_one(server, tmp, args.directory))
+
+    print(f"Cold starts: {len(results)}")
+    for key, label in [
+        ("launch_to_first_response_seconds", "launch -> first response"),
+        ("import_seconds", "import snipe-IT.py"),
+        ("first_request_seconds", "first Snipe-IT request"),
+        ("build_uncached_seconds", "Directory client (no cache)"),
+        ("build_cached_seconds", "Directory client (cached)"),
+    ]:
+        line = summarize(results, key)
+        if line:
+            print(f"  {label:<30} {line}")
+    print(f"  Gemini SDK imported at startup:       {any(r['gemini_sdk_imported'] for r in results)}")
+    print(f"  googleapiclient imported at startup:  {any(r['googleapiclient_imported'] for r in results)}")
+
+
+if __name__ == "__main__":
+    main()
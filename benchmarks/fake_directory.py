@@ -0,0 +1,131 @@
+"""
+Synthetic stand-in for the Google Directory API `chromeosdevices.list`.
+
+`FakeDirectoryService` mimics the discovery client's call chain
+(`service.chromeosdevices().list(...).execute()`), generating a deterministic
+fleet of any size page by page, so nothing is held in memory beyond the page
+being returned. Devices are listed newest `lastSync` first, like the real
+query the sync issues, and every record carries the fields googleAuth maps.
+
+Use it by replacing `googleAuth.build` (and `googleAuth.auth`) in-process:
+    service = FakeDirectoryService(10_000)
+    googleAuth.auth = lambda: object()
+    googleAuth.build = lambda *args, **kwargs: service
+"""
+
+import time
+from datetime import datetime, timedelta, timezone
+
+FLEET_SIZES = {"1k": 1_000, "10k": 10_000, "100k": 100_000}
+
+_EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def parse_fleet_size(value):
+    """Accept '1k', '10k', '100k' or a plain device count."""
+    return FLEET_SIZES.get(str(value).lower()) or int(value)
+
+
+def synthetic_device(i, models=25, users=True):
+    """Build the i-th device of the fleet as the Directory API would return it."""
+    last_sync = _EPOCH - timedelta(minutes=i)
+    date = last_sync.date().isoformat()
+    device = {
+        "kind": "admin#directory#chromeosdevice",
+        "deviceId": f"fake-{i:08d}",
+        "etag": f'"fake-{i}-v1"',
+        "serialNumber": f"BENCH{i:08d}",
+        "status": "ACTIVE" if i % 20 else "DISABLED",
+        "lastSync": last_sync.strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+        "model": f"Bench Chromebook {i % models}",
+        "orgUnitPath": f"/Students/School {i % 40}",
+        "macAddress": f"{0xa81d16000000 + i:012x}",
+        "firstEnrollmentTime": (_EPOCH - timedelta(days=365)).strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+        "autoUpdateThrough": "2030-06-01T00:00:00.000Z",
+        "activeTimeRanges": [{"date": date, "activeTime": 3_600_000}],
+        "lastKnownNetwork": [{"ipAddress": f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}"}],
+    }
+    if users:
+        device["recentUsers"] = [{"type": "USER_TYPE_MANAGED", "email": f"user{i % 5000}@example.org"}]
+    return device
+
+
+class _Request:
+    def __init__(self, fetch):
+        self.fetch = fetch
+
+    def execute(self, num_retries=0):
+        return self.fetch()
+
+
+class _OrgUnits:
+    def __init__(self, service):
+        self.service = service
+
+    def list(self, customerId=None, type=None, **kwargs):
+        units = [{"orgUnitPath": path} for path in self.service.org_units()]
+        return _Request(lambda: {"organizationUnits": units})
+
+
+class FakeDirectoryService:
+    """Generates `total` devices across pages of up to `maxResults`."""
+
+    def __init__(self, total, models=25, latency_ms=0.0, max_page_size=300):
+        """
+        Args:
+            total (int): Fleet size.
+            models (int): Number of distinct model names.
+            latency_ms (float): Delay added to each page, like a Directory round trip.
+            max_page_size (int): Largest page the API returns (300 for chromeosdevices).
+        """
+        self.total = total
+        self.models = models
+        self.latency_ms = latency_ms
+        self.max_page_size = max_page_size
+        self.pages_served = 0
+
+    def chromeosdevices(self):
+        return self
+
+    def orgunits(self):
+        return _OrgUnits(self)
+
+    def org_units(self):
+        """Every org unit path in the fleet, root first."""
+        return ["/", "/Students"] + sorted({synthetic_device(i)["orgUnitPath"] for i in range(min(self.total, 40))})
+
+    def list(self, customerId=None, maxResults=100, pageToken=None, orgUnitPath=None,
+             includeChildOrgunits=None, query=None, **kwargs):
+        def matches(device):
+            if orgUnitPath and orgUnitPath != "/":
+                path = device["orgUnitPath"]
+                if path != orgUnitPath and not (includeChildOrgunits and path.startswith(orgUnitPath + "/")):
+                    return False
+            elif orgUnitPath == "/" and not includeChildOrgunits:
+                return False  # synthetic devices all live below the root
+            if query and query.startswith("status:"):
+                return device["status"] == query.split(":", 1)[1].upper()
+            return True
+
+        filtered = orgUnitPath is not None or query is not None
+        return _Request(lambda: self.page(maxResults, pageToken, matches if filtered else None))
+
+    def page(self, max_results, page_token, matches=None):
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000.0)
+        size = min(max_results or 100, self.max_page_size)
+        start = int(page_token or 0)
+        devices, i = [], start
+        while i < self.total and len(devices) < size:
+            device = synthetic_device(i, self.models)
+            i += 1
+            if matches is None or matches(device):
+                devices.append(device)
+        self.pages_served += 1
+        result = {
+            "kind": "admin#directory#chromeosdevices",
+            "chromeosdevices": devices,
+        }
+        if i < self.total:
+            result["nextPageToken"] = str(i)
+        return result
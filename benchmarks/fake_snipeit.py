@@ -0,0 +1,386 @@
+"""
+In-memory stand-in for the Snipe-IT REST API, for load tests.
+
+Covers the endpoints the sync uses:
+    GET /hardware (limit/offset pagination, search), POST /hardware, PATCH /hardware/{id},
+    POST /hardware/{id}/checkout, POST /hardware/{id}/checkin,
+    GET/POST /models, PATCH /models/{id}, GET /categories,
+    GET /statuslabels (by name, or every label with limit/offset pagination),
+    GET /users (by email, or every user with limit/offset pagination)
+
+Responses follow Snipe-IT's shapes (rows/total, status/messages/payload,
+custom_fields keyed by label with the column in `field`). Every request can
+be delayed by a configurable latency, and a fraction of them answered with
+429 + Retry-After to exercise the client's backoff. Request counts per route
+are kept in `FakeSnipeIT.stats`. For unit tests, `FakeSnipeITClient` sends the
+same requests in-process, without HTTP.
+
+Run standalone:
+    python benchmarks/fake_snipeit.py --port 8081 --latency-ms 20 --rate-429 0.01
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+API_PREFIX = "/api/v1"
+
+# Custom field columns and the labels Snipe-IT shows for them
+CUSTOM_FIELD_LABELS = {
+    "_snipeit_mac_address_1": "MAC Address",
+    "_snipeit_sync_date_9": "Sync Date",
+    "_snipeit_ip_address_3": "IP Address",
+    "_snipeit_user_10": "User",
+}
+
+
+class FakeSnipeIT:
+    """Thread-safe in-memory Snipe-IT data plus fault injection settings."""
+
+    def __init__(self, latency_ms=0.0, jitter_ms=0.0, rate_429=0.0, retry_after=1,
+                 max_page_size=500, status_labels=None, seed=0):
+        """
+        Args:
+            latency_ms (float): Delay added to every response.
+            jitter_ms (float): Random extra delay of up to this many milliseconds.
+            rate_429 (float): Fraction of requests answered with 429.
+            retry_after (int): Retry-After seconds sent with injected 429s.
+            max_page_size (int): Largest `limit` honoured on GET /hardware.
+            status_labels (dict, optional): Status label name -> id.
+            seed (int): Seed for latency jitter and 429 injection.
+        """
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rate_429 = rate_429
+        self.retry_after = retry_after
+        self.max_page_size = max_page_size
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.hardware = {}
+        self.by_tag = {}
+        self.models = {}
+        self.categories = {}
+        self.users = {}
+        self.status_labels = dict(status_labels or {
+            "ACTIVE": 2, "DISABLED": 3, "DEPROVISIONED": 4, "INACTIVE": 5, "PROVISIONED": 6,
+        })
+        self.stats = {}
+        self.throttled = 0
+        self._next_id = 1000
+
+    # ---- data helpers -------------------------------------------------
+
+    def next_id(self):
+        self._next_id += 1
+        return self._next_id
+
+    def add_hardware(self, fields):
+        """Insert a hardware row built from a POST/seed payload; returns the row."""
+        row = {
+            "id": self.next_id(),
+            "asset_tag": fields.get("asset_tag"),
+            "serial": fields.get("serial"),
+            "model": None,
+            "status_label": None,
+            "asset_eol_date": None,
+            "assigned_to": None,
+            "custom_fields": {},
+        }
+        self.apply_hardware(row, fields)
+        self.hardware[row["id"]] = row
+        self.by_tag[str(row["asset_tag"]).lower()] = row
+        return row
+
+    def apply_hardware(self, row, fields):
+        for key, value in fields.items():
+            if key == "model_id":
+                name = self.models.get(value, {}).get("name")
+                row["model"] = {"id": value, "name": name}
+            elif key == "status_id":
+                name = next((n for n, i in self.status_labels.items() if i == value), None)
+                row["status_label"] = {"id": value, "name": name}
+            elif key == "asset_eol_date":
+                row["asset_eol_date"] = {"date": value, "formatted": value} if value else None
+            elif key.startswith("_snipeit_"):
+                label = CUSTOM_FIELD_LABELS.get(key, key)
+                row["custom_fields"][label] = {"field": key, "value": value}
+            elif key in ("asset_tag", "serial"):
+                row[key] = value
+
+    def add_model(self, name, category_id=None, fieldset_id=None):
+        model = {"id": self.next_id(), "name": name, "category_id": category_id, "fieldset_id": fieldset_id}
+        self.models[model["id"]] = model
+        return model
+
+    def add_user(self, email, username=None):
+        user = {"id": self.next_id(), "email": email, "username": username or email, "name": email}
+        self.users[email.lower()] = user
+        return user
+
+    def count(self, method, route):
+        key = f"{method} {route}"
+        self.stats[key] = self.stats.get(key, 0) + 1
+
+    @property
+    def total_requests(self):
+        return sum(self.stats.values())
+
+
+def _route(path):
+    """Collapse IDs so stats group by endpoint (e.g. /hardware/{id})."""
+    return re.sub(r"/\d+", "/{id}", path)
+
+
+def make_handler(api):
+    """Build a request handler class bound to a FakeSnipeIT instance."""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body are separate writes; with Nagle on, every keep-alive
+        # response would wait for the client's delayed ACK (~40 ms)
+        disable_nagle_algorithm = True
+
+        def log_message(self, format, *args):
+            pass
+
+        def send_json(self, status, data, headers=None):
+            body = json.dumps(data).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def read_json(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            if not length:
+                return {}
+            try:
+                return json.loads(self.rfile.read(length))
+            except ValueError:
+                return {}
+
+        def handle_request(self, method):
+            url = urlsplit(self.path)
+            path = url.path[len(API_PREFIX):] if url.path.startswith(API_PREFIX) else url.path
+            params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            body = self.read_json() if method in ("POST", "PATCH") else {}
+
+            with api.lock:
+                api.count(method, _route(path))
+                throttle = api.rate_429 and api.random.random() < api.rate_429
+                if throttle:
+                    api.throttled += 1
+                delay = (api.latency_ms + api.random.uniform(0, api.jitter_ms)) / 1000.0
+            if delay:
+                time.sleep(delay)
+            if throttle:
+                self.send_json(429, {"status": "error", "messages": "Too Many Requests"},
+                               {"Retry-After": str(api.retry_after)})
+                return
+
+            with api.lock:
+                status, data = dispatch(api, method, path, params, body)
+            self.send_json(status, data)
+
+        def do_GET(self):
+            self.handle_request("GET")
+
+        def do_POST(self):
+            self.handle_request("POST")
+
+        def do_PATCH(self):
+            self.handle_request("PATCH")
+
+    return Handler
+
+
+def _rows(items):
+    items = list(items)
+    return 200, {"total": len(items), "rows": items}
+
+
+def dispatch(api, method, path, params, body):
+    """Route one request against the in-memory data. Called with `api.lock` held."""
+    match = re.fullmatch(r"/(hardware|models)/(\d+)", path)
+    if match and method == "PATCH":
+        table = api.hardware if match.group(1) == "hardware" else api.models
+        item = table.get(int(match.group(2)))
+        if item is None:
+            return 404, {"status": "error", "messages": "Not found"}
+        if table is api.hardware:
+            api.apply_hardware(item, body)
+        else:
+            item.update(body)
+        return 200, {"status": "success", "messages": "Updated", "payload": item}
+
+    match = re.fullmatch(r"/hardware/(\d+)/(checkout|checkin)", path)
+    if match and method == "POST":
+        row = api.hardware.get(int(match.group(1)))
+        if row is None:
+            return 404, {"status": "error", "messages": "Not found"}
+        if match.group(2) == "checkin":
+            if row["assigned_to"] is None:
+                return 200, {"status": "error", "messages": "That asset is already checked in."}
+            row["assigned_to"] = None
+            return 200, {"status": "success", "messages": "Asset checked in", "payload": row}
+        user = next((u for u in api.users.values() if u["id"] == body.get("assigned_user")), None)
+        if row["assigned_to"] is not None or user is None:
+            return 200, {"status": "error", "messages": "That asset is not available for checkout!"}
+        row["assigned_to"] = {"id": user["id"], "username": user["username"], "name": user["name"], "type": "user"}
+        return 200, {"status": "success", "messages": "Asset checked out", "payload": row}
+
+    if path == "/hardware" and method == "GET":
+        search = (params.get("search") or "").lower()
+        rows = [r for r in api.hardware.values()
+                if not search or search in str(r["asset_tag"]).lower() or search in str(r["serial"]).lower()]
+        rows.sort(key=lambda r: r["id"])
+        limit = min(int(params.get("limit", 50)), api.max_page_size)
+        offset = int(params.get("offset", 0))
+        return 200, {"total": len(rows), "rows": rows[offset:offset + limit]}
+
+    if path == "/hardware" and method == "POST":
+        tag = str(body.get("asset_tag")).lower()
+        if tag in api.by_tag:
+            return 200, {"status": "error",
+                         "messages": {"asset_tag": ["The asset tag must be unique."]}, "payload": None}
+        row = api.add_hardware(body)
+        return 200, {"status": "success", "messages": "Asset created", "payload": row}
+
+    if path == "/models" and method == "GET":
+        search = (params.get("search") or "").lower()
+        return _rows(m for m in api.models.values() if search in m["name"].lower())
+
+    if path == "/models" and method == "POST":
+        model = api.add_model(body.get("name"), body.get("category_id"), body.get("fieldset_id"))
+        return 200, {"status": "success", "messages": "Model created", "payload": model}
+
+    if path == "/statuslabels" and method == "GET":
+        name = params.get("name")
+        if name:
+            return _rows({"id": i, "name": n} for n, i in api.status_labels.items() if n == name)
+        search = (params.get("search") or "").lower()
+        rows = sorted(({"id": i, "name": n} for n, i in api.status_labels.items() if search in n.lower()),
+                      key=lambda s: s["id"])
+        limit = min(int(params.get("limit", 50)), api.max_page_size)
+        offset = int(params.get("offset", 0))
+        return 200, {"total": len(rows), "rows": rows[offset:offset + limit]}
+
+    if path == "/categories" and method == "GET":
+        name = params.get("name")
+        if name and name not in api.categories:
+            api.categories[name] = api.next_id()
+        return _rows([{"id": api.categories[name], "name": name}] if name else [])
+
+    if path == "/users" and method == "GET":
+        email = (params.get("email") or "").lower()
+        if email:
+            return _rows([api.users[email]] if email in api.users else [])
+        rows = sorted(api.users.values(), key=lambda u: u["id"])
+        limit = min(int(params.get("limit", 50)), api.max_page_size)
+        offset = int(params.get("offset", 0))
+        return 200, {"total": len(rows), "rows": rows[offset:offset + limit]}
+
+    return 404, {"status": "error", "messages": f"No fake route for {method} {path}"}
+
+
+class FakeResponse:
+    """The parts of `requests.Response` the sync reads."""
+
+    def __init__(self, status_code, data):
+        self.status_code = status_code
+        self.text = json.dumps(data)
+        self.content = self.text.encode("utf-8")
+        self.headers = {}
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class FakeSnipeITClient:
+    """Stand-in for snipeit_client.SnipeITClient that dispatches straight to a FakeSnipeIT."""
+
+    def __init__(self, api=None):
+        self.api = api or FakeSnipeIT()
+
+    def request(self, method, path, json=None, params=None, **kwargs):
+        path = path[len(API_PREFIX):] if path.startswith(API_PREFIX) else path
+        params = {key: str(value) for key, value in (params or {}).items()}
+        with self.api.lock:
+            self.api.count(method, _route(path))
+            return FakeResponse(*dispatch(self.api, method, path, params, json or {}))
+
+    def get(self, path, params=None, **kwargs):
+        return self.request("GET", path, params=params)
+
+    def post(self, path, json=None, **kwargs):
+        return self.request("POST", path, json=json)
+
+    def patch(self, path, json=None, **kwargs):
+        return self.request("PATCH", path, json=json)
+
+    def close(self):
+        pass
+
+
+class FakeSnipeITServer:
+    """Runs a FakeSnipeIT on a background HTTP server thread."""
+
+    def __init__(self, api=None, host="127.0.0.1", port=0):
+        self.api = api or FakeSnipeIT()
+        self.httpd = ThreadingHTTPServer((host, port), make_handler(self.api))
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="fake-snipeit", daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}{API_PREFIX}"
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a fake Snipe-IT API for load tests.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Fraction of requests answered with 429.")
+    parser.add_argument("--retry-after", type=int, default=1)
+    args = parser.parse_args()
+
+    api = FakeSnipeIT(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                      rate_429=args.rate_429, retry_after=args.retry_after)
+    server = FakeSnipeITServer(api, args.host, args.port)
+    print(f"Fake Snipe-IT listening on {server.base_url} (Ctrl+C to stop)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        print(json.dumps(api.stats, indent=2, sort_keys=True))
+
+
+if __name__ == "__main__":
+    main()
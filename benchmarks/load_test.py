@@ -0,0 +1,183 @@
+"""
+Load test: run the real sync entry point against local fake Snipe-IT and Directory APIs.
+
+For each fleet size a fresh fake Snipe-IT server (benchmarks/fake_snipeit.py)
+is started, then snipe-IT.py is run in a child process with
+`googleAuth.build` replaced by a synthetic FakeDirectoryService
+(benchmarks/fake_directory.py) and Gemini classification stubbed out.
+Everything else (HTTP client, rate limiter, lookups, payloads, engines) is
+the production code path. Reports devices per second, Snipe-IT requests per
+device, injected 429s and the child's peak RSS.
+
+Requires the project's runtime dependencies (requirements.txt).
+
+Usage:
+    python benchmarks/load_test.py --devices 1k 10k 100k
+    python benchmarks/load_test.py --devices 10k --latency-ms 20 --rate-429 0.01 --workers 8
+    python benchmarks/load_test.py --devices 10k --engine async --stream -- --incremental
+    python benchmarks/load_test.py --devices 10k --users 5000
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from fake_directory import parse_fleet_size  # noqa: E402
+from fake_snipeit import FakeSnipeIT, FakeSnipeITServer  # noqa: E402
+
+
+def run_child(options):
+    """Child process: patch the Google/Gemini edges and run snipe-IT.py as __main__."""
+    import runpy
+
+    sys.path.insert(0, ROOT)
+    import gemini
+    import googleAuth
+    from category_cache import normalize_categories
+    from fake_directory import FakeDirectoryService
+
+    service = FakeDirectoryService(options["devices"], models=options["models"],
+                                   latency_ms=options["directory_latency_ms"])
+    googleAuth.auth = lambda: object()
+    googleAuth.build = lambda *args, **kwargs: service
+    gemini.classify_model = lambda model_name, categories=None: normalize_categories(categories)[0]
+    gemini.classify_models = lambda names, categories=None: {
+        name: normalize_categories(categories)[0] for name in names}
+
+    sys.argv = [os.path.join(ROOT, "snipe-IT.py")] + options["sync_args"]
+    runpy.run_path(sys.argv[0], run_name="__main__")
+
+
+def seed_existing(api, count):
+    """Pre-create `count` assets (with stale fields) so the update path is exercised too."""
+    for i in range(count):
+        serial = f"BENCH{i:08d}"
+        api.add_hardware({"asset_tag": serial, "serial": serial, "model_id": 87, "status_id": 2})
+
+
+def seed_users(api, count):
+    """Create the Snipe-IT users matching the fake fleet's recent users (user{i}@example.org)."""
+    for i in range(count):
+        api.add_user(f"user{i}@example.org")
+
+
+def run_one(devices, args):
+    api = FakeSnipeIT(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                      rate_429=args.rate_429, retry_after=args.retry_after)
+    seed_existing(api, int(devices * args.existing))
+    seed_users(api, args.users)
+
+    with FakeSnipeITServer(api) as server, tempfile.TemporaryDirectory(prefix="g2s-bench-") as tmp:
+        service_account = os.path.join(tmp, "service_account.json")
+        with open(service_account, "w") as f:
+            f.write("{}")
+        env = dict(
+            os.environ,
+            API_TOKEN="bench",
+            ENDPOINT_URL=server.base_url,
+            DELEGATED_ADMIN="admin@example.org",
+            GOOGLE_SERVICE_ACCOUNT_FILE=service_account,
+            Gemini_APIKEY=os.environ.get("Gemini_APIKEY", "bench"),
+            LOG_FILE=os.path.join(tmp, "sync.log"),
+            SYNC_STATE_FILE=os.path.join(tmp, "sync_state.json"),
+            LOOKUP_CACHE_FILE="",
+            GEMINI_CATEGORY_CACHE_FILE=os.path.join(tmp, "category_cache.sqlite3"),
+            SNIPE_IT_RATE_LIMIT_PER_MINUTE=str(args.rate_limit),
+            SNIPE_IT_RATE_LIMIT_BURST=str(max(5, args.rate_limit // 60)),
+            RETRY_DELAY_SECONDS="1",
+        )
+        if args.users:
+            env["SNIPE_IT_CHECKOUT_TO_USER"] = "true"
+
+        sync_args = list(args.sync_args)
+        if args.engine:
+            sync_args += ["--engine", args.engine]
+        if args.workers:
+            sync_args += ["--workers", str(args.workers)]
+        if args.stream:
+            sync_args.append("--stream")
+        options = {
+            "devices": devices,
+            "models": args.models,
+            "directory_latency_ms": args.directory_latency_ms,
+            "sync_args": sync_args,
+        }
+
+        output = None if args.verbose else subprocess.DEVNULL
+        start = time.perf_counter()
+        child = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--child", json.dumps(options)],
+                                 cwd=tmp, env=env, stdout=output, stderr=output)
+        _, status, usage = os.wait4(child.pid, 0)
+        child.returncode = os.waitstatus_to_exitcode(status)
+        elapsed = time.perf_counter() - start
+
+    requests_made = api.total_requests
+    return {
+        "devices": devices,
+        "exit": child.returncode,
+        "seconds": elapsed,
+        "devices_per_second": devices / elapsed if elapsed else 0.0,
+        "requests": requests_made,
+        "requests_per_device": requests_made / devices if devices else 0.0,
+        "throttled": api.throttled,
+        # ru_maxrss is reported in KiB on Linux
+        "peak_rss_mib": usage.ru_maxrss / 1024,
+        "routes": dict(sorted(api.stats.items())),
+    }
+
+
+def main():
+    if len(sys.argv) == 3 and sys.argv[1] == "--child":
+        run_child(json.loads(sys.argv[2]))
+        return
+
+    parser = argparse.ArgumentParser(description="Load test the sync against local fake APIs.",
+                                     epilog="Arguments after -- are passed to snipe-IT.py.")
+    parser.add_argument("--devices", nargs="+", default=["1k"], help="Fleet sizes: 1k, 10k, 100k or a count.")
+    parser.add_argument("--engine", choices=["threads", "async"])
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--stream", action="store_true")
+    parser.add_argument("--models", type=int, default=25, help="Distinct model names in the fleet.")
+    parser.add_argument("--existing", type=float, default=0.0,
+                        help="Fraction of the fleet already present in Snipe-IT (exercises updates).")
+    parser.add_argument("--users", type=int, default=0,
+                        help="Snipe-IT users to seed; when set, active assets are checked out to them.")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Fake Snipe-IT latency per request.")
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Fraction of Snipe-IT requests answered 429.")
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--directory-latency-ms", type=float, default=0.0, help="Fake Directory latency per page.")
+    parser.add_argument("--rate-limit", type=int, default=1_000_000,
+                        help="SNIPE_IT_RATE_LIMIT_PER_MINUTE for the run (default effectively unlimited).")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+    parser.add_argument("--verbose", action="store_true", help="Show the sync's own output.")
+    parser.add_argument("sync_args", nargs=argparse.REMAINDER)
+    args = parser.parse_args()
+    if args.sync_args[:1] == ["--"]:
+        args.sync_args = args.sync_args[1:]
+
+    results = []
+    for size in args.devices:
+        result = run_one(parse_fleet_size(size), args)
+        results.append(result)
+        if not args.json:
+            if len(results) == 1:
+                print(f"{'devices':>9}{'seconds':>10}{'dev/s':>10}{'requests':>10}{'req/dev':>9}"
+                      f"{'429s':>7}{'peak RSS MiB':>14}{'exit':>6}")
+            print(f"{result['devices']:>9}{result['seconds']:>10.1f}{result['devices_per_second']:>10.1f}"
+                  f"{result['requests']:>10}{result['requests_per_device']:>9.2f}{result['throttled']:>7}"
+                  f"{result['peak_rss_mib']:>14.1f}{result['exit']:>6}")
+    if args.json:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
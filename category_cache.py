@@ -0,0 +1,285 @@
+"""
+Durable cache of Gemini model-to-category classifications.
+
+Stores the resolved category for each (normalized model name, category list)
+pair in a local SQLite database, so a model is only sent to Gemini once even
+if creating it in Snipe-IT fails or several runs race. Concurrent requests for
+the same model share a single in-flight Gemini call.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_model_name(name):
+    """Normalize a model name: lowercase with collapsed whitespace."""
+    return " ".join(str(name).lower().split())
+
+
+def normalize_categories(categories):
+    """
+    Normalize a category list into a stable cache key.
+
+    Args:
+        categories (str | list): Comma-separated string or list of category names.
+
+    Returns:
+        str: Sorted, lowercased, comma-joined categories.
+    """
+    if isinstance(categories, str):
+        categories = categories.split(',')
+    return ",".join(sorted({c.strip().lower() for c in categories if c.strip()}))
+
+
+def match_category(answer, categories):
+    """
+    Match a free-text answer against the allowed categories.
+
+    Returns:
+        str: The canonical category name, or None if the answer is not in the list.
+    """
+    if isinstance(categories, str):
+        categories = categories.split(',')
+    wanted = (answer or "").strip().strip('*').strip().lower()
+    for category in categories:
+        if category.strip().lower() == wanted:
+            return category.strip()
+    return None
+
+
+class SingleFlight:
+    """De-duplicates concurrent calls for the same key into one execution."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, func):
+        """
+        Run `func` once per key at a time; concurrent callers wait for and share the result.
+
+        Exceptions raised by the leader are re-raised in every waiting caller.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = {'event': threading.Event(), 'result': None, 'error': None}
+                self._calls[key] = call
+
+        if not leader:
+            call['event'].wait()
+        else:
+            try:
+                call['result'] = func()
+            except Exception as e:
+                call['error'] = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call['event'].set()
+
+        if call['error'] is not None:
+            raise call['error']
+        return call['result']
+
+
+class CategoryCache:
+    """SQLite-backed cache mapping model names to resolved categories."""
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): SQLite database file. Use ':memory:' for a throwaway cache.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+        self._conn = None
+
+    def _connection(self):
+        if self._conn is None:
+            if self.path != ':memory:':
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS categories (
+                       model_key TEXT NOT NULL,
+                       categories_key TEXT NOT NULL,
+                       model_name TEXT NOT NULL,
+                       category TEXT NOT NULL,
+                       updated_at REAL NOT NULL,
+                       PRIMARY KEY (model_key, categories_key)
+                   )"""
+            )
+            self._conn.commit()
+        return self._conn
+
+    def get(self, model_name, categories):
+        """Return the cached category for a model, or None."""
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT category FROM categories WHERE model_key = ? AND categories_key = ?",
+                (normalize_model_name(model_name), normalize_categories(categories))
+            ).fetchone()
+        return row[0] if row else None
+
+    def put(self, model_name, categories, category):
+        """Store (or replace) the category for a model."""
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO categories VALUES (?, ?, ?, ?, ?)",
+                (normalize_model_name(model_name), normalize_categories(categories),
+                 model_name, category, time.time())
+            )
+            conn.commit()
+
+    def resolve(self, model_name, categories, classify):
+        """
+        Return the category for a model, calling `classify` only on a cache miss.
+
+        Concurrent misses for the same model share one `classify` call. Answers
+        not found in `categories` are returned but not cached.
+
+        Args:
+            model_name (str): Model name to classify.
+            categories (str | list): Allowed categories.
+            classify (callable): Called with no arguments; returns the category text.
+
+        Returns:
+            str: The resolved category.
+        """
+        cached = self.get(model_name, categories)
+        if cached is not None:
+            return cached
+
+        def compute():
+            cached = self.get(model_name, categories)
+            if cached is not None:
+                return cached
+            answer = classify()
+            category = match_category(answer, categories)
+            if category is None:
+                logger.warning(f"Category '{answer}' for model '{model_name}' is not in the allowed list; not caching")
+                return answer
+            self.put(model_name, categories, category)
+            return category
+
+        key = (normalize_model_name(model_name), normalize_categories(categories))
+        return self._flight.do(key, compute)
+
+    def resolve_many(self, model_names, categories, classify_batch, batch_size=50):
+        """
+        Classify every uncached model with as few `classify_batch` calls as possible.
+
+        Misses are sent `batch_size` names at a time. Each answer is validated
+        against `categories`. Only valid answers are cached, so models left out
+        of the answer or given an unknown category go through `resolve` later.
+
+        Args:
+            model_names (iterable): Model names; duplicates are ignored.
+            categories (str | list): Allowed categories.
+            classify_batch (callable): Called with a list of model names; returns
+                a {model name: category text} mapping.
+            batch_size (int): Most models sent in one call.
+
+        Returns:
+            dict: {model name: category} for every model now in the cache.
+        """
+        names = {}
+        for name in model_names:
+            if name:
+                names.setdefault(normalize_model_name(name), name)
+
+        resolved, missing = {}, []
+        for name in names.values():
+            cached = self.get(name, categories)
+            if cached is None:
+                missing.append(name)
+            else:
+                resolved[name] = cached
+
+        batch_size = max(1, batch_size)
+        for start in range(0, len(missing), batch_size):
+            batch = missing[start:start + batch_size]
+            answers = {normalize_model_name(m): c for m, c in classify_batch(batch).items()}
+            for name in batch:
+                answer = answers.get(normalize_model_name(name))
+                category = match_category(answer, categories)
+                if category is None:
+                    logger.warning(f"No valid batched category for model '{name}' (got {answer!r}); "
+                                   "it will be classified on its own")
+                    continue
+                self.put(name, categories, category)
+                resolved[name] = category
+        return resolved
+
+    def dump(self):
+        """Return every cached entry as a list of dicts."""
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT model_name, category, categories_key, updated_at FROM categories ORDER BY model_key"
+            ).fetchall()
+        return [
+            {'model': m, 'category': c, 'categories': k, 'updated_at': u}
+            for m, c, k, u in rows
+        ]
+
+    def prune(self, categories=None, max_age_seconds=None):
+        """
+        Delete stale entries.
+
+        Args:
+            categories (str | list, optional): Remove entries recorded for a different category list.
+            max_age_seconds (float, optional): Remove entries older than this.
+
+        Returns:
+            int: Number of entries removed.
+        """
+        clauses, params = [], []
+        if categories is not None:
+            clauses.append("categories_key != ?")
+            params.append(normalize_categories(categories))
+        if max_age_seconds is not None:
+            clauses.append("updated_at < ?")
+            params.append(time.time() - max_age_seconds)
+        if not clauses:
+            return 0
+        with self._lock:
+            conn = self._connection()
+            cursor = conn.execute(f"DELETE FROM categories WHERE {' OR '.join(clauses)}", params)
+            conn.commit()
+        return cursor.rowcount
+
+    def seed(self, path, categories):
+        """
+        Pre-seed the cache from a JSON file.
+
+        The file holds a list of {"model": ..., "category": ...} objects (the
+        format written by `dump`) or a {model: category} mapping. Entries whose
+        category is not in `categories` are skipped.
+
+        Returns:
+            int: Number of entries stored.
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            data = [{'model': m, 'category': c} for m, c in data.items()]
+
+        stored = 0
+        for entry in data:
+            category = match_category(entry.get('category'), categories)
+            if not entry.get('model') or category is None:
+                logger.warning(f"Skipping invalid category cache seed entry: {entry}")
+                continue
+            self.put(entry['model'], categories, category)
+            stored += 1
+        return stored
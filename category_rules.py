@@ -0,0 +1,105 @@
+"""
+Local rule-based model classification, tried before Gemini.
+
+Most model names say what they are ("Chromebook", "Chromebox", "iPad"), so an
+ordered table of regular expressions resolves them in microseconds without a
+network call. The first rule that matches wins; Gemini is only asked about
+models no rule matches. Hit and miss counts are kept so the run can report how
+often the Gemini path is still taken.
+"""
+
+import json
+import logging
+import re
+import threading
+
+from category_cache import match_category
+
+logger = logging.getLogger(__name__)
+
+# Ordered (pattern, category) pairs matched case-insensitively against the
+# model name. More specific patterns come first ("Chromebook Tablet" is a tablet).
+DEFAULT_RULES = [
+    (r'\bimac\b', 'IMac'),
+    (r'\b(tablet|ipad|galaxy tab|chromebook tab)\b', 'Tablets'),
+    (r'\b(iphone|pixel \d|galaxy [asz]\d*|phone)\b', 'Mobile Devices'),
+    (r'\bchromebook\b', 'Chromebook'),
+    (r'\b(chromebox|chromebase|desktop|optiplex|thinkcentre|elitedesk|prodesk|mac mini|nuc)\b', 'Desktop'),
+    (r'\b(server|poweredge|proliant)\b', 'Servers'),
+    (r'\b(printer|scanner|laserjet|officejet|deskjet)\b', 'Printers & Scanners'),
+    (r'\b(switch|router|access point|firewall)\b', 'Networking Equipment'),
+]
+
+
+def load_rules(path):
+    """
+    Load an ordered rule table from a JSON file.
+
+    The file holds a list of [pattern, category] pairs or
+    {"pattern": ..., "category": ...} objects, in match order.
+
+    Returns:
+        list: (pattern, category) tuples.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    rules = []
+    for entry in data:
+        if isinstance(entry, dict):
+            rules.append((entry.get('pattern'), entry.get('category')))
+        else:
+            rules.append(tuple(entry))
+    return rules
+
+
+class CategoryRules:
+    """Ordered regex rules mapping model names to categories."""
+
+    def __init__(self, rules, categories):
+        """
+        Args:
+            rules (list): (pattern, category) pairs in match order.
+            categories (str | list): Allowed categories; rules naming any other
+                category are skipped with a warning.
+        """
+        self._rules = []
+        for pattern, category in rules:
+            canonical = match_category(category, categories)
+            if not pattern or canonical is None:
+                logger.warning(f"Skipping category rule {pattern!r} -> {category!r}: category not allowed")
+                continue
+            try:
+                self._rules.append((re.compile(pattern, re.IGNORECASE), canonical))
+            except re.error as e:
+                logger.warning(f"Skipping invalid category rule {pattern!r}: {e}")
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._rules)
+
+    def match(self, model_name):
+        """Return the category of the first rule matching `model_name`, or None."""
+        for regex, category in self._rules:
+            if regex.search(model_name or ''):
+                return category
+        return None
+
+    def classify(self, model_name):
+        """Like `match`, but counted towards the hit rate."""
+        category = self.match(model_name)
+        with self._lock:
+            if category is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return category
+
+    def format_stats(self):
+        """Return a one-line summary of how many models the rules resolved."""
+        total = self.hits + self.misses
+        if not total:
+            return "Category rules: no models classified"
+        return (f"Category rules: {self.hits}/{total} models matched locally "
+                f"({100.0 * self.hits / total:.0f}%), {self.misses} left to the category cache or Gemini")
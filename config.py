@@ -33,11 +33,44 @@ class Config:
     SNIPE_IT_DEFAULT_STATUS_ID = int(os.getenv("SNIPE_IT_DEFAULT_STATUS_ID", "2"))
     SNIPE_IT_ACTIVE_STATUS = os.getenv("SNIPE_IT_ACTIVE_STATUS", "ACTIVE")
 
+    # HTTP connection pool and timeouts for the Snipe-IT session
+    SNIPE_IT_POOL_SIZE = int(os.getenv("SNIPE_IT_POOL_SIZE", "10"))
+    SNIPE_IT_CONNECT_TIMEOUT = float(os.getenv("SNIPE_IT_CONNECT_TIMEOUT", "10"))
+    SNIPE_IT_READ_TIMEOUT = float(os.getenv("SNIPE_IT_READ_TIMEOUT", "60"))
+
+    # Rows per page when preloading the hardware index (Snipe-IT caps this at its max_results setting)
+    SNIPE_IT_HARDWARE_PAGE_SIZE = int(os.getenv("SNIPE_IT_HARDWARE_PAGE_SIZE", "500"))
+
+    # Lookup cache for model/status/category/user IDs (empty file path disables persistence)
+    LOOKUP_CACHE_FILE = os.getenv("LOOKUP_CACHE_FILE", "")
+    LOOKUP_CACHE_TTL_MODELS = int(os.getenv("LOOKUP_CACHE_TTL_MODELS", "86400"))
+    LOOKUP_CACHE_TTL_STATUSLABELS = int(os.getenv("LOOKUP_CACHE_TTL_STATUSLABELS", "86400"))
+    LOOKUP_CACHE_TTL_CATEGORIES = int(os.getenv("LOOKUP_CACHE_TTL_CATEGORIES", "86400"))
+    LOOKUP_CACHE_TTL_USERS = int(os.getenv("LOOKUP_CACHE_TTL_USERS", "3600"))
+    # Check active assets out to the Snipe-IT user whose email matches the device's most recent Google user
+    SNIPE_IT_CHECKOUT_TO_USER = os.getenv("SNIPE_IT_CHECKOUT_TO_USER", "false").lower() == "true"
+
     # ==================== Google Workspace Configuration ====================
     GOOGLE_SERVICE_ACCOUNT_FILE = os.getenv("GOOGLE_SERVICE_ACCOUNT_FILE", "service_account.json")
     GOOGLE_DELEGATED_ADMIN = os.getenv("DELEGATED_ADMIN")
     GOOGLE_CHROMEOS_PAGE_SIZE = int(os.getenv("GOOGLE_CHROMEOS_PAGE_SIZE", "300"))
     GOOGLE_CHROMEOS_PROJECTION = os.getenv("GOOGLE_CHROMEOS_PROJECTION", "FULL")
+    # Partial-response field mask: "auto" derives it from googleAuth.DEVICE_FIELDS,
+    # "none" requests whole resources, anything else is sent verbatim
+    GOOGLE_CHROMEOS_FIELDS = os.getenv("GOOGLE_CHROMEOS_FIELDS", "auto")
+
+    # Parallel device listing: "none" (one page chain), "orgunit" or "query"
+    GOOGLE_LIST_PARTITION_BY = os.getenv("GOOGLE_LIST_PARTITION_BY", "none").lower()
+    # Org unit paths to list with "orgunit" (comma-separated); empty = every org unit in the domain
+    GOOGLE_LIST_ORG_UNITS = [p.strip() for p in os.getenv("GOOGLE_LIST_ORG_UNITS", "").split(",") if p.strip()]
+    # Disjoint Directory search queries to list with "query" (semicolon-separated)
+    GOOGLE_LIST_QUERIES = [q.strip() for q in os.getenv("GOOGLE_LIST_QUERIES", "").split(";") if q.strip()]
+    # Partitions paged at the same time, and the page request budget they share
+    GOOGLE_LIST_CONCURRENCY = int(os.getenv("GOOGLE_LIST_CONCURRENCY", "4"))
+    GOOGLE_LIST_RATE_LIMIT_PER_MINUTE = int(os.getenv("GOOGLE_LIST_RATE_LIMIT_PER_MINUTE", "600"))
+
+    # Local copy of the Directory API discovery document, so client creation needs no network
+    GOOGLE_DISCOVERY_CACHE_FILE = os.getenv("GOOGLE_DISCOVERY_CACHE_FILE", "state/admin_directory_v1.json")
 
     # ==================== Gemini AI Configuration ====================
     GEMINI_API_KEY = os.getenv("Gemini_APIKEY")
@@ -46,11 +79,72 @@ class Config:
         "GEMINI_CATEGORIES",
         "IMac,Tablets,Mobile Devices,Servers,Networking Equipment,Printers & Scanners,Desktop,Chromebook"
     )
+    # Local category rules tried before Gemini: JSON file of [pattern, category] pairs
+    # in match order ("" uses the built-in rules in category_rules.py)
+    CATEGORY_RULES_ENABLED = os.getenv("CATEGORY_RULES_ENABLED", "true").lower() == "true"
+    CATEGORY_RULES_FILE = os.getenv("CATEGORY_RULES_FILE", "")
+    # Category for models no rule matches when Gemini is not configured ("" = leave such models uncreated)
+    CATEGORY_DEFAULT = os.getenv("CATEGORY_DEFAULT", "")
+    # Unknown models classified per batched Gemini prompt before syncing (0 = one prompt per model)
+    GEMINI_BATCH_SIZE = int(os.getenv("GEMINI_BATCH_SIZE", "50"))
+    # SQLite cache of model -> category answers, consulted before calling Gemini
+    GEMINI_CATEGORY_CACHE_FILE = os.getenv("GEMINI_CATEGORY_CACHE_FILE", "state/category_cache.sqlite3")
 
     # ==================== Retry Configuration ====================
     MAX_RETRIES = int(os.getenv("MAX_RETRIES", "4"))
     RETRY_DELAY_SECONDS = int(os.getenv("RETRY_DELAY_SECONDS", "20"))
     RETRY_BACKOFF_FACTOR = float(os.getenv("RETRY_BACKOFF_FACTOR", "1.0"))
+    RETRY_MAX_DELAY_SECONDS = float(os.getenv("RETRY_MAX_DELAY_SECONDS", "120"))
+
+    # Shared Snipe-IT rate limiter (Snipe-IT's default API throttle is 120 requests/minute)
+    SNIPE_IT_RATE_LIMIT_PER_MINUTE = float(os.getenv("SNIPE_IT_RATE_LIMIT_PER_MINUTE", "120"))
+    SNIPE_IT_RATE_LIMIT_BURST = int(os.getenv("SNIPE_IT_RATE_LIMIT_BURST", "5"))
+    SNIPE_IT_RATE_LIMIT_SAFETY_FACTOR = float(os.getenv("SNIPE_IT_RATE_LIMIT_SAFETY_FACTOR", "0.9"))
+
+    # ==================== Concurrency Configuration ====================
+    # Number of devices synced concurrently (1 = sequential)
+    SYNC_WORKERS = int(os.getenv("SYNC_WORKERS", "1"))
+    # Maximum devices queued or in flight at once across the worker pool
+    SYNC_QUEUE_SIZE = int(os.getenv("SYNC_QUEUE_SIZE", "64"))
+    # Stream devices from Google into Snipe-IT instead of listing the whole fleet first
+    STREAM_DEVICES = os.getenv("STREAM_DEVICES", "false").lower() == "true"
+    # Maximum Google device records buffered between the Google and Snipe-IT stages
+    STREAM_QUEUE_SIZE = int(os.getenv("STREAM_QUEUE_SIZE", "1000"))
+    # Shard key for --shard i/N: "serial" (stable hash of the serial number) or "orgunit" (Google orgUnitPath)
+    SYNC_SHARD_BY = os.getenv("SYNC_SHARD_BY", "serial").lower()
+    # Split the Snipe-IT rate limit evenly across shards that share one API token
+    SHARD_RATE_LIMIT_SPLIT = os.getenv("SHARD_RATE_LIMIT_SPLIT", "true").lower() == "true"
+    # Shards sharing this shard's API token (set by --processes); defaults to the shard count
+    SHARD_RATE_LIMIT_SHARERS = int(os.getenv("SHARD_RATE_LIMIT_SHARERS") or 0) or None
+    # Optional comma-separated API tokens handed round-robin to the shards started by --processes
+    SNIPE_IT_SHARD_API_TOKENS = [t.strip() for t in os.getenv("SNIPE_IT_SHARD_API_TOKENS", "").split(",") if t.strip()]
+    # Lock file shards use so only one of them creates a given model
+    MODEL_CREATION_LOCK_FILE = os.getenv("MODEL_CREATION_LOCK_FILE", "state/model_create.lock")
+    # Offline planning: snapshots written by --snapshot, read by --plan, and the plan --apply executes
+    GOOGLE_SNAPSHOT_FILE = os.getenv("GOOGLE_SNAPSHOT_FILE", "state/google_devices.jsonl")
+    SNIPEIT_SNAPSHOT_FILE = os.getenv("SNIPEIT_SNAPSHOT_FILE", "state/snipeit_snapshot.json")
+    PLAN_FILE = os.getenv("PLAN_FILE", "state/sync_plan.json")
+    # Diff each full listing against the last run's columnar inventory snapshot and only sync
+    # added and changed devices (needs pandas; pyarrow for Parquet/Feather, else a gzip CSV is written)
+    INVENTORY_DIFF = os.getenv("INVENTORY_DIFF", "false").lower() == "true"
+    INVENTORY_SNAPSHOT_FILE = os.getenv("INVENTORY_SNAPSHOT_FILE", "state/inventory.parquet")
+    # Comma-separated device columns that do not count as a change
+    INVENTORY_DIFF_IGNORE = [c.strip() for c in os.getenv("INVENTORY_DIFF_IGNORE", "ETag,Last Sync Time").split(",")
+                             if c.strip()]
+    # Summary of the last run (per shard when sharded), merged by --processes and --merge-shards
+    RUN_SUMMARY_FILE = os.getenv("RUN_SUMMARY_FILE", "state/run_summary.json")
+    # Sync engine: "threads" (requests + worker pool) or "async" (asyncio + aiohttp)
+    SYNC_ENGINE = os.getenv("SYNC_ENGINE", "threads").lower()
+    # Maximum Snipe-IT requests in flight at once with the async engine
+    ASYNC_MAX_IN_FLIGHT = int(os.getenv("ASYNC_MAX_IN_FLIGHT", "100"))
+
+    # ==================== Metrics Configuration ====================
+    # node_exporter textfile (e.g. /var/lib/node_exporter/textfile_collector/google2snipe.prom)
+    # written at the end of each run; empty disables it
+    METRICS_TEXTFILE = os.getenv("METRICS_TEXTFILE", "")
+    # Serve Prometheus metrics on this port while the sync runs; 0 disables it
+    METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+    METRICS_ADDR = os.getenv("METRICS_ADDR", "0.0.0.0")
 
     # ==================== Logging Configuration ====================
     LOG_FILE = os.getenv("LOG_FILE", "snipeit_errors.log")
@@ -62,6 +156,12 @@ class Config:
 
     # ==================== Application Configuration ====================
     DRY_RUN = os.getenv("DRY_RUN", "false").lower() == "true"
+
+    # Incremental sync: stop at the last run's lastSync watermark and skip devices with unchanged etags
+    INCREMENTAL_SYNC = os.getenv("INCREMENTAL_SYNC", "false").lower() == "true"
+    SYNC_STATE_FILE = os.getenv("SYNC_STATE_FILE", "state/sync_state.json")
+    # Outbox journal of per-device work, used by --resume after an interrupted run
+    SYNC_JOURNAL_FILE = os.getenv("SYNC_JOURNAL_FILE", "state/sync_journal.sqlite3")
     DEBUG = os.getenv("DEBUG", "false").lower() == "true"
     ENVIRONMENT = os.getenv("ENVIRONMENT", "development")  # "development" or "production"
 
@@ -89,9 +189,14 @@ class Config:
                 f"Google service account file not found: {cls.GOOGLE_SERVICE_ACCOUNT_FILE}"
             )
 
-        # Required Gemini config
-        if not cls.GEMINI_API_KEY:
-            errors.append("Gemini_APIKEY environment variable is required")
+        if cls.GOOGLE_LIST_PARTITION_BY not in ("none", "orgunit", "query"):
+            errors.append("GOOGLE_LIST_PARTITION_BY must be one of: none, orgunit, query")
+        elif cls.GOOGLE_LIST_PARTITION_BY == "query" and not cls.GOOGLE_LIST_QUERIES:
+            errors.append("GOOGLE_LIST_QUERIES is required when GOOGLE_LIST_PARTITION_BY=query")
+
+        # Gemini is optional when the local category rules are enough
+        if not cls.GEMINI_API_KEY and not cls.CATEGORY_RULES_ENABLED:
+            errors.append("Gemini_APIKEY environment variable is required when CATEGORY_RULES_ENABLED=false")
 
         return len(errors) == 0, errors
 
@@ -111,6 +216,7 @@ class Config:
             "Environment": cls.ENVIRONMENT,
             "Debug Mode": cls.DEBUG,
             "Dry Run": cls.DRY_RUN,
+            "Incremental Sync": cls.INCREMENTAL_SYNC,
             "Snipe-IT Endpoint": cls.ENDPOINT_URL,
             "Google Delegated Admin": cls.GOOGLE_DELEGATED_ADMIN,
             "Google Service Account File": cls.GOOGLE_SERVICE_ACCOUNT_FILE,
@@ -120,6 +226,9 @@ class Config:
             "Log Level": cls.LOG_LEVEL,
             "Max Retries": cls.MAX_RETRIES,
             "Retry Delay (seconds)": cls.RETRY_DELAY_SECONDS,
+            "Sync Engine": cls.SYNC_ENGINE,
+            "Sync Workers": cls.SYNC_WORKERS,
+            "Snipe-IT Rate Limit (per minute)": cls.SNIPE_IT_RATE_LIMIT_PER_MINUTE,
         }
 
         for key, value in config_items.items():
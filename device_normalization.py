@@ -0,0 +1,102 @@
+"""
+Batch normalization of Google device records.
+
+Device records (googleAuth.device_info_from_api) are normalized once, a page
+at a time, right after listing, so everything downstream (the sync, the
+journal, inventory snapshots and plans) sees the same values: MAC addresses
+are colon-formatted like `format_mac`, the active date and EOL are cut to
+YYYY-MM-DD, status names are trimmed and upper-cased, and IP addresses and
+user emails are trimmed, with empty values turned into None.
+
+`normalize_devices` works field by field over a whole batch; it produces
+exactly what `normalize_device` produces for each record on its own.
+"""
+
+import itertools
+
+from hardware_payloads import format_mac
+
+MAC = 'Mac Address'
+ACTIVE_DATE = 'Active Date'
+EOL = 'EOL'
+STATUS = 'Status'
+IP_ADDRESS = 'Last Known IP Address'
+USER = 'Device User'
+
+
+def normalize_date(value):
+    """RFC 3339 timestamp or date -> YYYY-MM-DD, or None if empty."""
+    return str(value)[:10] if value else None
+
+
+def normalize_text(value):
+    """Trimmed string, or None if empty."""
+    if value is None:
+        return None
+    return str(value).strip() or None
+
+
+def normalize_status(value):
+    value = normalize_text(value)
+    return value.upper() if value else None
+
+
+def normalize_user(value):
+    value = normalize_text(value)
+    return value.lower() if value else None
+
+
+# Device record field -> normalizer
+NORMALIZERS = {
+    MAC: format_mac,
+    ACTIVE_DATE: normalize_date,
+    EOL: normalize_date,
+    STATUS: normalize_status,
+    IP_ADDRESS: normalize_text,
+    USER: normalize_user,
+}
+
+
+def normalize_device(device):
+    """
+    Normalize one device record in place.
+
+    Returns:
+        dict: The same record.
+    """
+    for key, normalize in NORMALIZERS.items():
+        if key in device:
+            device[key] = normalize(device[key])
+    return device
+
+
+def normalize_devices(devices):
+    """
+    Normalize a batch of device records in place, one field at a time.
+
+    Args:
+        devices (list): Device records, e.g. one Directory page.
+
+    Returns:
+        list: The same records.
+    """
+    for key, normalize in NORMALIZERS.items():
+        for device in devices:
+            if key in device:
+                device[key] = normalize(device[key])
+    return devices
+
+
+def normalize_batches(devices, batch_size=300):
+    """
+    Lazily normalize a device stream `batch_size` records at a time.
+
+    Yields:
+        dict: Normalized device records, in order.
+    """
+    devices = iter(devices)
+    while True:
+        batch = list(itertools.islice(devices, batch_size))
+        if not batch:
+            return
+        yield from normalize_devices(batch)
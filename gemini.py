@@ -1,21 +1,130 @@
-import google.generativeai as genai
+import json
+import logging
+import re
+import threading
+import time
 
+import metrics
 from config import Config
 
-# Configure Gemini API
-genai.configure(api_key=Config.GEMINI_API_KEY)
-model = genai.GenerativeModel(Config.GEMINI_MODEL)
+logger = logging.getLogger(__name__)
 
+# Gemini client, configured on the first prompt; see get_model()
+_model = None
+_model_lock = threading.Lock()
 
-def gemini_prompt(prompt: str):
+
+def get_model():
+    """
+    Return the Gemini model client, configuring the SDK on first use.
+
+    google.generativeai is imported here rather than at module import, so runs
+    that never reach Gemini (every model already known or matched by a local
+    category rule) do not pay for importing and configuring the SDK.
+    """
+    global _model
+    with _model_lock:
+        if _model is None:
+            import google.generativeai as genai
+
+            genai.configure(api_key=Config.GEMINI_API_KEY)
+            _model = genai.GenerativeModel(Config.GEMINI_MODEL)
+    return _model
+
+
+def gemini_prompt(prompt: str, generation_config=None):
     """Return the Gemini model response for a given prompt."""
-    return model.generate_content(prompt)
+    model = get_model()
+    if generation_config is None:
+        return model.generate_content(prompt)
+    return model.generate_content(prompt, generation_config=generation_config)
+
+
+def parse_category(text: str) -> str:
+    """Extract the category from a Gemini answer, which is usually wrapped in '**'."""
+    if '**' in text:
+        return text.split('**')[1].strip()
+    return text.strip()
+
+
+def classify_model(model_name: str, categories: str = Config.GEMINI_CATEGORIES) -> str:
+    """
+    Ask Gemini for the most appropriate category for a technology model.
+
+    Args:
+        model_name (str): Model name, e.g. 'Dell Chromebook 11 (3180)'.
+        categories (str): Comma-separated list of allowed categories.
+
+    Returns:
+        str: The category named in Gemini's answer.
+    """
+    started = time.monotonic()
+    try:
+        text = gemini_prompt(f"""Given the following technology model, Model: {model_name} select the most appropriate category from this list:
+{categories}
+""").text
+    except Exception:
+        metrics.GEMINI_REQUESTS.labels('error').inc()
+        raise
+    finally:
+        metrics.GEMINI_REQUEST_SECONDS.observe(time.monotonic() - started)
+    metrics.GEMINI_REQUESTS.labels('success').inc()
+    if '**' not in text:
+        logger.warning(f"'**' not found in Gemini response. Full response: '{text}'")
+    return parse_category(text)
+
+
+def parse_category_map(text: str) -> dict:
+    """
+    Extract the {model: category} mapping from a batched Gemini answer.
+
+    Accepts a bare JSON object or one wrapped in a ```json fence. Anything
+    else yields an empty mapping, so every model falls back to `classify_model`.
+    """
+    match = re.search(r'\{.*\}', text or '', re.DOTALL)
+    if not match:
+        logger.warning(f"No JSON object in batched Gemini response: '{text}'")
+        return {}
+    try:
+        data = json.loads(match.group(0))
+    except ValueError:
+        logger.warning(f"Invalid JSON in batched Gemini response: '{text}'")
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    return {str(name): str(category) for name, category in data.items() if isinstance(category, str)}
+
+
+def classify_models(model_names, categories: str = Config.GEMINI_CATEGORIES) -> dict:
+    """
+    Ask Gemini for the category of several technology models in one prompt.
+
+    Args:
+        model_names (list): Model names to classify.
+        categories (str): Comma-separated list of allowed categories.
+
+    Returns:
+        dict: {model name: category text} for the models Gemini answered. The
+            answers are not validated here; see CategoryCache.resolve_many.
+    """
+    started = time.monotonic()
+    try:
+        text = gemini_prompt(f"""Classify each of the following technology models into exactly one category from this list:
+{categories}
+
+Models (one per line):
+{chr(10).join(model_names)}
+
+Respond with only a JSON object mapping each model name, exactly as written above, to its category.""",
+                             generation_config={'response_mime_type': 'application/json'}).text
+    except Exception:
+        metrics.GEMINI_REQUESTS.labels('error').inc()
+        raise
+    finally:
+        metrics.GEMINI_REQUEST_SECONDS.observe(time.monotonic() - started)
+    metrics.GEMINI_REQUESTS.labels('success').inc()
+    return parse_category_map(text)
 
 
 if __name__ == "__main__":
-    example_prompt = f"""Given the following technology model, Model: Dell Chromebook 11 (3180) select the most appropriate category from this list:
-{Config.GEMINI_CATEGORIES}"""
-    category_name = gemini_prompt(example_prompt).text
-    if "**" in category_name:
-        category_name = category_name.split("**")[1].strip()
-    print(category_name)
+    print(classify_model("Dell Chromebook 11 (3180)"))
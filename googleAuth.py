@@ -1,15 +1,57 @@
-from googleapiclient.discovery import build
-from google.oauth2 import service_account
+import json
+import logging
+import os
+import threading
+import time
 
+import metrics
 from config import Config
+from device_normalization import normalize_devices
+from device_record import DeviceRecord
+from pipeline import merge_through_queue
+from rate_limiter import RateLimiter
+from sync_state import parse_rfc3339
+
+logger = logging.getLogger(__name__)
 
 # Define the required scope
 SCOPES = ['https://www.googleapis.com/auth/admin.directory.device.chromeos']
+# Also needed to enumerate org units for GOOGLE_LIST_PARTITION_BY=orgunit
+ORGUNIT_SCOPE = 'https://www.googleapis.com/auth/admin.directory.orgunit.readonly'
+
+# Paces Directory page requests across concurrent partitions; see _page_limiter()
+_limiter = None
+_limiter_lock = threading.Lock()
+
+# Device record keys and the Directory API field paths they are read from.
+# For repeated fields (e.g. 'recentUsers/email') only the first entry is used.
+# This table is also the source of the partial-response `fields` mask.
+DEVICE_FIELDS = {
+    'Device ID': 'deviceId',
+    'ETag': 'etag',
+    'Device User': 'recentUsers/email',
+    'Serial Number': 'serialNumber',
+    'Status': 'status',
+    'Last Sync Time': 'lastSync',
+    'Model': 'model',
+    'Active Date': 'activeTimeRanges/date',
+    'Mac Address': 'macAddress',
+    'Last Known IP Address': 'lastKnownNetwork/ipAddress',
+    'First Enrollment Time': 'firstEnrollmentTime',
+    'EOL': 'autoUpdateThrough',
+    'Org Unit Path': 'orgUnitPath',
+}
 
 def bytes_to_gb(bytes_value):
   """Converts bytes to gigabytes."""
   return bytes_value / (1024 * 1024 * 1024)
 
+def required_scopes():
+  """OAuth scopes for the configured listing; org unit enumeration needs one more."""
+  if Config.GOOGLE_LIST_PARTITION_BY == 'orgunit' and not Config.GOOGLE_LIST_ORG_UNITS:
+    return SCOPES + [ORGUNIT_SCOPE]
+  return SCOPES
+
 def auth():
   """
   Authenticates using a Google service account with domain-wide delegation.
@@ -17,10 +59,13 @@ def auth():
   Returns:
     google.auth.credentials.Credentials: Authenticated credentials object.
   """
+  # Imported on first use so importing this module stays cheap
+  from google.oauth2 import service_account
+
   try:
     credentials = service_account.Credentials.from_service_account_file(
         Config.GOOGLE_SERVICE_ACCOUNT_FILE,
-        scopes=SCOPES)
+        scopes=required_scopes())
 
     # Enable domain-wide delegation
     delegated_credentials = credentials.with_subject(Config.GOOGLE_DELEGATED_ADMIN)
@@ -33,68 +78,292 @@ def auth():
     print(f"Error loading service account credentials: {e}")
     return None
 
-def fetch_and_print_chromeos_devices():
+def load_discovery_document(path):
+  """Returns the discovery document cached at `path`, or None if missing or unreadable."""
+  if not path or not os.path.exists(path):
+    return None
+  try:
+    with open(path, 'r', encoding='utf-8') as f:
+      return f.read()
+  except OSError as e:
+    logger.warning(f"Could not read discovery document {path}: {e}")
+    return None
+
+def save_discovery_document(path, document):
+  """Atomically caches a discovery document (dict or JSON text) at `path`."""
+  if not path or not document:
+    return
+  try:
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+      f.write(document if isinstance(document, str) else json.dumps(document))
+    os.replace(tmp_path, path)
+  except OSError as e:
+    logger.warning(f"Could not cache discovery document {path}: {e}")
+
+def build(service_name, version, credentials=None):
   """
-  Fetches and displays information about Chrome OS devices in the user's 
-  Google Workspace domain using the Google Admin SDK Directory API.
+  Builds a Google API client without fetching the discovery document when possible.
 
-  This function:
-    1. Authenticates with the Google Admin SDK using the `auth()` function.
-    2. Calls the Chrome OS Devices API to retrieve a list of devices.
-    3. Prints basic information about each device, including:
-       - Recent user email 
-       - Device ID
-       - Serial Number
-       - Status
-    4. Handles potential errors during API calls or data processing.
+  The document is taken, in order, from GOOGLE_DISCOVERY_CACHE_FILE, from the
+  static copy bundled with google-api-python-client 2.x, or from the network
+  (older clients). A fetched document is written to the cache file so later
+  runs start without the round trip.
+
+  Args:
+    service_name (str): e.g. 'admin'.
+    version (str): e.g. 'directory_v1'.
+    credentials: Credentials for the client.
+
+  Returns:
+    googleapiclient.discovery.Resource: The service client.
+  """
+  # Imported on first use: googleapiclient is slow to import and unused by
+  # runs that never reach Google (cache maintenance, merges, tests)
+  from googleapiclient import discovery
+
+  cache_file = Config.GOOGLE_DISCOVERY_CACHE_FILE
+  document = load_discovery_document(cache_file)
+  if document is not None:
+    try:
+      return discovery.build_from_document(document, credentials=credentials)
+    except Exception as e:
+      logger.warning(f"Ignoring unusable cached discovery document {cache_file}: {e}")
+
+  try:
+    service = discovery.build(service_name, version, credentials=credentials,
+                              cache_discovery=False, static_discovery=True)
+  except TypeError:
+    # google-api-python-client < 2.0 has no bundled documents
+    service = discovery.build(service_name, version, credentials=credentials, cache_discovery=False)
+  save_discovery_document(cache_file, getattr(service, '_rootDesc', None))
+  return service
+
+def fields_mask(device_fields=DEVICE_FIELDS):
+  """
+  Builds the Directory API partial-response `fields` mask for device listing.
+
+  Returns:
+    str: e.g. 'nextPageToken,chromeosdevices(deviceId,etag,recentUsers/email,...)'
+  """
+  return f"nextPageToken,chromeosdevices({','.join(device_fields.values())})"
+
+def list_fields():
+  """
+  Returns the `fields` value to send with chromeosdevices.list, or None to
+  request whole resources, based on Config.GOOGLE_CHROMEOS_FIELDS.
+  """
+  configured = (Config.GOOGLE_CHROMEOS_FIELDS or "").strip()
+  if configured.lower() in ("", "none", "all"):
+    return None
+  if configured.lower() == "auto":
+    return fields_mask()
+  return configured
+
+def _field_value(resource, path):
+  """Reads a '/'-separated field path, taking the first entry of repeated fields."""
+  value = resource
+  for part in path.split('/'):
+    if isinstance(value, list):
+      value = value[0] if value else None
+    if not isinstance(value, dict):
+      return None
+    value = value.get(part)
+  return value
+
+def device_info_from_api(device):
+  """
+  Reduces a Directory API ChromeOS device resource to the fields the sync uses.
+
+  Repeated fields such as recentUsers and activeTimeRanges contribute only
+  their first entry, so records stay small no matter how much history
+  Google returns.
+
+  Args:
+    device (dict): A `chromeosdevices` resource (full or field-masked).
+
+  Returns:
+    dict: Device record keyed by the human-readable names in DEVICE_FIELDS.
+  """
+  return {key: _field_value(device, path) for key, path in DEVICE_FIELDS.items()}
+
+def list_org_units(service):
+  """
+  Returns the path of every org unit in the domain, root included.
+
+  Needs the admin.directory.orgunit.readonly scope (see required_scopes).
+  """
+  result = service.orgunits().list(customerId='my_customer', type='allIncludingParent').execute(
+      num_retries=Config.MAX_RETRIES)
+  paths = [unit['orgUnitPath'] for unit in result.get('organizationUnits', [])]
+  if '/' not in paths:
+    paths.insert(0, '/')
+  return paths
+
+def list_partitions(service):
+  """
+  Splits the device listing into disjoint partitions per Config.GOOGLE_LIST_PARTITION_BY.
+
+  Returns:
+    list: chromeosdevices.list filter arguments, one dict per partition. A
+      single empty dict means the whole fleet is listed in one page chain.
+  """
+  mode = Config.GOOGLE_LIST_PARTITION_BY
+  if mode == 'orgunit':
+    paths = Config.GOOGLE_LIST_ORG_UNITS or list_org_units(service)
+    # Children are listed by their own partitions, so each OU covers only its direct devices
+    return [{'orgUnitPath': path, 'includeChildOrgunits': False} for path in paths]
+  if mode == 'query':
+    return [{'query': query} for query in Config.GOOGLE_LIST_QUERIES] or [{}]
+  return [{}]
+
+def _page_limiter():
+  """Shared pacing for Directory page requests across partitions, created on first use."""
+  global _limiter
+  with _limiter_lock:
+    if _limiter is None:
+      _limiter = RateLimiter(Config.GOOGLE_LIST_RATE_LIMIT_PER_MINUTE,
+                             burst=Config.GOOGLE_LIST_CONCURRENCY, safety_factor=1.0)
+  return _limiter
+
+def iter_partition(service, fields, since=None, filters=None):
+  """
+  Yields device records from one chromeosdevices.list page-token chain.
+
+  Each page is normalized as a batch (device_normalization) and its
+  records are yielded as compact DeviceRecords.
+
+  Args:
+    service: Directory API client.
+    fields (str): Partial-response mask, or None.
+    since (datetime, optional): Stop at the first device that last synced before this.
+    filters (dict, optional): Extra list arguments, e.g. {'orgUnitPath': '/Students'}.
+  """
+  page_token = None
+  while True:
+      _page_limiter().acquire()
+      started = time.monotonic()
+      results = service.chromeosdevices().list(
+          customerId='my_customer',
+          maxResults=Config.GOOGLE_CHROMEOS_PAGE_SIZE,
+          orderBy='lastSync',
+          sortOrder='DESCENDING',
+          projection=Config.GOOGLE_CHROMEOS_PROJECTION,
+          pageToken=page_token,
+          fields=fields,
+          **(filters or {})
+      ).execute(num_retries=Config.MAX_RETRIES)
+      metrics.GOOGLE_PAGE_SECONDS.observe(time.monotonic() - started)
+      metrics.GOOGLE_PAGES.inc()
+
+      reached_watermark = False
+      page = []
+      for device in results.get('chromeosdevices', []):
+          if since is not None:
+              last_sync = parse_rfc3339(device.get("lastSync"))
+              if last_sync is not None and last_sync < since:
+                  reached_watermark = True
+                  break
+          page.append(device_info_from_api(device))
+      yield from map(DeviceRecord.from_dict, normalize_devices(page))
 
-  Requires a 'credentials.json' file with OAuth 2.0 client credentials 
-  and saves authentication tokens to 'token.json' for future use.
+      # Check if more pages exist
+      page_token = results.get('nextPageToken')
+      if not page_token or reached_watermark:
+          break
+
+def unique_devices(devices):
+  """
+  Drops repeated device IDs from overlapping query partitions.
+
+  Keeps every device ID seen, so it is only used when the listing is split
+  into several queries; a single page chain or disjoint org units never
+  repeat a device.
   """
+  seen = set()
+  for device in devices:
+      key = device.get('Device ID')
+      if key in seen:
+          continue
+      if key is not None:
+          seen.add(key)
+      yield device
 
+def counted_devices(devices):
+  """Counts listed devices in the google2snipe_google_devices_total metric."""
+  for device in devices:
+      metrics.GOOGLE_DEVICES.inc()
+      yield device
+
+def iter_chromeos_devices(since=None):
+  """
+  Yields Chrome OS device records page by page from the Directory API.
+
+  Each page is converted and yielded before the next page is requested, so
+  callers can start processing after the first page and memory use does not
+  grow with fleet size. Authentication and API errors are raised to the
+  caller.
+
+  With GOOGLE_LIST_PARTITION_BY set, the fleet is split into partitions (org
+  units or query filters) whose page chains are fetched concurrently, at
+  most GOOGLE_LIST_CONCURRENCY at a time and GOOGLE_LIST_RATE_LIMIT_PER_MINUTE
+  pages overall. Devices then arrive interleaved across partitions; with
+  query partitions, which may overlap, they are de-duplicated by device ID.
+
+  Args:
+    since (datetime, optional): Incremental watermark. Devices are listed
+      newest lastSync first, so paging stops at the first device that last
+      synced before this time (per partition when partitioned).
+
+  Yields:
+    DeviceRecord: Normalized device records, keyed like `device_info_from_api`.
+
+  Raises:
+    RuntimeError: If no credentials could be loaded (auth() prints why).
+  """
   creds = auth()
   if not creds:
-      print("Authentication failed. Exiting.")
-      return []
+      # Raised rather than listing nothing, so callers record a failed listing
+      raise RuntimeError("Google authentication failed")
 
-  try:
-      service = build('admin', 'directory_v1', credentials=creds)
-      device_data = []
-      page_token = None
-
-      while True:
-          results = service.chromeosdevices().list(
-              customerId='my_customer',
-              maxResults=Config.GOOGLE_CHROMEOS_PAGE_SIZE,
-              orderBy='lastSync',
-              sortOrder='DESCENDING',
-              projection=Config.GOOGLE_CHROMEOS_PROJECTION,
-              pageToken=page_token
-          ).execute()
-
-          devices = results.get('chromeosdevices', [])
-          for device in devices:
-              device_info = {
-                  'Device User': device.get("recentUsers", [{}])[0].get("email"),
-                  'Serial Number': device.get("serialNumber"),
-                  'Status': device.get("status"),
-                  'Last Sync Time': device.get("lastSync"),
-                  'Model': device.get("model"),
-                  'Active Time Ranges': device.get("activeTimeRanges"),
-                  'Mac Address': device.get("macAddress"),
-                  'Last Known IP Address': device.get("lastKnownNetwork", [{}])[0].get("ipAddress"),
-                  'First Enrollment Time': device.get("firstEnrollmentTime"),
-                  'EOL': device.get('autoUpdateThrough')
-              }
-              device_data.append(device_info)
-
-          # Check if more pages exist
-          page_token = results.get('nextPageToken')
-          if not page_token:
-              break
-
-      return device_data
+  service = build('admin', 'directory_v1', credentials=creds)
+  fields = list_fields()
+  partitions = list_partitions(service)
+  if len(partitions) == 1:
+      yield from counted_devices(iter_partition(service, fields, since, partitions[0]))
+      return
 
+  logger.info(f"Listing devices in {len(partitions)} partitions, {Config.GOOGLE_LIST_CONCURRENCY} at a time")
+  devices = merge_through_queue(
+      (iter_partition(service, fields, since, filters) for filters in partitions),
+      maxsize=Config.GOOGLE_CHROMEOS_PAGE_SIZE * Config.GOOGLE_LIST_CONCURRENCY,
+      concurrency=Config.GOOGLE_LIST_CONCURRENCY
+  )
+  if Config.GOOGLE_LIST_PARTITION_BY == 'query':
+      devices = unique_devices(devices)
+  yield from counted_devices(devices)
+
+def fetch_and_print_chromeos_devices(since=None):
+  """
+  Fetches information about all Chrome OS devices in the user's Google
+  Workspace domain using the Google Admin SDK Directory API.
+
+  This function:
+    1. Authenticates with the Google Admin SDK using the `auth()` function.
+    2. Pages through the Chrome OS Devices API via `iter_chromeos_devices`.
+    3. Collects each device's recent user, device ID, serial number, status,
+       model, MAC/IP address and EOL date.
+    4. Handles potential errors during API calls or data processing.
+
+  Args:
+    since (datetime, optional): Incremental watermark, see `iter_chromeos_devices`.
+
+  Returns:
+    list: Device records, or an empty list if the API call failed.
+  """
+  try:
+      return list(iter_chromeos_devices(since=since))
   except Exception as error:
       print(f'An error occurred while interacting with the API: {error}')
       return []
@@ -0,0 +1,64 @@
+"""
+In-memory index of Snipe-IT hardware rows.
+
+Built once at startup from a paged listing of /hardware so the sync loop can
+decide create-vs-update locally instead of searching Snipe-IT per device.
+"""
+
+
+def _normalize_key(value):
+    """Normalize a serial or asset tag for case-insensitive lookups."""
+    if value is None:
+        return None
+    value = str(value).strip().upper()
+    return value or None
+
+
+class HardwareIndex:
+    """Lookup table of Snipe-IT hardware rows keyed by serial and asset tag."""
+
+    def __init__(self, rows=None):
+        self.by_serial = {}
+        self.by_asset_tag = {}
+        for row in rows or []:
+            self.add(row)
+
+    def add(self, row):
+        """
+        Add (or replace) a hardware row in the index.
+
+        Args:
+            row (dict): A hardware row as returned by the Snipe-IT API.
+        """
+        serial = _normalize_key(row.get('serial'))
+        asset_tag = _normalize_key(row.get('asset_tag'))
+        if serial:
+            self.by_serial[serial] = row
+        if asset_tag:
+            self.by_asset_tag[asset_tag] = row
+
+    def lookup(self, asset_tag=None, serial=None):
+        """
+        Find an existing hardware row by asset tag or serial.
+
+        Args:
+            asset_tag (str, optional): Asset tag to match.
+            serial (str, optional): Serial number to match.
+
+        Returns:
+            dict: The matching hardware row, or None if not indexed.
+        """
+        asset_tag = _normalize_key(asset_tag)
+        if asset_tag and asset_tag in self.by_asset_tag:
+            return self.by_asset_tag[asset_tag]
+        serial = _normalize_key(serial)
+        if serial and serial in self.by_serial:
+            return self.by_serial[serial]
+        return None
+
+    def __contains__(self, key):
+        return self.lookup(asset_tag=key, serial=key) is not None
+
+    def __len__(self):
+        return len({id(row) for row in self.by_asset_tag.values()} |
+                   {id(row) for row in self.by_serial.values()})
@@ -0,0 +1,177 @@
+"""
+Snipe-IT hardware payload construction and change detection.
+
+Builds the create/update payloads sent for a device and compares the desired
+state with a hardware row already fetched from Snipe-IT, so only changed
+fields are PATCHed and unchanged assets are skipped. The same goes for the
+asset's assignment: it is only checked out again when its user changed.
+"""
+
+from config import Config
+
+# Assignment changes returned by assignment_change
+CHECKOUT = 'checkout'  # unassigned: check out to the user
+REASSIGN = 'reassign'  # checked out to another user: check in, then check out
+
+
+def format_mac(mac: str) -> str:
+    """
+    Formats a MAC address string to colon-separated format (e.g., a81d166742f7 -> a8:1d:16:67:42:f7).
+    Ignores formatting if input is None or already formatted.
+
+    Args:
+        mac (str): Raw MAC address string (12 hex characters).
+
+    Returns:
+        str: Formatted MAC address.
+    """
+    if not mac or ":" in mac:
+        return mac  # Already formatted or None
+
+    mac = mac.lower().replace("-", "").replace(":", "").strip()
+    if len(mac) != 12:
+        return mac  # Return as-is if not 12 chars
+
+    return f"{mac[0:2]}:{mac[2:4]}:{mac[4:6]}:{mac[6:8]}:{mac[8:10]}:{mac[10:12]}"
+
+
+def build_create_payload(asset_tag, model_id, status_id, mac_address=None, sync_date=None,
+                         ip_address=None, user_email=None, eol=None):
+    """
+    Returns the POST /hardware payload for a new asset.
+
+    It carries the same fields as `build_update_payload`, so an asset created
+    from a device diffs as unchanged against that device on the next run.
+    """
+    return {
+        'asset_tag': asset_tag,
+        'model_id': model_id,
+        'status_id': status_id,
+        'serial': asset_tag,
+        Config.SNIPE_IT_FIELD_MAC_ADDRESS: format_mac(mac_address),
+        Config.SNIPE_IT_FIELD_SYNC_DATE: sync_date,
+        Config.SNIPE_IT_FIELD_IP_ADDRESS: ip_address,
+        Config.SNIPE_IT_FIELD_USER: user_email,
+        'asset_eol_date': _date_value(eol),
+    }
+
+
+def build_update_payload(asset_tag, model_id, status_id, mac_address=None, sync_date=None,
+                         ip_address=None, user_email=None, eol=None):
+    """
+    Returns the full desired PATCH /hardware/{id} payload.
+
+    Optional fields are left out when empty, so an update never clears a
+    value Snipe-IT already holds.
+    """
+    payload = {
+        'model_id': model_id,
+        'status_id': status_id,
+        'asset_tag': asset_tag
+    }
+    mac_address = format_mac(mac_address)
+    if mac_address:
+        payload[Config.SNIPE_IT_FIELD_MAC_ADDRESS] = mac_address
+    if sync_date:
+        payload[Config.SNIPE_IT_FIELD_SYNC_DATE] = sync_date
+    if ip_address:
+        payload[Config.SNIPE_IT_FIELD_IP_ADDRESS] = ip_address
+    if user_email:
+        payload[Config.SNIPE_IT_FIELD_USER] = user_email
+    if eol:
+        payload['asset_eol_date'] = _date_value(eol)
+    return payload
+
+
+def _date_value(value):
+    """Snipe-IT dates come as {'date': ..., 'formatted': ...}; Google dates as RFC 3339."""
+    if isinstance(value, dict):
+        value = value.get('date')
+    return str(value)[:10] if value else None
+
+
+def _nested_id(value):
+    return value.get('id') if isinstance(value, dict) else value
+
+
+def current_state(row):
+    """
+    Normalizes a Snipe-IT hardware row into the same keys as the update payload.
+
+    Custom fields are read from `row['custom_fields']`, which Snipe-IT keys by
+    field label with the database column (e.g. `_snipeit_mac_address_1`) in
+    each entry's `field` attribute.
+
+    Args:
+        row (dict): Hardware row from GET /hardware.
+
+    Returns:
+        dict: Current values keyed like `build_update_payload`.
+    """
+    state = {
+        'model_id': _nested_id(row.get('model')),
+        'status_id': _nested_id(row.get('status_label')),
+        'asset_tag': row.get('asset_tag'),
+        'asset_eol_date': _date_value(row.get('asset_eol_date')),
+    }
+    for field in (row.get('custom_fields') or {}).values():
+        if isinstance(field, dict) and field.get('field'):
+            state[field['field']] = field.get('value')
+    return state
+
+
+def _normalize(key, value):
+    if value is None or value == '':
+        return None
+    if key == Config.SNIPE_IT_FIELD_MAC_ADDRESS:
+        return (format_mac(str(value)) or '').lower()
+    if key in ('asset_eol_date', Config.SNIPE_IT_FIELD_SYNC_DATE):
+        return _date_value(value)
+    if key == Config.SNIPE_IT_FIELD_USER:
+        return str(value).strip().lower()
+    return str(value).strip()
+
+
+def diff_payload(desired, row):
+    """
+    Returns only the fields of `desired` that differ from a Snipe-IT row.
+
+    Args:
+        desired (dict): Payload from `build_update_payload`.
+        row (dict): Hardware row currently held by Snipe-IT.
+
+    Returns:
+        dict: Changed fields; empty if the asset is already up to date.
+    """
+    current = current_state(row)
+    return {
+        key: value for key, value in desired.items()
+        if _normalize(key, value) != _normalize(key, current.get(key))
+    }
+
+
+def assignment_change(row, user_id):
+    """
+    Decides how to bring an asset's assignment in line with its Google user.
+
+    Only assets that are unassigned or checked out to a different user are
+    changed. Assets checked out to a location or another asset are left as
+    they are.
+
+    Args:
+        row (dict): Hardware row currently held by Snipe-IT (None for a new asset).
+        user_id (int): Snipe-IT user the asset should be checked out to, or None.
+
+    Returns:
+        str: CHECKOUT, REASSIGN, or None if nothing needs to change.
+    """
+    if user_id is None:
+        return None
+    assigned = (row or {}).get('assigned_to')
+    if not assigned:
+        return CHECKOUT
+    if not isinstance(assigned, dict) or assigned.get('type', 'user') != 'user':
+        return None
+    if assigned.get('id') == user_id:
+        return None
+    return REASSIGN
@@ -0,0 +1,251 @@
+"""
+Columnar snapshots of the Google device inventory with a vectorized diff.
+
+Each run can persist the normalized device records (one column per
+googleAuth device field) as a pandas DataFrame in Parquet or Feather, or as a
+gzip-compressed CSV when no Parquet engine is installed. The next run diffs
+its listing against that snapshot column by column, and only added and
+changed devices are fed to the sync loop.
+
+Devices that fail to sync keep their previous snapshot row (or are left out
+if they are new), so they show up as changed again on the next run.
+"""
+
+import itertools
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+KEY = 'Device ID'
+# Columns that change on every check-in without anything Snipe-IT holds changing
+DEFAULT_IGNORE = ('ETag', 'Last Sync Time')
+
+
+def require_pandas():
+    """
+    Import pandas, which only inventory snapshots need.
+
+    Raises:
+        RuntimeError: If pandas is not installed.
+    """
+    try:
+        import pandas
+    except ImportError as e:
+        raise RuntimeError("Inventory snapshots require pandas (pip install pandas)") from e
+    return pandas
+
+
+def device_key(device):
+    """Snapshot key for a device record: its Directory device ID, or serial as a fallback."""
+    return device.get(KEY) or device.get('Serial Number')
+
+
+def to_frame(devices):
+    """
+    Build an inventory DataFrame indexed by device key, one column per record field.
+
+    Repeated keys keep their first record, like the de-duplicated listing.
+    The values go straight into one object array, column by column;
+    DataFrame.from_records over the dicts costs about 1.5 times as much.
+    """
+    pd = require_pandas()
+    import numpy as np
+
+    records = list(devices)
+    keys = [device_key(device) for device in records]
+    if not all(keys) or len(set(keys)) != len(keys):
+        first = {}
+        for device, key in zip(records, keys):
+            if key and key not in first:
+                first[key] = device
+        keys, records = list(first), list(first.values())
+    columns = list(dict.fromkeys(itertools.chain.from_iterable(records)))
+    values = np.empty((len(columns), len(records)), dtype=object)
+    for i, column in enumerate(columns):
+        # fromiter keeps list/dict values as single cells
+        values[i] = np.fromiter([record.get(column) for record in records], dtype=object, count=len(records))
+    index = pd.Index(keys, name='_key', dtype=object)
+    return pd.DataFrame(values.T, index=index, columns=columns, dtype=object, copy=False)
+
+
+def _fallback_path(path):
+    root = path
+    for ext in ('.parquet', '.feather', '.csv.gz', '.csv'):
+        if root.endswith(ext):
+            root = root[:-len(ext)]
+            break
+    return root + '.csv.gz'
+
+
+def write_frame(frame, path):
+    """
+    Write an inventory snapshot, format chosen by extension (.parquet, .feather, .csv.gz).
+
+    Parquet and Feather need pyarrow; without it the snapshot is written as
+    gzip CSV next to `path` instead.
+
+    Returns:
+        str: The path actually written.
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    data = frame.reset_index()
+    try:
+        if path.endswith('.parquet'):
+            writer = data.to_parquet
+        elif path.endswith('.feather'):
+            writer = data.to_feather
+        else:
+            writer = None
+        if writer is not None:
+            tmp_path = f"{path}.tmp"
+            writer(tmp_path)
+            os.replace(tmp_path, path)
+            return path
+    except ImportError as e:
+        logger.warning(f"Cannot write {path} ({e}); writing a gzip CSV snapshot instead")
+        path = _fallback_path(path)
+
+    tmp_path = f"{path}.tmp"
+    data.to_csv(tmp_path, index=False, compression='gzip' if path.endswith('.gz') else None)
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_frame(path):
+    """
+    Read an inventory snapshot written by `write_frame`.
+
+    Returns:
+        DataFrame: The snapshot, or None if neither `path` nor its CSV fallback exists.
+    """
+    pd = require_pandas()
+    for candidate in (path, _fallback_path(path)):
+        if not os.path.exists(candidate):
+            continue
+        if candidate.endswith('.parquet'):
+            data = pd.read_parquet(candidate)
+        elif candidate.endswith('.feather'):
+            data = pd.read_feather(candidate)
+        else:
+            data = pd.read_csv(candidate, dtype=str, keep_default_na=False, na_values=[''])
+        # Object columns and index: pandas' Arrow-backed strings compare and look up far slower here
+        data = data.astype(object).set_index('_key')
+        if not data.index.is_unique:
+            data = data[~data.index.duplicated()]
+        return data
+    return None
+
+
+def diff_frames(previous, current, ignore=DEFAULT_IGNORE):
+    """
+    Compare two inventory snapshots column by column.
+
+    Each current row is matched to its previous row by position (one
+    `get_indexer` lookup), and the compared columns of both frames are then
+    compared as two object arrays in a single elementwise pass, with no
+    per-column index alignment.
+
+    Args:
+        previous (DataFrame): Last run's snapshot.
+        current (DataFrame): This run's listing.
+        ignore (iterable): Columns not compared.
+
+    Returns:
+        tuple: (added, removed, changed) DataFrames. `added` and `changed` hold
+            rows of `current`; `removed` holds rows of `previous`.
+    """
+    pd = require_pandas()
+    import numpy as np
+
+    columns = [column for column in current.columns if column not in set(ignore)]
+    positions = previous.index.get_indexer(current.index)
+    common = positions >= 0
+    before_rows = positions[common]
+    now = current[columns].to_numpy(dtype=object)[common]
+    before = previous.reindex(columns=columns).to_numpy(dtype=object)[before_rows]
+    differs = now != before
+    # Missing on both sides (None in one frame, NaN in the other) is not a change;
+    # only cells that compared unequal need the check
+    rows, cols = np.nonzero(differs)
+    both_missing = pd.isna(now[rows, cols]) & pd.isna(before[rows, cols])
+    differs[rows[both_missing], cols[both_missing]] = False
+    changed = differs.any(axis=1)
+
+    listed = np.zeros(len(previous), dtype=bool)
+    listed[before_rows] = True
+    return current[~common], previous[~listed], current.iloc[np.flatnonzero(common)[changed]]
+
+
+class InventorySnapshot:
+    """The persisted inventory of the last run and this run's diff against it."""
+
+    def __init__(self, path, ignore=DEFAULT_IGNORE):
+        """
+        Args:
+            path (str): Snapshot file; the extension picks the format.
+            ignore (iterable): Columns left out of change detection.
+        """
+        self.path = path
+        self.ignore = tuple(ignore)
+        self.previous = None
+        self.current = None
+        self.added = self.removed = self.changed = None
+        self._failed = set()
+
+    def changed_devices(self, devices):
+        """
+        Diff a full listing against the previous snapshot.
+
+        Args:
+            devices (iterable): Every device record of this run's listing.
+
+        Returns:
+            list: Records of the added and changed devices, in listing order.
+                All devices on a first run, when there is no previous snapshot.
+        """
+        devices = list(devices)
+        self.current = to_frame(devices)
+        self.previous = read_frame(self.path)
+        if self.previous is None:
+            self.added, self.removed, self.changed = self.current, self.current.iloc[0:0], self.current.iloc[0:0]
+            wanted = set(self.current.index)
+        else:
+            self.added, self.removed, self.changed = diff_frames(self.previous, self.current, self.ignore)
+            logger.info(self.summary())
+            wanted = set(self.added.index).union(self.changed.index)
+
+        # The listing's own records, first of each repeated key, like to_frame
+        records = []
+        for device in devices:
+            key = device_key(device)
+            if key in wanted:
+                wanted.discard(key)
+                records.append(device)
+        return records
+
+    def summary(self):
+        return (f"Inventory diff: {len(self.added)} added, {len(self.changed)} changed, "
+                f"{len(self.removed)} removed, {len(self.current) - len(self.added) - len(self.changed)} unchanged")
+
+    def record_failure(self, device):
+        """Keep a device that failed to sync out of the next snapshot's baseline."""
+        self._failed.add(device_key(device))
+
+    def save(self):
+        """
+        Persist this run's inventory as the baseline for the next diff.
+
+        Failed devices keep their previous row, or are dropped if they were new.
+
+        Returns:
+            str: The path written.
+        """
+        snapshot = self.current
+        if self._failed:
+            failed = list(self._failed)
+            snapshot = snapshot[~snapshot.index.isin(failed)]
+            if self.previous is not None:
+                previous = self.previous[self.previous.index.isin(failed)]
+                snapshot = require_pandas().concat([snapshot, previous])
+        return write_frame(snapshot, self.path)
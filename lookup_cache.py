@@ -0,0 +1,163 @@
+"""
+Memoized lookup layer for Snipe-IT reference data.
+
+Caches model, status label, category and user IDs keyed by normalized name or
+email, with a TTL per entity type. The cache can optionally be persisted to a
+local JSON file so the next scheduled run starts warm.
+"""
+
+import functools
+import json
+import logging
+import os
+import threading
+import time
+
+from category_cache import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_key(value):
+    """Normalize a lookup key (name or email) for cache matching."""
+    return str(value).strip().lower()
+
+
+class LookupCache:
+    """Thread-safe TTL cache of Snipe-IT IDs, grouped by entity type."""
+
+    def __init__(self, ttls=None, path=None, default_ttl=3600, clock=time.time):
+        """
+        Args:
+            ttls (dict, optional): Seconds to keep entries, per entity (e.g. {'models': 86400}).
+            path (str, optional): JSON file to load from and save to. Disabled if empty.
+            default_ttl (int): TTL for entities not listed in `ttls`.
+            clock (callable): Time source, overridable for tests.
+        """
+        self.ttls = dict(ttls or {})
+        self.path = path
+        self.default_ttl = default_ttl
+        self.clock = clock
+        self._entries = {}
+        self._hits = {}
+        self._misses = {}
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+
+    def _peek(self, entity, key):
+        """Like get(), but without touching the hit/miss counters. Called with `key` normalized."""
+        with self._lock:
+            entry = self._entries.get(entity, {}).get(key)
+            if entry is not None and entry[1] > self.clock():
+                return True, entry[0]
+            return False, None
+
+    def get(self, entity, key):
+        """
+        Look up a cached value.
+
+        Returns:
+            tuple: (found, value). `found` is False on a miss or expired entry.
+        """
+        key = normalize_key(key)
+        with self._lock:
+            entry = self._entries.get(entity, {}).get(key)
+            if entry is not None and entry[1] > self.clock():
+                self._hits[entity] = self._hits.get(entity, 0) + 1
+                return True, entry[0]
+            if entry is not None:
+                del self._entries[entity][key]
+            self._misses[entity] = self._misses.get(entity, 0) + 1
+            return False, None
+
+    def set(self, entity, key, value):
+        """Store a value, replacing any existing entry for the key."""
+        ttl = self.ttls.get(entity, self.default_ttl)
+        with self._lock:
+            self._entries.setdefault(entity, {})[normalize_key(key)] = (value, self.clock() + ttl)
+
+    def invalidate(self, entity, key=None):
+        """Drop one cached key, or every key of an entity if `key` is None."""
+        with self._lock:
+            if key is None:
+                self._entries.pop(entity, None)
+            else:
+                self._entries.get(entity, {}).pop(normalize_key(key), None)
+
+    def memoize(self, entity):
+        """
+        Decorator caching a lookup function by its first argument.
+
+        `None` results are not cached, so missing records are retried on the
+        next call (e.g. after the model has been created). Concurrent misses on
+        the same key share a single call to the lookup function.
+        """
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(key, *args, **kwargs):
+                found, value = self.get(entity, key)
+                if found:
+                    return value
+
+                def fetch():
+                    # A previous flight may have filled the entry since our miss
+                    found, value = self._peek(entity, normalize_key(key))
+                    if found:
+                        return value
+                    value = func(key, *args, **kwargs)
+                    if value is not None:
+                        self.set(entity, key, value)
+                    return value
+
+                return self._flight.do((entity, normalize_key(key)), fetch)
+            wrapper.uncached = func
+            return wrapper
+        return decorator
+
+    def stats(self):
+        """Return hit/miss counters per entity."""
+        with self._lock:
+            entities = sorted(set(self._hits) | set(self._misses))
+            return {e: {'hits': self._hits.get(e, 0), 'misses': self._misses.get(e, 0)} for e in entities}
+
+    def format_stats(self):
+        """Return a one-line human readable summary of the hit/miss counters."""
+        parts = [f"{entity} {c['hits']} hit/{c['misses']} miss" for entity, c in self.stats().items()]
+        return "Lookup cache: " + (", ".join(parts) if parts else "no lookups")
+
+    def load(self):
+        """Load unexpired entries from the persistence file, if configured."""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable lookup cache {self.path}: {e}")
+            return
+
+        now = self.clock()
+        with self._lock:
+            for entity, entries in data.items():
+                for key, (value, expires_at) in entries.items():
+                    if expires_at > now:
+                        self._entries.setdefault(entity, {})[key] = (value, expires_at)
+
+    def save(self):
+        """Write unexpired entries to the persistence file, if configured."""
+        if not self.path:
+            return
+        now = self.clock()
+        with self._lock:
+            data = {
+                entity: {key: list(entry) for key, entry in entries.items() if entry[1] > now}
+                for entity, entries in self._entries.items()
+            }
+        tmp_path = f"{self.path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not persist lookup cache to {self.path}: {e}")
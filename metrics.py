@@ -0,0 +1,315 @@
+"""
+Prometheus metrics for sync runs.
+
+A small, dependency-free registry of counters, gauges and histograms rendered
+in the Prometheus text exposition format. Metrics can be written atomically to
+a node_exporter textfile collector at the end of a run, or served on
+`/metrics` while the process runs.
+
+The metrics the sync records are defined at module level below (as with
+prometheus_client), so the Snipe-IT clients, the Google pager and the Gemini
+call can update them without threading a registry through every call.
+"""
+
+import bisect
+import os
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def endpoint_label(path):
+    """Collapse numeric IDs in an API path (e.g. '/hardware/12' -> '/hardware/{id}')."""
+    return re.sub(r'/\d+(?=/|$)', '/{id}', path.split('?', 1)[0]) or '/'
+
+
+class _Metric:
+    """Base for a metric family with optional labels."""
+
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def labels(self, *labelvalues):
+        """Return the series for `labelvalues`, in the order of `labelnames`."""
+        if len(labelvalues) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {labelvalues}")
+        return _Series(self, tuple(str(v) for v in labelvalues))
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def render(self, const_labels=()):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        names = tuple(name for name, _ in const_labels) + self.labelnames
+        for key, value in items:
+            lines.extend(self._samples(names, tuple(v for _, v in const_labels) + key, value))
+        return lines
+
+    def _samples(self, names, key, value):
+        return [f"{self.name}{_format_labels(names, key)} {_format_value(value)}"]
+
+    # Unlabelled metrics are used directly
+    def inc(self, amount=1):
+        self.labels().inc(amount)
+
+    def set(self, value):
+        self.labels().set(value)
+
+    def observe(self, value):
+        self.labels().observe(value)
+
+    def value(self):
+        return self.labels().value()
+
+
+class _Series:
+    """One labelled series of a metric."""
+
+    def __init__(self, metric, key):
+        self.metric = metric
+        self.key = key
+
+    def inc(self, amount=1):
+        self.metric._inc(self.key, amount)
+
+    def set(self, value):
+        self.metric._set(self.key, value)
+
+    def observe(self, value):
+        self.metric._observe(self.key, value)
+
+    def value(self):
+        with self.metric._lock:
+            return self.metric._get(self.key)
+
+
+class Counter(_Metric):
+    """Monotonically increasing value."""
+
+    kind = 'counter'
+
+    def _inc(self, key, amount):
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _get(self, key):
+        return self._values.get(key, 0)
+
+
+class Gauge(_Metric):
+    """Value that can go up and down."""
+
+    kind = 'gauge'
+
+    def _set(self, key, value):
+        with self._lock:
+            self._values[key] = value
+
+    def _get(self, key):
+        return self._values.get(key, 0)
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _observe(self, key, value):
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * (len(self.buckets) + 1), 0.0))
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            self._values[key] = (counts, total + value)
+
+    def _get(self, key):
+        """Number of observations."""
+        counts, _ = self._values.get(key, ([0], 0.0))
+        return sum(counts)
+
+    def _samples(self, names, key, value):
+        counts, total = value
+        lines, cumulative = [], 0
+        for bound, count in zip(self.buckets + (float('inf'),), counts):
+            cumulative += count
+            labels = _format_labels(names, key, [('le', _format_value(float(bound)))])
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(names, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Collection of metrics rendered together."""
+
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+        # Labels added to every sample, e.g. {'shard': '0/4'}
+        self.const_labels = {}
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self):
+        """Return every metric in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics)
+        const_labels = tuple(sorted(self.const_labels.items()))
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render(const_labels))
+        return '\n'.join(lines) + '\n'
+
+    def write_textfile(self, path):
+        """
+        Write the metrics for node_exporter's textfile collector.
+
+        The file is written to a temporary name and renamed into place, so the
+        collector never reads a partial file.
+
+        Args:
+            path (str): Target .prom file.
+        """
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+    def serve(self, port, addr='0.0.0.0'):
+        """
+        Serve `/metrics` on a background thread.
+
+        Returns:
+            ThreadingHTTPServer: The server; call `shutdown()` to stop it.
+        """
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.split('?', 1)[0] not in ('/metrics', '/'):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        server = ThreadingHTTPServer((addr, port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True).start()
+        return server
+
+
+REGISTRY = Registry()
+
+# Snipe-IT API
+SNIPEIT_REQUESTS = REGISTRY.counter(
+    'google2snipe_snipeit_requests_total',
+    'Snipe-IT API responses by endpoint, method and HTTP status (status="error" for connection errors).',
+    ['endpoint', 'method', 'status'])
+SNIPEIT_REQUEST_SECONDS = REGISTRY.histogram(
+    'google2snipe_snipeit_request_duration_seconds',
+    'Snipe-IT API request latency by endpoint and method.',
+    ['endpoint', 'method'])
+SNIPEIT_RATE_LIMITED = REGISTRY.counter(
+    'google2snipe_snipeit_rate_limited_total',
+    'Snipe-IT 429 responses by endpoint and method.',
+    ['endpoint', 'method'])
+SNIPEIT_RETRIES = REGISTRY.counter(
+    'google2snipe_snipeit_retries_total',
+    'Snipe-IT request attempts that were retried, by reason (rate_limited or error).',
+    ['endpoint', 'method', 'reason'])
+SNIPEIT_SLEEP_SECONDS = REGISTRY.counter(
+    'google2snipe_snipeit_sleep_seconds_total',
+    'Seconds spent waiting before Snipe-IT requests, by reason (rate_limit or backoff).',
+    ['reason'])
+
+# Google Directory API
+GOOGLE_PAGES = REGISTRY.counter(
+    'google2snipe_google_pages_total',
+    'Google Directory chromeosdevices.list pages fetched.')
+GOOGLE_PAGE_SECONDS = REGISTRY.histogram(
+    'google2snipe_google_page_duration_seconds',
+    'Google Directory chromeosdevices.list page latency.')
+GOOGLE_DEVICES = REGISTRY.counter(
+    'google2snipe_google_devices_total',
+    'Devices listed from the Google Directory.')
+
+# Gemini
+GEMINI_REQUESTS = REGISTRY.counter(
+    'google2snipe_gemini_requests_total',
+    'Gemini classification calls by outcome (success or error).',
+    ['outcome'])
+GEMINI_REQUEST_SECONDS = REGISTRY.histogram(
+    'google2snipe_gemini_request_duration_seconds',
+    'Gemini classification latency.')
+CATEGORY_RULE_LOOKUPS = REGISTRY.counter(
+    'google2snipe_category_rule_lookups_total',
+    'Models classified by the local category rules, by result (hit or miss; a miss goes to the cache or Gemini).',
+    ['result'])
+
+# Run
+DEVICES = REGISTRY.counter(
+    'google2snipe_devices_total',
+    'Devices processed in the run, by outcome.',
+    ['outcome'])
+RUN_DURATION_SECONDS = REGISTRY.gauge(
+    'google2snipe_run_duration_seconds',
+    'Wall-clock duration of the last sync run.')
+RUN_LAST_TIMESTAMP = REGISTRY.gauge(
+    'google2snipe_run_last_timestamp_seconds',
+    'Unix time the last sync run finished.')
+RUN_LAST_SUCCESS_TIMESTAMP = REGISTRY.gauge(
+    'google2snipe_run_last_success_timestamp_seconds',
+    'Unix time the last sync run finished without failed devices.')
@@ -0,0 +1,58 @@
+"""
+In-memory table of Snipe-IT models.
+
+Loaded once per run from a paged listing of /models. Before any hardware is
+written, the distinct device models are resolved against it and the missing
+ones created, so the hardware phase looks models up here instead of
+searching Snipe-IT per device.
+"""
+
+import threading
+
+from category_cache import normalize_model_name
+
+
+class ModelTable:
+    """Snipe-IT model IDs keyed by normalized model name (exact matches only)."""
+
+    def __init__(self, rows=None):
+        self._ids = {}
+        self._lock = threading.Lock()
+        for row in rows or []:
+            self.add(row.get('name'), row.get('id'))
+
+    def add(self, name, model_id):
+        """Record a model; the first model seen under a name wins, like Snipe-IT's exact match."""
+        if name and model_id is not None:
+            key = normalize_model_name(name)
+            with self._lock:
+                self._ids.setdefault(key, model_id)
+
+    def get(self, name):
+        """
+        Returns:
+            int: The model ID for `name`, or None if Snipe-IT has no model by that name.
+        """
+        return self._ids.get(normalize_model_name(name)) if name else None
+
+    def missing(self, names):
+        """
+        Distinct model names not in the table, in first-seen order.
+
+        Spellings that normalize to the same name count once; None and empty
+        names are ignored.
+        """
+        missing = {}
+        for name in names:
+            if not name:
+                continue
+            key = normalize_model_name(name)
+            if key not in self._ids:
+                missing.setdefault(key, name)
+        return list(missing.values())
+
+    def __contains__(self, name):
+        return self.get(name) is not None
+
+    def __len__(self):
+        return len(self._ids)
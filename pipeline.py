@@ -0,0 +1,149 @@
+"""
+Producer/consumer helpers for streaming devices from Google into Snipe-IT.
+
+`stream_through_queue` runs a generator (e.g. Google Directory paging) on a
+background thread and hands its items to the consumer through a bounded
+queue, so Google paging overlaps with Snipe-IT writes and memory stays flat
+regardless of fleet size.
+"""
+
+import queue
+import threading
+
+_DONE = object()
+
+
+def stream_through_queue(iterable, maxsize=1000):
+    """
+    Iterate over `iterable` on a producer thread, yielding items as they arrive.
+
+    The producer blocks once `maxsize` items are waiting, which bounds memory
+    and applies back-pressure to the upstream pager. Exceptions raised by the
+    producer are re-raised in the consumer. If the consumer stops early, the
+    producer is told to stop at its next item.
+
+    Args:
+        iterable (iterable): Source of items, typically a paging generator.
+        maxsize (int): Maximum items buffered between producer and consumer.
+
+    Yields:
+        Items from `iterable`, in order.
+    """
+    buffer = queue.Queue(maxsize=max(1, maxsize))
+    stop = threading.Event()
+    failure = []
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put(item):
+                    return
+        except BaseException as e:
+            failure.append(e)
+        finally:
+            put(_DONE)
+
+    producer = threading.Thread(target=produce, name="device-producer", daemon=True)
+    producer.start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is _DONE:
+                break
+            yield item
+        if failure:
+            raise failure[0]
+    finally:
+        stop.set()
+        producer.join(timeout=1)
+
+
+def merge_through_queue(iterables, maxsize=1000, concurrency=4):
+    """
+    Drain several iterables concurrently, yielding their items as they arrive.
+
+    At most `concurrency` iterables run at once, each on its own producer
+    thread; a producer moves on to the next waiting iterable when its current
+    one is exhausted. Items from different iterables interleave, but each
+    iterable's own order is kept. Back-pressure, error propagation and early
+    stop work as in `stream_through_queue`; the first producer error stops
+    the others.
+
+    Args:
+        iterables (iterable): Sources of items, e.g. one paging generator per partition.
+        maxsize (int): Maximum items buffered between the producers and the consumer.
+        concurrency (int): Maximum iterables drained at the same time.
+
+    Yields:
+        Items from all `iterables`.
+    """
+    sources = queue.Queue()
+    for iterable in iterables:
+        sources.put(iterable)
+    workers = max(1, min(concurrency, sources.qsize()))
+    buffer = queue.Queue(maxsize=max(1, maxsize))
+    stop = threading.Event()
+    closed = threading.Event()
+    failure = []
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            while not stop.is_set():
+                try:
+                    iterable = sources.get_nowait()
+                except queue.Empty:
+                    return
+                for item in iterable:
+                    if not put(item):
+                        return
+        except BaseException as e:
+            failure.append(e)
+            stop.set()
+        finally:
+            # Delivered even after a stop, so the consumer can count producers out
+            while not closed.is_set():
+                try:
+                    buffer.put(_DONE, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+
+    producers = [threading.Thread(target=produce, name=f"device-producer-{i}", daemon=True)
+                 for i in range(workers)]
+    for producer in producers:
+        producer.start()
+    try:
+        remaining = workers
+        while remaining:
+            item = buffer.get()
+            if item is _DONE:
+                remaining -= 1
+                continue
+            if failure:
+                break
+            yield item
+        if failure:
+            raise failure[0]
+    finally:
+        stop.set()
+        closed.set()
+        for producer in producers:
+            producer.join(timeout=1)
@@ -0,0 +1,218 @@
+"""
+Process-wide adaptive rate limiter for Snipe-IT API calls.
+
+A token bucket paces requests below the server's advertised limit and adapts
+to the X-RateLimit-Limit / X-RateLimit-Remaining / Retry-After headers Snipe-IT
+returns. A 429 pauses every caller sharing the limiter, not just the thread
+that received it.
+"""
+
+import asyncio
+import email.utils
+import random
+import threading
+import time
+
+
+def _header(headers, name):
+    """Case-insensitive header lookup that works for plain dicts too."""
+    if not headers:
+        return None
+    value = headers.get(name)
+    if value is not None:
+        return value
+    lowered = name.lower()
+    for key, value in headers.items():
+        if key.lower() == lowered:
+            return value
+    return None
+
+
+def parse_retry_after(value, now=None):
+    """
+    Parse a Retry-After header value.
+
+    Args:
+        value (str): Either delay-seconds or an HTTP-date.
+        now (float, optional): Current epoch time, for HTTP-date values.
+
+    Returns:
+        float: Seconds to wait, or None if the value is missing or invalid.
+    """
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at - (time.time() if now is None else now))
+
+
+def backoff_delay(attempt, base, factor, max_delay, rng=random):
+    """
+    Jittered exponential backoff.
+
+    The delay grows as `base * factor ** (attempt - 1)`, is capped at
+    `max_delay`, and is then drawn uniformly from its upper half so that
+    concurrent callers do not retry in lockstep.
+
+    Args:
+        attempt (int): 1-based attempt number that just failed.
+        base (float): Delay for the first retry, in seconds.
+        factor (float): Growth factor per attempt (1.0 = constant).
+        max_delay (float): Upper bound in seconds.
+        rng (random.Random): Source of jitter.
+
+    Returns:
+        float: Seconds to sleep before the next attempt.
+    """
+    delay = min(max_delay, base * (factor ** (attempt - 1)))
+    return rng.uniform(delay / 2, delay)
+
+
+class RateLimiter:
+    """Thread-safe token bucket shared by all Snipe-IT requests."""
+
+    def __init__(self, requests_per_minute, burst=5, safety_factor=0.9,
+                 clock=time.monotonic, sleep=time.sleep, share=1.0):
+        """
+        Args:
+            requests_per_minute (float): Server limit to stay below.
+            burst (int): Maximum tokens held, i.e. requests that may go out back to back.
+            safety_factor (float): Fraction of the advertised limit actually used.
+            share (float): Fraction of the limit this process may use, when
+                several processes (e.g. shards) share one API token.
+            clock (callable): Monotonic time source, overridable for tests.
+            sleep (callable): Sleep function, overridable for tests.
+        """
+        self.safety_factor = safety_factor
+        self.share = share
+        self.burst = max(1, burst)
+        self.clock = clock
+        self.sleep = sleep
+        self._lock = threading.Lock()
+        self._rate = self._per_second(requests_per_minute)
+        self._tokens = float(self.burst)
+        self._updated = clock()
+        self._paused_until = 0.0
+        self.limit = requests_per_minute
+        self.total_wait = 0.0
+
+    def _per_second(self, requests_per_minute):
+        return max(requests_per_minute * self.safety_factor * self.share / 60.0, 1e-6)
+
+    def set_share(self, share):
+        """Use only `share` of the limit from now on (e.g. 1/N for N shards on one token)."""
+        with self._lock:
+            self._refill(self.clock())
+            self.share = share
+            self._rate = self._per_second(self.limit)
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+    def reserve(self):
+        """
+        Take a token if one is available, without blocking.
+
+        Returns:
+            float: 0.0 if a request may be sent now, otherwise the seconds to
+                wait before trying again.
+        """
+        with self._lock:
+            now = self.clock()
+            self._refill(now)
+            if self._paused_until > now:
+                return self._paused_until - now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self._rate
+
+    def _record_wait(self, waited):
+        with self._lock:
+            self.total_wait += waited
+
+    def acquire(self):
+        """
+        Block until a request may be sent.
+
+        Returns:
+            float: Seconds spent waiting.
+        """
+        waited = 0.0
+        while True:
+            wait = self.reserve()
+            if wait <= 0:
+                self._record_wait(waited)
+                return waited
+            self.sleep(wait)
+            waited += wait
+
+    async def acquire_async(self):
+        """
+        Wait without blocking the event loop until a request may be sent.
+
+        Shares tokens and pauses with `acquire`, so threaded and asyncio
+        callers are paced together.
+
+        Returns:
+            float: Seconds spent waiting.
+        """
+        waited = 0.0
+        while True:
+            wait = self.reserve()
+            if wait <= 0:
+                self._record_wait(waited)
+                return waited
+            await asyncio.sleep(wait)
+            waited += wait
+
+    def pause(self, seconds):
+        """Stop all callers from sending requests for `seconds`."""
+        with self._lock:
+            now = self.clock()
+            self._refill(now)
+            self._paused_until = max(self._paused_until, now + seconds)
+            self._tokens = 0.0
+
+    def observe(self, headers):
+        """
+        Adapt to rate limit headers from a response.
+
+        X-RateLimit-Limit retunes the refill rate. X-RateLimit-Remaining caps
+        the tokens on hand so a burst never overshoots what the server still
+        allows, and pauses until the window resets once it reaches zero.
+        """
+        limit = _header(headers, 'X-RateLimit-Limit')
+        remaining = _header(headers, 'X-RateLimit-Remaining')
+        try:
+            limit = float(limit) if limit is not None else None
+            remaining = float(remaining) if remaining is not None else None
+        except ValueError:
+            return
+
+        reset_wait = parse_retry_after(_header(headers, 'Retry-After'))
+        reset_at = _header(headers, 'X-RateLimit-Reset')
+        if reset_wait is None and reset_at is not None:
+            try:
+                reset_wait = max(0.0, float(reset_at) - time.time())
+            except ValueError:
+                reset_wait = None
+
+        with self._lock:
+            now = self.clock()
+            self._refill(now)
+            if limit and limit > 0 and limit != self.limit:
+                self.limit = limit
+                self._rate = self._per_second(limit)
+            if remaining is not None:
+                self._tokens = min(self._tokens, max(0.0, remaining))
+                if remaining <= 0:
+                    wait = reset_wait if reset_wait is not None else 1.0 / self._rate
+                    self._paused_until = max(self._paused_until, now + wait)
@@ -0,0 +1,223 @@
+"""
+Sharded sync across processes and hosts.
+
+`--shard i/N` restricts a run to the devices whose stable hash (of the serial
+number, or of the Google orgUnitPath so whole OUs stay together) falls in
+shard i of N. Each shard keeps its own state files, writes a run summary that
+can be merged with the others, and takes a cross-process lock around
+first-time model creation so two shards never create the same model.
+"""
+
+import json
+import logging
+import os
+import subprocess
+import sys
+import threading
+import zlib
+
+logger = logging.getLogger(__name__)
+
+SHARD_KEYS = {
+    'serial': 'Serial Number',
+    'orgunit': 'Org Unit Path',
+}
+
+
+def parse_shard(value):
+    """
+    Parse a shard spec like '2/8' (shard index 2 of 8, zero-based).
+
+    Raises:
+        ValueError: If the spec is malformed or the index is out of range.
+    """
+    try:
+        index, count = (int(part) for part in str(value).split('/'))
+    except ValueError:
+        raise ValueError(f"Invalid shard '{value}', expected i/N (e.g. 0/4)")
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"Invalid shard '{value}': index must be between 0 and {count - 1}")
+    return index, count
+
+
+def format_shard(shard):
+    return f"{shard[0]}/{shard[1]}"
+
+
+def shard_of(device, count, by='serial'):
+    """Stable shard index of a device record for `count` shards."""
+    key = str(device.get(SHARD_KEYS[by]) or '').strip().lower()
+    return zlib.crc32(key.encode('utf-8')) % count
+
+
+def filter_shard(devices, shard, by='serial'):
+    """Lazily keep only the devices that belong to `shard` ((index, count))."""
+    index, count = shard
+    for device in devices:
+        if shard_of(device, count, by) == index:
+            yield device
+
+
+def shard_path(path, shard):
+    """
+    Per-shard variant of a state file path.
+
+    'state/sync_state.json' -> 'state/sync_state.shard0of4.json'. Returns the
+    path unchanged when not sharded or empty.
+    """
+    if not path or shard is None:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.shard{shard[0]}of{shard[1]}{ext}"
+
+
+class ProcessLock:
+    """
+    Exclusive lock shared by every process using the same lock file (flock).
+
+    Also serializes threads within a process, since flock locks are held per
+    open file and would not block a second thread of the same process.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._thread_lock = threading.Lock()
+        self._file = None
+
+    def acquire(self):
+        import fcntl
+
+        self._thread_lock.acquire()
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            self._file = open(self.path, 'a')
+            fcntl.flock(self._file, fcntl.LOCK_EX)
+        except BaseException:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            self._thread_lock.release()
+            raise
+
+    def release(self):
+        import fcntl
+
+        try:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+        finally:
+            self._file = None
+            self._thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+def write_summary(path, counts, started_at, finished_at, shard=None, failed=False):
+    """Write a run summary JSON file atomically."""
+    if not path:
+        return
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    summary = {
+        'shard': format_shard(shard) if shard else None,
+        'counts': dict(counts),
+        'started_at': started_at,
+        'finished_at': finished_at,
+        'duration_seconds': finished_at - started_at,
+        'failed': bool(failed),
+    }
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def merge_summaries(path, count):
+    """
+    Merge the per-shard run summaries written next to `path` for `count` shards.
+
+    Returns:
+        dict: Combined summary with summed counts, the overall start/finish
+            time, and the shards that are missing or failed.
+    """
+    counts, started, finished, missing, failed = {}, [], [], [], []
+    for index in range(count):
+        shard_file = shard_path(path, (index, count))
+        try:
+            with open(shard_file, 'r', encoding='utf-8') as f:
+                summary = json.load(f)
+        except (OSError, ValueError):
+            missing.append(format_shard((index, count)))
+            continue
+        for outcome, value in summary.get('counts', {}).items():
+            counts[outcome] = counts.get(outcome, 0) + value
+        started.append(summary['started_at'])
+        finished.append(summary['finished_at'])
+        if summary.get('failed'):
+            failed.append(summary['shard'])
+
+    return {
+        'shard': None,
+        'shards': count,
+        'counts': counts,
+        'started_at': min(started) if started else None,
+        'finished_at': max(finished) if finished else None,
+        'duration_seconds': (max(finished) - min(started)) if started else None,
+        'failed': bool(missing or failed),
+        'missing_shards': missing,
+        'failed_shards': failed,
+    }
+
+
+def strip_option(argv, name):
+    """Remove `--name value` / `--name=value` from an argument list."""
+    result, skip = [], False
+    for arg in argv:
+        if skip:
+            skip = False
+            continue
+        if arg == name:
+            skip = True
+            continue
+        if arg.startswith(name + '='):
+            continue
+        result.append(arg)
+    return result
+
+
+def spawn_shards(script, argv, count, api_tokens=(), env=None):
+    """
+    Run `count` shard processes of `script` on this host and wait for them.
+
+    Each child runs with `--shard i/count`. When `api_tokens` are given, the
+    children use them round-robin as API_TOKEN, and each child's rate limit is
+    split only among the children that share its token.
+
+    Returns:
+        int: The highest child exit code (0 if all succeeded, 1 for a child killed by a signal).
+    """
+    children = []
+    for index in range(count):
+        child_env = dict(env if env is not None else os.environ)
+        if api_tokens:
+            token = index % len(api_tokens)
+            child_env['API_TOKEN'] = api_tokens[token]
+            sharers = len(range(token, count, len(api_tokens)))
+            if sharers == 1:
+                child_env['SHARD_RATE_LIMIT_SPLIT'] = 'false'
+            else:
+                child_env['SHARD_RATE_LIMIT_SHARERS'] = str(sharers)
+        command = [sys.executable, script] + strip_option(argv, '--shard') + ['--shard', f"{index}/{count}"]
+        children.append(subprocess.Popen(command, env=child_env))
+        logger.info(f"Started shard {index}/{count} as pid {children[-1].pid}")
+
+    exit_code = 0
+    for child in children:
+        code = child.wait()
+        # A child killed by a signal has a negative return code
+        exit_code = max(exit_code, 1 if code < 0 else code)
+    return exit_code
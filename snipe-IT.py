@@ -1,12 +1,39 @@
+import argparse
+import asyncio
+import itertools
 import requests
 import json
 import logging
+import sys
+import threading
 import time
 from tqdm import tqdm
 
 import googleAuth
 import gemini
+import metrics
+import sharding
+import sync_plan
 from config import Config
+from async_engine import AsyncSnipeITClient, AsyncSyncEngine, require_aiohttp
+from category_cache import CategoryCache, SingleFlight, match_category, normalize_model_name
+from category_rules import DEFAULT_RULES, CategoryRules, load_rules
+from hardware_index import HardwareIndex
+from hardware_payloads import build_create_payload, build_update_payload, diff_payload, format_mac
+from inventory_snapshot import InventorySnapshot, require_pandas
+from lookup_cache import LookupCache
+from model_table import ModelTable
+from pipeline import stream_through_queue
+from rate_limiter import RateLimiter
+from snipeit_client import SnipeITClient
+from sync_decisions import (DUPLICATE, assignee, assignment_requests, checkin_request, checkout_request,
+                            create_result, exact_model_id, fixed_status_id, mark_checked_out, matching_row,
+                            merge_assignment, model_create_payload, needs_fieldset, write_result)
+from sync_journal import SyncJournal
+from sync_state import SyncState
+from sync_stats import CREATED, FAILED, OUTCOMES, SKIPPED, UNCHANGED, UPDATED, SyncStats
+from user_index import UserIndex
+from worker_pool import run_bounded
 
 # Validate configuration before proceeding
 is_valid, errors = Config.validate()
@@ -28,67 +55,207 @@ api_key = Config.API_TOKEN
 base_url = Config.ENDPOINT_URL
 default_model_id = Config.SNIPE_IT_DEFAULT_MODEL_ID
 
+# Process-wide limiter that every Snipe-IT request goes through
+rate_limiter = RateLimiter(
+    Config.SNIPE_IT_RATE_LIMIT_PER_MINUTE,
+    burst=Config.SNIPE_IT_RATE_LIMIT_BURST,
+    safety_factor=Config.SNIPE_IT_RATE_LIMIT_SAFETY_FACTOR
+)
+
+# Pooled Snipe-IT clients, one per (base_url, api_key); see get_client()
+_clients = {}
+_clients_lock = threading.Lock()
+
+# Shared cache for model/status/category/user ID lookups
+lookup_cache = LookupCache(
+    ttls={
+        'models': Config.LOOKUP_CACHE_TTL_MODELS,
+        'statuslabels': Config.LOOKUP_CACHE_TTL_STATUSLABELS,
+        'categories': Config.LOOKUP_CACHE_TTL_CATEGORIES,
+        'users': Config.LOOKUP_CACHE_TTL_USERS,
+    },
+    path=Config.LOOKUP_CACHE_FILE
+)
+
+# Durable cache of Gemini model classifications
+category_cache = CategoryCache(Config.GEMINI_CATEGORY_CACHE_FILE)
+
+# Local rules that classify obvious model names without asking Gemini
+if not Config.CATEGORY_RULES_ENABLED:
+    category_rules = CategoryRules([], Config.GEMINI_CATEGORIES)
+elif Config.CATEGORY_RULES_FILE:
+    category_rules = CategoryRules(load_rules(Config.CATEGORY_RULES_FILE), Config.GEMINI_CATEGORIES)
+else:
+    category_rules = CategoryRules(DEFAULT_RULES, Config.GEMINI_CATEGORIES)
+
+# De-duplicates concurrent lookups/creation of the same model across worker threads
+model_flight = SingleFlight()
+
+# Cross-process lock around model creation, set when running as one of several shards
+model_creation_lock = None
+
+# Snipe-IT models loaded at the start of a sync; see resolve_models()
+model_table = None
 
+# Snipe-IT users by email, loaded when SNIPE_IT_CHECKOUT_TO_USER is set; see sync_assignment()
+user_index = None
 
-def format_mac(mac: str) -> str:
+
+
+def get_client(api_key=api_key, base_url=base_url):
+    """
+    Returns the pooled SnipeITClient for an API key and base URL, creating it
+    on first use. All clients share the process-wide rate limiter.
+    """
+    key = (base_url, api_key)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = SnipeITClient(
+                base_url,
+                api_key,
+                rate_limiter,
+                pool_size=Config.SNIPE_IT_POOL_SIZE,
+                timeout=(Config.SNIPE_IT_CONNECT_TIMEOUT, Config.SNIPE_IT_READ_TIMEOUT),
+                max_retries=Config.MAX_RETRIES,
+                retry_delay=Config.RETRY_DELAY_SECONDS,
+                backoff_factor=Config.RETRY_BACKOFF_FACTOR,
+                max_delay=Config.RETRY_MAX_DELAY_SECONDS
+            )
+            _clients[key] = client
+        return client
+
+def retry_request(method, url, headers=None, json=None, params=None, retries=None, delay=None):
     """
-    Formats a MAC address string to colon-separated format (e.g., a81d166742f7 -> a8:1d:16:67:42:f7).
-    Ignores formatting if input is None or already formatted.
+    Sends a request to a full Snipe-IT URL through the default client.
 
-    Args:
-        mac (str): Raw MAC address string (12 hex characters).
+    Kept for callers that build their own URLs; new code should use
+    get_client() directly. `headers` are merged over the client's auth headers.
 
     Returns:
-        str: Formatted MAC address.
+        requests.Response: The response, or None if every attempt failed.
     """
-    if not mac or ":" in mac:
-        return mac  # Already formatted or None
+    return get_client().request(method, url, json=json, params=params, headers=headers,
+                                retries=retries, delay=delay)
 
-    mac = mac.lower().replace("-", "").replace(":", "").strip()
-    if len(mac) != 12:
-        return mac  # Return as-is if not 12 chars
 
-    return ":".join(mac[i:i+2] for i in range(0, 12, 2))
 
-def retry_request(method, url, headers=None, json=None, params=None, retries=4, delay=20):
-    for attempt in range(1, retries + 1):
-        try:
-            response = requests.request(method, url, headers=headers, json=json, params=params)
-            if response.status_code == 429:
-                msg = f"Rate limited on {url}. Attempt {attempt} of {retries}. Retrying in {delay} seconds..."
-                tqdm.write(msg)
-                logging.warning(msg)
-                time.sleep(delay)
-                continue
-            return response
-        except requests.RequestException as e:
-            msg = f"Request error on {method} {url}: {e}"
+def iter_rows(path, params=None, page_size=None, api_key=api_key, base_url=base_url, errors=None):
+    """
+    Yields every row of a Snipe-IT listing endpoint using limit/offset pages.
+
+    Args:
+        path (str): Listing endpoint, e.g. "/hardware".
+        params (dict, optional): Extra query parameters.
+        page_size (int, optional): Rows per page. Defaults to Config.SNIPE_IT_HARDWARE_PAGE_SIZE.
+        errors (list, optional): A failed page's message is appended here.
+    """
+    page_size = page_size or Config.SNIPE_IT_HARDWARE_PAGE_SIZE
+    client = get_client(api_key, base_url)
+    offset = 0
+
+    while True:
+        response = client.get(path, params=dict(params or {}, limit=page_size, offset=offset))
+        if response is None or response.status_code != 200:
+            status = response.status_code if response is not None else "no response"
+            msg = f"Failed to load {path.strip('/')} page at offset {offset}: {status}"
             tqdm.write(msg)
-            logging.error(msg)
-            time.sleep(delay)
-    
-    msg = f"Max retries exceeded for {method} {url}"
-    tqdm.write(msg)
-    logging.error(msg)
-    return None
+            logger.error(msg)
+            if errors is not None:
+                errors.append(msg)
+            break
+
+        data = response.json()
+        rows = data.get('rows', [])
+        yield from rows
+
+        offset += len(rows)
+        if not rows or offset >= data.get('total', 0):
+            break
+
+def iter_hardware_rows(api_key=api_key, base_url=base_url, page_size=None, errors=None):
+    """Yields every hardware asset in Snipe-IT, archived ones included."""
+    return iter_rows("/hardware", {'status': 'all', 'sort': 'id', 'order': 'asc'},
+                     page_size, api_key, base_url, errors)
+
+def load_hardware_index(api_key=api_key, base_url=base_url, page_size=None):
+    """
+    Pages through every hardware asset in Snipe-IT and indexes it locally.
+
+    Uses large limit/offset pages so the whole inventory is fetched in a
+    handful of requests instead of one search per device.
+
+    Args:
+        api_key (str): API key for authentication.
+        base_url (str): Base URL for your Snipe-IT instance.
+        page_size (int, optional): Rows per page. Defaults to Config.SNIPE_IT_HARDWARE_PAGE_SIZE.
+
+    Returns:
+        HardwareIndex: Index of hardware rows keyed by serial and asset tag.
+    """
+    index = HardwareIndex(iter_hardware_rows(api_key, base_url, page_size))
+    tqdm.write(f"Indexed {len(index)} existing hardware assets from Snipe-IT.")
+    return index
+
+def load_model_table(api_key=api_key, base_url=base_url):
+    """
+    Loads every Snipe-IT model into a ModelTable.
+
+    Returns:
+        ModelTable: The models, or None if the listing failed.
+    """
+    errors = []
+    table = ModelTable(iter_rows("/models", api_key=api_key, base_url=base_url, errors=errors))
+    return None if errors else table
+
+def load_user_index(api_key=api_key, base_url=base_url):
+    """
+    Loads every Snipe-IT user into a UserIndex.
 
+    Returns:
+        UserIndex: The users, or None if the listing failed.
+    """
+    errors = []
+    index = UserIndex(iter_rows("/users", {'sort': 'id', 'order': 'asc'}, api_key=api_key, base_url=base_url,
+                                errors=errors))
+    return None if errors else index
 
+def hardware_exists(asset_tag, serial, api_key, base_url=base_url, index=None):
+    if index is not None:
+        return index.lookup(asset_tag=asset_tag, serial=serial) is not None
 
-def hardware_exists(asset_tag, serial, api_key, base_url=base_url):
-    url = f"{base_url}/hardware"
-    headers = {'Authorization': f'Bearer {api_key}', 'Accept': 'application/json'}
     params = {'search': asset_tag,
               'status': 'all' }
-    
-    response = retry_request("GET", url, headers=headers, params=params)
-
+    response = get_client(api_key, base_url).get("/hardware", params=params)
 
-    if response.status_code == 200:
+    if response is not None and response.status_code == 200:
         for item in response.json().get('rows', []):
             if item.get('serial') == serial or item.get('asset_tag') == asset_tag:
                 return True
     return False
-def update_hardware(asset_tag, model_id, status_id, macAddress=None, createdDate=None, ipAddress=None, last_User=None,eol=None, api_key=api_key, base_url=base_url):
+def find_hardware(asset_tag, api_key=api_key, base_url=base_url):
+    """
+    Searches Snipe-IT for the hardware row with an asset tag.
+
+    Returns:
+        tuple: (200, row), (404, error) if there is no such asset, or
+            (status_code, error) if the search failed.
+    """
+    response = get_client(api_key, base_url).get("/hardware", params={'search': asset_tag})
+    if response is None:
+        tqdm.write(f"Failed to search for hardware: no response for '{asset_tag}'")
+        return 503, f"No response searching for {asset_tag}"
+    if response.status_code != 200:
+        tqdm.write(f"Failed to search for hardware: {response.status_code} - {response.text}")
+        return response.status_code, response.text
+
+    device = matching_row(response.json().get("rows", []), asset_tag)
+    if device is not None:
+        return 200, device
+    tqdm.write(f"No matching device found for asset tag '{asset_tag}'")
+    return 404, f"No matching device found for asset tag '{asset_tag}'"
+
+def update_hardware(asset_tag, model_id, status_id, macAddress=None, createdDate=None, ipAddress=None, last_User=None,eol=None, api_key=api_key, base_url=base_url, matched_device=None):
     """
     Updates an existing hardware asset in Snipe-IT using asset tag or serial.
 
@@ -99,75 +266,36 @@ def update_hardware(asset_tag, model_id, status_id, macAddress=None, createdDate
         macAddress (str, optional): MAC address custom field.
         createdDate (str, optional): Setup date (ISO format).
         ipAddress (str, optional): IP address custom field.
-    """
-    macAddress = format_mac(macAddress)
-
-    # Search for hardware by asset tag
-    url = f"{base_url}/hardware"
-    headers = {
-        'Authorization': f'Bearer {api_key}',
-        'Accept': 'application/json'
-    }
-    params = {'search': asset_tag}
-    response = retry_request("GET", url, headers=headers, params=params)
+        matched_device (dict, optional): Existing hardware row (e.g. from the
+            preloaded HardwareIndex). When given, the search request is skipped.
 
-    if response.status_code != 200:
-        tqdm.write(f"Failed to search for hardware: {response.status_code} - {response.text}")
-        return
+    Only fields that differ from the matched Snipe-IT row are sent. If
+    nothing changed, no PATCH is made.
 
-    devices = response.json().get("rows", [])
-    matched_device = None
-    for device in devices:
-        if device.get("asset_tag") == asset_tag:
-            matched_device = device
-            break
-
-    if not matched_device:
-        tqdm.write(f"No matching device found for asset tag '{asset_tag}'")
-        return
+    Returns:
+        tuple: (200, UPDATED), (200, UNCHANGED), or (status_code, error) on failure.
+    """
 
-    # Build updated fields
-    update_payload = {
-        'model_id': model_id,
-        'status_id': status_id,
-        'asset_tag': asset_tag
-    }
+    if matched_device is None:
+        status_code, matched_device = find_hardware(asset_tag, api_key, base_url)
+        if status_code != 200:
+            return status_code, matched_device
 
-    # Add custom fields if present
-    if macAddress:
-        update_payload[Config.SNIPE_IT_FIELD_MAC_ADDRESS] = macAddress
-    if createdDate:
-        update_payload[Config.SNIPE_IT_FIELD_SYNC_DATE] = createdDate
-    if ipAddress:
-        update_payload[Config.SNIPE_IT_FIELD_IP_ADDRESS] = ipAddress
-    if last_User:
-        update_payload[Config.SNIPE_IT_FIELD_USER] = last_User
-    if eol:
-        tqdm.write(f'EOL {eol}')
-        update_payload['eol'] = eol
+    # Build the desired fields and keep only the ones Snipe-IT does not already hold
+    desired = build_update_payload(asset_tag, model_id, status_id, macAddress, createdDate,
+                                   ipAddress, last_User, eol)
+    update_payload = diff_payload(desired, matched_device)
+    if not update_payload:
+        return 200, UNCHANGED
 
     hardware_id = matched_device['id']
-    update_url = f"{base_url}/hardware/{hardware_id}"
-    patch_headers = {
-        'Authorization': f'Bearer {api_key}',
-        'Content-Type': 'application/json',
-        'Accept': 'application/json'
-    }
-
-    update_response = retry_request("PATCH", update_url, headers=patch_headers, json=update_payload)
-
-
-    try:
-        response_data = update_response.json()
-    except ValueError:
-        tqdm.write("Failed to parse JSON from Snipe-IT hardware response.")
-        tqdm.write(f"Raw response: {update_response.text}")
-        return update_response.status_code, update_response.text
-    
-    if update_response.status_code == 200 and response_data.get("status") == "success":
-        tqdm.write(f"Updated hardware: {asset_tag}")
-    else:
-        tqdm.write(f"Failed to update hardware: {update_response.status_code} - {update_response.text}")
+    update_response = get_client(api_key, base_url).patch(f"/hardware/{hardware_id}", json=update_payload)
+    status_code, result = write_result(update_response, f"updating {asset_tag}")
+    if status_code != 200:
+        tqdm.write(f"Failed to update hardware {asset_tag}: {status_code} - {result}")
+        return status_code, result
+    tqdm.write(f"Updated hardware: {asset_tag} ({', '.join(sorted(update_payload))})")
+    return 200, UPDATED
 
 
 def assign_fieldset_to_model(model_id, fieldset_id, api_key, base_url=base_url):
@@ -180,143 +308,322 @@ def assign_fieldset_to_model(model_id, fieldset_id, api_key, base_url=base_url):
         api_key (str): API key for authentication.
         base_url (str): Base URL for your Snipe-IT instance.
     """
-    url = f"{base_url}/models/{model_id}"
-    headers = {
-        'Authorization': f'Bearer {api_key}',
-        'Content-Type': 'application/json',
-        'Accept': 'application/json'
-    }
     data = {
         'fieldset_id': fieldset_id
     }
-    response = retry_request("PATCH", url, headers=headers, json=data)
+    response = get_client(api_key, base_url).patch(f"/models/{model_id}", json=data)
 
-    if response.status_code == 200:
+    if response is None:
+        tqdm.write(f"Failed to assign fieldset: no response for model {model_id}")
+    elif response.status_code == 200:
         tqdm.write(f"Fieldset successfully assigned to model {model_id}")
     else:
         tqdm.write(f"Failed to assign fieldset: {response.status_code}, {response.text}")
 
-import time
+def resolve_category(model_name):
+    """
+    Returns the Snipe-IT category name for a model. The local category rules
+    are tried first; Gemini is asked only when no rule matches and the model
+    is not already in the local category cache.
+
+    Args:
+        model_name (str): The model name to classify.
+
+    Returns:
+        str: The category name, or CATEGORY_DEFAULT (possibly empty) when no
+            rule matches and Gemini is not configured.
+    """
+    category = category_rules.classify(model_name)
+    metrics.CATEGORY_RULE_LOOKUPS.labels('miss' if category is None else 'hit').inc()
+    if category is not None:
+        return category
+    if not Config.GEMINI_API_KEY:
+        cached = category_cache.get(model_name, Config.GEMINI_CATEGORIES)
+        if cached is None:
+            logger.warning(f"No category rule matches model '{model_name}' and Gemini is not configured")
+        return cached or Config.CATEGORY_DEFAULT
+    return category_cache.resolve(
+        model_name,
+        Config.GEMINI_CATEGORIES,
+        lambda: gemini.classify_model(model_name, Config.GEMINI_CATEGORIES)
+    )
+
+def prefetch_categories(model_names):
+    """
+    Classifies the models that are about to be created with batched Gemini prompts.
 
-def create_hardware(asset_tag, status_name, model_name, macAddress, createdDate, userEmail=None, ipAddress=None, eol=None):
-    # if userEmail:
-    #     userId = get_user_id(userEmail, api_key)
-    # else:
-    #     userId = None
+    Models already in Snipe-IT, matched by a category rule or in the category
+    cache are skipped. The rest
+    are sent GEMINI_BATCH_SIZE at a time, and the validated answers land in the
+    category cache, so create_model finds them there. Models Gemini leaves out
+    or answers with an unknown category fall back to one prompt each.
 
+    Args:
+        model_names (iterable): Model names of the devices about to be synced.
+    """
+    if Config.GEMINI_BATCH_SIZE <= 0 or not Config.GEMINI_API_KEY:
+        return
+    names = {}
+    for name in model_names:
+        if name:
+            names.setdefault(normalize_model_name(name), name)
+    unknown = [name for name in names.values()
+               if category_rules.match(name) is None
+               and category_cache.get(name, Config.GEMINI_CATEGORIES) is None
+               and not (model_table.get(name) if model_table is not None else get_model_id(name, api_key))]
+    if not unknown:
+        return
+
+    tqdm.write(f"Classifying {len(unknown)} new models with Gemini...")
     try:
-        status_id = Config.SNIPE_IT_DEFAULT_STATUS_ID if status_name == Config.SNIPE_IT_ACTIVE_STATUS else get_status_id(status_name, api_key)
+        resolved = category_cache.resolve_many(
+            unknown,
+            Config.GEMINI_CATEGORIES,
+            lambda batch: gemini.classify_models(batch, Config.GEMINI_CATEGORIES),
+            batch_size=Config.GEMINI_BATCH_SIZE
+        )
     except Exception as e:
-        tqdm.write(f"Status lookup failed: {e}")
-        logger.error(f"Status lookup error for status_name '{status_name}': {e}")
-        status_id = Config.SNIPE_IT_DEFAULT_STATUS_ID
+        logger.warning(f"Batched Gemini classification failed; classifying models one by one: {e}")
+        return
+    if len(resolved) < len(unknown):
+        tqdm.write(f"{len(unknown) - len(resolved)} models will be classified one by one.")
 
-    model_id = get_model_id(model_name, api_key)
-    macAddress = format_mac(macAddress)
-    if not model_id:
+def find_model_id(model_name, api_key=api_key, base_url=base_url):
+    """
+    Searches Snipe-IT for a model by exact (case and whitespace-insensitive) name.
+
+    Like get_model_id, but uncached.
+
+    Returns:
+        int: The model ID, or None if there is no such model or the search failed.
+    """
+    response = get_client(api_key, base_url).get("/models", params={'search': model_name})
+    if response is None or response.status_code != 200:
+        return None
+    return exact_model_id(response.json().get('rows', []), model_name)
+
+def create_missing_model(model_name):
+    """
+    Creates one model missing from the model table and adds it there.
+
+    When sharded, creation holds the cross-process model creation lock and
+    re-checks Snipe-IT first, so another shard's model is reused.
+
+    Returns:
+        int: The model ID, or None if it could not be created.
+    """
+    if model_creation_lock is None:
         tqdm.write(f"Model '{model_name}' not found. Creating new model...")
-        if model_name is None:
-            model_id = default_model_id
-        else:
-            category_name = gemini.gemini_prompt(f"""Given the following technology model, Model: {model_name} select the most appropriate category from this list:
-{Config.GEMINI_CATEGORIES}
-""").text  
+        model_id = create_model(model_name)
+    else:
+        with model_creation_lock:
+            model_id = find_model_id(model_name)
+            if not model_id:
+                tqdm.write(f"Model '{model_name}' not found. Creating new model...")
+                model_id = create_model(model_name)
+    if model_id:
+        model_table.add(model_name, model_id)
+    return model_id
+
+def resolve_models(model_names, workers=1):
+    """
+    Resolves the distinct models of a batch of devices before any of their hardware is written.
 
-            if '**' in category_name:
-                category_name = category_name.split('**')[1].strip()
-            else:
-                tqdm.write(f"Warning: '**' not found in Gemini response. Full response: '{category_name}'")
-                category_name = category_name.strip()
+    Models missing from the model table are classified first (batched Gemini
+    prompts, see prefetch_categories) and then created once each, so the
+    hardware phase takes every model ID from the table without a lookup.
+    Without a model table (its listing failed) only the categories are
+    prefetched and models are looked up per device as before.
 
-            category_id = get_category_id(category_name, api_key)
-            model_data = {'name': model_name, 'category_id': category_id}
-            url = f"{base_url}/models"
-            headers = {'Authorization': f'Bearer {api_key}', 'Content-Type': 'application/json'}
-            model_response = retry_request("POST", url, headers=headers, json=model_data)
+    Args:
+        model_names (iterable): Model names of the devices about to be synced.
+        workers (int): Models created concurrently.
 
+    Returns:
+        list: Names of the models that could not be created.
+    """
+    if model_table is None:
+        prefetch_categories(model_names)
+        return []
+    missing = model_table.missing(model_names)
+    if not missing:
+        return []
+
+    tqdm.write(f"Resolving {len(missing)} new models before syncing hardware...")
+    prefetch_categories(missing)
+    failed = []
+
+    def on_done(model_name, model_id, error):
+        if error is not None:
+            logger.error(f"Unhandled error creating model '{model_name}': {error}", exc_info=error)
+        if error is not None or not model_id:
+            failed.append(model_name)
+
+    run_bounded(create_missing_model, missing, on_done, workers=workers, queue_size=len(missing))
+    if failed:
+        tqdm.write(f"Could not create {len(failed)} models; their devices will fail: {', '.join(failed)}")
+    return failed
+
+def resolve_models_in_chunks(devices, chunk_size, workers=1):
+    """
+    Lazily runs resolve_models over each chunk of a device stream.
 
-            try:
-                response_data = model_response.json()
-            except ValueError:
-                tqdm.write("Failed to decode JSON from model creation response.")
-                tqdm.write(f"Raw response: {model_response.text}")
-                return
-
-            if response_data.get("status") == "success":
-                model_payload = response_data.get('payload', {})
-                model_id = model_payload.get('id')
-                tqdm.write(f"Model created successfully: {model_payload.get('name')}")
-                assign_fieldset_to_model(model_id, fieldset_id=Config.SNIPE_IT_FIELDSET_ID, api_key=api_key)
-            else:
-                tqdm.write(f"Failed to create model: {response_data}")
-                return
+    Yields:
+        dict: The devices, unchanged and in order.
+    """
+    iterator = iter(devices)
+    while True:
+        chunk = list(itertools.islice(iterator, chunk_size))
+        if not chunk:
+            return
+        resolve_models((device.get('Model') for device in chunk), workers)
+        yield from chunk
+
+def create_model(model_name):
+    """
+    Creates a model in Snipe-IT with the configured fieldset, classifying its
+    category first.
 
-    # Construct the hardware payload
-    hardware = {
-        'asset_tag': asset_tag,
-        'model_id': model_id,
-        'status_id': status_id,
-        'serial': asset_tag,
-        Config.SNIPE_IT_FIELD_MAC_ADDRESS: macAddress,
-        Config.SNIPE_IT_FIELD_SYNC_DATE: createdDate,
-        Config.SNIPE_IT_FIELD_IP_ADDRESS: ipAddress,
-        Config.SNIPE_IT_FIELD_USER: userEmail
-    }
+    Args:
+        model_name (str): The model name to create.
 
-    url = f"{base_url}/hardware"
-    headers = {
-        'Authorization': f'Bearer {api_key}',
-        'Content-Type': 'application/json',
-        "accept": "application/json"
-    }
+    Returns:
+        int: The new model ID, or None if creation failed.
+    """
+    category_name = resolve_category(model_name)
+    if not category_name:
+        tqdm.write(f"Cannot create model '{model_name}': no category rule matches and Gemini is not configured")
+        return None
+    category_id = get_category_id(category_name, api_key)
+    model_response = get_client().post("/models", json=model_create_payload(model_name, category_id))
+    status_code, model_payload = write_result(model_response, f"creating model '{model_name}'")
+    if status_code != 200:
+        tqdm.write(f"Failed to create model '{model_name}': {model_payload}")
+        return None
 
+    model_payload = model_payload or {}
+    model_id = model_payload.get('id')
+    tqdm.write(f"Model created successfully: {model_payload.get('name')}")
+    # Drop any stale entry and remember the new model for later devices
+    lookup_cache.invalidate('models', model_name)
+    lookup_cache.set('models', model_name, model_id)
+    if needs_fieldset(model_payload):
+        # The fieldset is normally set by the create request itself
+        assign_fieldset_to_model(model_id, fieldset_id=Config.SNIPE_IT_FIELDSET_ID, api_key=api_key)
+    return model_id
+
+def get_or_create_model_id(model_name):
+    """
+    Returns the Snipe-IT model ID for a model name, creating the model if needed.
 
-    # Retry logic
-    max_attempts = 4
-    for attempt in range(1, max_attempts + 1):
-        response = retry_request("POST", url, headers=headers, json=hardware)
+    During a sync every model was already resolved into the model table by
+    resolve_models, and the ID comes from there (None if creating it failed).
+    Otherwise (e.g. applying a plan) the model is looked up and created here.
+    Concurrent callers for the same model share one lookup/creation, so worker
+    threads never create the same model twice. When sharded, creation also
+    holds the cross-process model creation lock and re-checks Snipe-IT first,
+    so other shards never create it twice either.
 
+    Args:
+        model_name (str): The model name, or None to use the default model.
 
-        if response.status_code != 429:
-            break
+    Returns:
+        int: The model ID, or None if it could not be created.
+    """
+    if model_name is None:
+        return default_model_id
+    if model_table is not None:
+        # Resolved up front by resolve_models, so no per-device lookup
+        return model_table.get(model_name)
 
-        tqdm.write(f"Rate limited (429). Attempt {attempt} of {max_attempts}. Waiting 10 seconds...")
-        time.sleep(10)
+    def create():
+        tqdm.write(f"Model '{model_name}' not found. Creating new model...")
+        return create_model(model_name)
+
+    def resolve():
+        model_id = get_model_id(model_name, api_key)
+        if model_id:
+            return model_id
+        if model_creation_lock is None:
+            return create()
+        with model_creation_lock:
+            # Another shard may have created the model while we waited for the lock
+            model_id = get_model_id.uncached(model_name, api_key)
+            if model_id:
+                lookup_cache.set('models', model_name, model_id)
+                return model_id
+            return create()
+
+    return model_flight.do(normalize_model_name(model_name), resolve)
+
+def create_hardware(asset_tag, status_name, model_name, macAddress, createdDate, userEmail=None, ipAddress=None, eol=None, existing=None, index=None):
+    """
+    Creates a hardware asset in Snipe-IT, or updates it if it already exists.
 
-    # Final result processing
-    try:
-        response_data = response.json()
-    except ValueError:
-        tqdm.write("Failed to parse JSON from Snipe-IT hardware response.")
-        tqdm.write(f"Raw response: {response.text}")
-        return response.status_code, response.text
+    Args:
+        existing (dict, optional): Hardware row already known to exist (from the
+            preloaded HardwareIndex). The asset is updated directly instead of
+            POSTing and falling back on a duplicate error.
+        index (HardwareIndex, optional): Index to record newly created assets in.
 
-    if response.status_code == 200 and response_data.get("status") == "success":
-        return 200, response_data
-
-    elif response_data.get("status") == "error":
-        messages = response_data.get("messages", {})
-        if "asset_tag" in messages or "serial" in messages:
-            tqdm.write(f"Duplicate asset found for {asset_tag}. Updating instead.")
-            update_hardware(
-                asset_tag=asset_tag,
-                model_id=model_id,
-                status_id=status_id,
-                macAddress=macAddress,
-                createdDate=createdDate,
-                ipAddress=ipAddress,
-                last_User=userEmail,
-                eol=eol
-            )
-            return 200, "Updated existing asset."
-        else:
-            tqdm.write(f"Error creating hardware: {response_data}")
-            return 400, response_data
+    With SNIPE_IT_CHECKOUT_TO_USER set, active assets are then checked out to
+    the Snipe-IT user matching `userEmail` (see sync_assignment).
 
-    else:
-        tqdm.write(f"Unexpected response: {response.status_code} - {response.text}")
-        return response.status_code, response.text
+    Returns:
+        tuple: (200, outcome) where outcome is CREATED, UPDATED or UNCHANGED,
+            or (status_code, error) on failure.
+    """
+    status_id = fixed_status_id(status_name)
+    if status_id is None:
+        try:
+            status_id = get_status_id(status_name, api_key)
+        except Exception as e:
+            tqdm.write(f"Status lookup failed: {e}")
+            logger.error(f"Status lookup error for status_name '{status_name}': {e}")
+            status_id = Config.SNIPE_IT_DEFAULT_STATUS_ID
+
+    model_id = get_or_create_model_id(model_name)
+    if not model_id:
+        return 500, f"Could not resolve or create model '{model_name}'"
+    macAddress = format_mac(macAddress)
+    user_email = assignee(status_name, userEmail)
+
+    def update(matched_device):
+        return with_assignment(update_hardware(
+            asset_tag=asset_tag,
+            model_id=model_id,
+            status_id=status_id,
+            macAddress=macAddress,
+            createdDate=createdDate,
+            ipAddress=ipAddress,
+            last_User=userEmail,
+            eol=eol,
+            matched_device=matched_device
+        ), matched_device, user_email)
+
+    if existing is not None:
+        return update(existing)
 
+    # Construct the hardware payload
+    hardware = build_create_payload(asset_tag, model_id, status_id, macAddress, createdDate,
+                                    ipAddress, userEmail, eol)
+    kind, result = create_result(get_client().post("/hardware", json=hardware), asset_tag)
+
+    if kind == CREATED:
+        if index is not None:
+            index.add(result or hardware)
+        return with_assignment((200, CREATED), result, user_email)
+    if kind == DUPLICATE:
+        tqdm.write(f"Duplicate asset found for {asset_tag}. Updating instead.")
+        status_code, existing = find_hardware(asset_tag)
+        if status_code != 200:
+            return status_code, existing
+        return update(existing)
+
+    tqdm.write(f"Error creating hardware {asset_tag}: {result[0]} - {result[1]}")
+    return result
+
+@lookup_cache.memoize('models')
 def get_model_id(name: str, api_key: str, base_url: str = base_url):
   """
   Retrieves the ID of a model in Snipe-IT using the provided name and API key.
@@ -330,32 +637,18 @@ def get_model_id(name: str, api_key: str, base_url: str = base_url):
       int: The ID of the model if found, otherwise None.
   """
 
-  import requests
-  import json
-  from tqdm import tqdm
-
-  url = f"{base_url}/models?search={name}"
-
-  headers = {
-    'Authorization': f'Bearer {api_key}',
-    'Content-Type': 'application/json'
-  }
-
   try:
-    response = retry_request("GET", url, headers=headers)
+    response = get_client(api_key, base_url).get("/models", params={'search': name})
 
+    if response is None:
+      return None
     if response.status_code == 200:
       data = json.loads(response.content)
-      if data['rows']:
-        # Try to match exact name (case-insensitive)
-        for model in data['rows']:
-          if model['name'].strip().lower() == name.strip().lower():
-            return model['id']
-        tqdm.write(f"No exact model match found for: {name}. Returning closest match.")
-        return data['rows'][0]['id']  # Fallback if exact match not found
-      else:
+      # Exact name only; a similar model (e.g. a different revision) must not be picked
+      model_id = exact_model_id(data['rows'], name)
+      if model_id is None:
         tqdm.write(f"No model found with name: {name}")
-        return None
+      return model_id
     else:
       tqdm.write(f"API request failed with status code: {response.status_code}")
       tqdm.write(f"Response text: {response.text}")
@@ -365,6 +658,7 @@ def get_model_id(name: str, api_key: str, base_url: str = base_url):
     tqdm.write(f"An error occurred while making the API request: {e}")
     return None
 
+@lookup_cache.memoize('statuslabels')
 def get_status_id(name: str, api_key: str, base_url: str = base_url):
     """
     Retrieves the ID of a status in Snipe-IT using the provided name and API key.
@@ -378,23 +672,16 @@ def get_status_id(name: str, api_key: str, base_url: str = base_url):
         int: The ID of the status if found, otherwise None.
     """
 
-    # Construct the API endpoint URL
-    url = f"{base_url}/statuslabels"
-
-    # Set headers with the API key
-    headers = {'Authorization': f'Bearer {api_key}',
-               'Content-Type': 'application/json'
-               }
-
     # Prepare the query parameters
     params = {'name': name}
 
     try:
         # Send a GET request to the API endpoint
-        response = retry_request("GET", url, headers=headers, params=params)
-
+        response = get_client(api_key, base_url).get("/statuslabels", params=params)
 
         # Check for successful response (200 OK)
+        if response is None:
+            return None
         if response.status_code == 200:
             data = json.loads(response.content)
             # Extract the ID from the first matching status (assuming unique names)
@@ -411,6 +698,7 @@ def get_status_id(name: str, api_key: str, base_url: str = base_url):
     except requests.exceptions.RequestException as e:
         tqdm.write(f"An error occurred while making the API request: {e}")
         return None
+@lookup_cache.memoize('users')
 def get_user_id(email: str, api_key: str, base_url: str = base_url):
   """
   Retrieves the ID of a user in Snipe-IT using the provided email and API key.
@@ -425,14 +713,11 @@ def get_user_id(email: str, api_key: str, base_url: str = base_url):
       int: The ID of the user if found, otherwise None.
   """
   try:
-    url = f"{base_url}/users"
-    headers = {'Authorization': f'Bearer {api_key}',
-               'Content-Type': 'application/json'
-               }
     params = {'email': email} 
-    response = retry_request("GET", url, headers=headers, params=params)
-
+    response = get_client(api_key, base_url).get("/users", params=params)
 
+    if response is None:
+      return None
     if response.status_code == 200:
       data = response.json()
       if data['rows']:
@@ -449,10 +734,70 @@ def get_user_id(email: str, api_key: str, base_url: str = base_url):
     tqdm.write(f"An error occurred while making the API request: {e}")
     return None
 
-def check_out_device(user):
-    pass
-def check_in_device():
-    pass
+def _asset_action(path, payload, api_key=api_key, base_url=base_url):
+    """POSTs a hardware checkout/checkin. Returns (200, None) on success or (status_code, error)."""
+    status_code, result = write_result(get_client(api_key, base_url).post(path, json=payload), f"for {path}")
+    return (200, None) if status_code == 200 else (status_code, result)
+
+def check_out_device(hardware_id, user_id, api_key=api_key, base_url=base_url):
+    """
+    Checks an asset out to a Snipe-IT user.
+
+    Returns:
+        tuple: (200, None) on success, or (status_code, error).
+    """
+    return _asset_action(*checkout_request(hardware_id, user_id), api_key, base_url)
+
+def check_in_device(hardware_id, api_key=api_key, base_url=base_url):
+    """
+    Checks an asset back in.
+
+    Returns:
+        tuple: (200, None) on success, or (status_code, error).
+    """
+    return _asset_action(*checkin_request(hardware_id), api_key, base_url)
+
+def sync_assignment(row, user_email):
+    """
+    Checks an asset out to the Snipe-IT user matching its Google user, if that changed.
+
+    Users are matched through the preloaded user index, and checkout/checkin
+    calls are only made when the asset is unassigned or assigned to a
+    different user (see sync_decisions.assignment_requests). Unknown users
+    and assets assigned to locations or other assets are left alone.
+
+    Args:
+        row (dict): The asset's hardware row; its `assigned_to` is updated on success.
+        user_email (str): The device's most recent Google user, or None.
+
+    Returns:
+        tuple: (200, True) if the asset was checked out, (200, False) if
+            nothing changed, or (status_code, error) on failure.
+    """
+    if user_index is None:
+        return 200, False
+    user_id = user_index.get(user_email)
+    steps = assignment_requests(row, user_id)
+    for path, payload in steps:
+        status_code, error = _asset_action(path, payload)
+        if status_code != 200:
+            tqdm.write(f"Failed to assign {row.get('asset_tag')} to {user_email} ({path}): {error}")
+            return status_code, error
+    if steps:
+        mark_checked_out(row, user_id)
+    return 200, bool(steps)
+
+def with_assignment(outcome, row, user_email):
+    """
+    Follows a successful hardware write with sync_assignment.
+
+    Returns:
+        tuple: The (status_code, result) of the device; see sync_decisions.merge_assignment.
+    """
+    if outcome[0] != 200:
+        return outcome
+    return merge_assignment(outcome, sync_assignment(row, user_email))
+@lookup_cache.memoize('categories')
 def get_category_id(name: str, api_key: str, base_url: str = base_url):
     """
     Retrieves the ID of a category in Snipe-IT using the provided name and API key.
@@ -467,13 +812,11 @@ def get_category_id(name: str, api_key: str, base_url: str = base_url):
         int: The ID of the category if found, otherwise None.
     """
     try:
-        url = f"{base_url}/categories"
-        headers = {'Authorization': f'Bearer {api_key}',
-               'Content-Type': 'application/json'
-               }
         params = {'name': name} 
-        response = retry_request("GET", url, headers=headers, params=params)
+        response = get_client(api_key, base_url).get("/categories", params=params)
 
+        if response is None:
+            return None
         if response.status_code == 200:
             data = response.json()
             if data['rows']:
@@ -490,30 +833,555 @@ def get_category_id(name: str, api_key: str, base_url: str = base_url):
         tqdm.write(f"An error occurred while making the API request: {e}")
         return None
 
-if __name__ == '__main__':
-    devicedata = googleAuth.fetch_and_print_chromeos_devices()
-    total_devices = len(devicedata)
-    tqdm.write(f"Found {total_devices} devices to process...\n")
+def process_device(device, hardware_index):
+    """
+    Syncs a single Google device record into Snipe-IT.
 
-    # Wrap loop with tqdm progress bar
-    for idx, device in enumerate(tqdm(devicedata, desc="Processing Devices", unit="device"), start=1):
-        try:
-            active_time = device.get('Active Time Ranges')[0].get('date')
-        except:
-            logging.error("Active Time Not Set")
-            active_time = None
+    Args:
+        device (dict): Device record from googleAuth.fetch_and_print_chromeos_devices.
+        hardware_index (HardwareIndex): Preloaded Snipe-IT hardware.
 
+    Returns:
+        tuple: (status_code, result) from create_hardware, or (200, SKIPPED)
+            for devices without a serial number.
+    """
+    active_time = device.get('Active Date')
+    if not active_time:
+        logging.error("Active Time Not Set")
+
+    serial = device.get('Serial Number')
+    if not serial:
+        logger.warning(f"Skipping device {device.get('Device ID')} without a serial number")
+        return 200, SKIPPED
+    status = device.get('Status')
+    model = device.get('Model')
+    mac = device.get('Mac Address')
+    user = device.get('Device User')
+    ip = device.get('Last Known IP Address')
+    eol = device.get('EOL')
+
+    existing = hardware_index.lookup(asset_tag=serial, serial=serial)
+    return create_hardware(serial, status, model, mac, active_time, user, ip, eol,
+                           existing=existing, index=hardware_index)
+
+def stream_google_devices(since, sync_state, errors=None):
+    """
+    Yields Google device records page by page.
 
-        serial = device.get('Serial Number')
-        status = device.get('Status')
-        model = device.get('Model')
-        mac = device.get('Mac Address')
-        user = device.get('Device User')
-        ip = device.get('Last Known IP Address')
-        eol = device.get('EOL')
+    A listing error ends the stream early and marks the run as failed, so the
+    incremental watermark is not advanced past devices that were never seen.
 
-        status_code, result = create_hardware(serial, status, model, mac, active_time, user, ip, eol)
+    Args:
+        since (datetime, optional): Incremental watermark.
+        sync_state (SyncState): State to mark as failed on a listing error.
+        errors (list, optional): Listing errors are appended here.
+    """
+    try:
+        yield from googleAuth.iter_chromeos_devices(since=since)
+    except Exception as error:
+        msg = f"An error occurred while interacting with the Google API: {error}"
+        tqdm.write(msg)
+        logger.error(msg)
+        sync_state.record_failure()
+        if errors is not None:
+            errors.append(error)
+
+def skip_unchanged_devices(devices, sync_state, skipped):
+    """
+    Lazily filters out devices whose Directory API etag matches the last sync.
 
-        # Optional: log errors if needed
-        if status_code != 200:
-            tqdm.write(f"\n[!] Error on {serial}: {result}")
\ No newline at end of file
+    Args:
+        devices (iterable): Device records.
+        sync_state (SyncState): Loaded incremental sync state.
+        skipped (list): One-element counter incremented for every skipped device.
+
+    Yields:
+        dict: Devices that changed since they were last synced.
+    """
+    for device in devices:
+        if sync_state.is_unchanged(device.get('Device ID'), device.get('ETag')):
+            sync_state.record_skip(device.get('Last Sync Time'))
+            skipped[0] += 1
+        else:
+            yield device
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Sync Google ChromeOS devices into Snipe-IT.")
+    parser.add_argument("--category-cache", choices=["dump", "prune", "seed"],
+                        help="Maintain the Gemini category cache and exit instead of syncing.")
+    parser.add_argument("--seed-file",
+                        help="JSON file used by --category-cache seed (list of {model, category} or a mapping).")
+    parser.add_argument("--max-age-days", type=float,
+                        help="With --category-cache prune, also drop entries older than this many days.")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only sync devices changed since the last successful run (lastSync watermark and etags).")
+    parser.add_argument("--stream", action="store_true",
+                        help="Stream devices into Snipe-IT page by page while Google paging continues.")
+    parser.add_argument("--workers", type=int,
+                        help="Number of devices to sync concurrently (default: SYNC_WORKERS).")
+    parser.add_argument("--resume", action="store_true",
+                        help="Resume the last interrupted run from the sync journal, replaying only unfinished devices.")
+    parser.add_argument("--engine", choices=["threads", "async"],
+                        help="Sync engine: worker threads or asyncio with aiohttp (default: SYNC_ENGINE).")
+    parser.add_argument("--shard",
+                        help="Only sync shard i of N (zero-based, e.g. 0/4); each shard keeps its own state files.")
+    parser.add_argument("--shard-by", choices=sorted(sharding.SHARD_KEYS),
+                        help="Shard key: device serial number or Google org unit (default: SYNC_SHARD_BY).")
+    parser.add_argument("--processes", type=int,
+                        help="Run N shards as local processes and merge their run summaries.")
+    parser.add_argument("--merge-shards", type=int, metavar="N",
+                        help="Merge the run summaries of N shards (e.g. from several hosts) and exit.")
+    parser.add_argument("--snapshot", choices=["google", "snipeit", "all"],
+                        help="Dump the Google devices and/or Snipe-IT hardware, models and status labels "
+                             "to GOOGLE_SNAPSHOT_FILE / SNIPEIT_SNAPSHOT_FILE and exit.")
+    parser.add_argument("--plan", action="store_true",
+                        help="Compute the sync plan from the snapshots, offline, write it to the plan file and exit.")
+    parser.add_argument("--apply", action="store_true",
+                        help="Execute the plan file against Snipe-IT and exit.")
+    parser.add_argument("--plan-file",
+                        help="Plan file written by --plan and dry runs and read by --apply (default: PLAN_FILE).")
+    parser.add_argument("--inventory-diff", action="store_true",
+                        help="Only sync devices added or changed since the last run's inventory snapshot.")
+    return parser.parse_args(argv)
+
+def run_category_cache_command(args):
+    """Runs a --category-cache maintenance action against the local cache."""
+    if args.category_cache == "dump":
+        print(json.dumps(category_cache.dump(), indent=2))
+    elif args.category_cache == "prune":
+        max_age = args.max_age_days * 86400 if args.max_age_days is not None else None
+        removed = category_cache.prune(categories=Config.GEMINI_CATEGORIES, max_age_seconds=max_age)
+        print(f"Pruned {removed} category cache entries.")
+    elif args.category_cache == "seed":
+        if not args.seed_file:
+            print("--seed-file is required with --category-cache seed")
+            exit(2)
+        stored = category_cache.seed(args.seed_file, Config.GEMINI_CATEGORIES)
+        print(f"Seeded {stored} category cache entries.")
+
+def fetch_snipeit_snapshot():
+    """
+    Reads the hardware, models and status labels a plan needs from Snipe-IT.
+
+    Returns:
+        dict: Snapshot from sync_plan.make_snipeit_snapshot, or None if a listing failed.
+    """
+    errors = []
+    hardware = list(iter_hardware_rows(errors=errors))
+    models = list(iter_rows("/models", errors=errors))
+    statuslabels = list(iter_rows("/statuslabels", errors=errors))
+    if errors:
+        return None
+    return sync_plan.make_snipeit_snapshot(hardware, models, statuslabels)
+
+def classify_offline(model_name):
+    """Category of a model from the local rules or the category cache only, never Gemini."""
+    return category_rules.match(model_name) or category_cache.get(model_name, Config.GEMINI_CATEGORIES)
+
+def write_plan(devices, snapshot, path):
+    """Builds the plan for `devices` against a Snipe-IT snapshot and writes it to `path`."""
+    started = time.monotonic()
+    plan = sync_plan.build_plan(devices, snapshot, classify=classify_offline)
+    sync_plan.write_plan(path, plan)
+    tqdm.write(sync_plan.format_plan_summary(plan))
+    tqdm.write(f"Planned {len(plan['actions'])} changes in {time.monotonic() - started:.1f}s; wrote {path}")
+    return plan
+
+def apply_action(action, model_ids):
+    """
+    Sends one planned create or update to Snipe-IT.
+
+    Returns:
+        tuple: (200, CREATED or UPDATED), or (status_code, error) on failure.
+    """
+    payload = dict(action['payload'])
+    if 'model' in action:
+        model_id = model_ids.get(action['model'])
+        if not model_id:
+            return 500, f"Could not resolve or create model '{action['model']}'"
+        payload['model_id'] = model_id
+
+    if action['action'] == sync_plan.CREATE:
+        response = get_client().post("/hardware", json=payload)
+    else:
+        response = get_client().patch(f"/hardware/{action['id']}", json=payload)
+    if response is None:
+        return 503, f"No response from Snipe-IT for {action['asset_tag']}"
+    try:
+        response_data = response.json()
+    except ValueError:
+        return response.status_code, response.text
+    if response.status_code == 200 and response_data.get("status") == "success":
+        return 200, CREATED if action['action'] == sync_plan.CREATE else UPDATED
+    return response.status_code, response_data.get("messages") or response.text
+
+def apply_plan(plan, workers):
+    """
+    Executes a plan: creates its new models, then sends every create and update.
+
+    Categories recorded in the plan are used for the new models; models
+    planned without one are classified as in a live run. As in a live run,
+    the Snipe-IT models are loaded once into the model table, the plan's
+    models are matched by exact name and only the missing ones are created
+    (see resolve_models), so an asset is never attached to a similar model.
+
+    Returns:
+        SyncStats: Outcome counts of the applied actions.
+    """
+    global model_table
+
+    names = [model['name'] for model in plan['models']]
+    for model in plan['models']:
+        category = match_category(model.get('category'), Config.GEMINI_CATEGORIES)
+        if category:
+            category_cache.put(model['name'], Config.GEMINI_CATEGORIES, category)
+    if names:
+        model_table = load_model_table()
+        if model_table is None:
+            tqdm.write("Could not load the Snipe-IT models; looking up the plan's models one by one.")
+            model_table = ModelTable()
+            for name in names:
+                model_table.add(name, find_model_id(name))
+        resolve_models(names, workers)
+    model_ids = {name: model_table.get(name) for name in names}
+
+    stats = SyncStats()
+    with tqdm(total=len(plan['actions']), desc="Applying plan", unit="asset") as progress:
+        def on_done(action, outcome, error):
+            if error is not None:
+                logger.error(f"Unhandled error applying {action['asset_tag']}: {error}", exc_info=error)
+                tqdm.write(f"\n[!] Error on {action['asset_tag']}: {error}")
+                stats.record(FAILED)
+            elif outcome[0] != 200:
+                tqdm.write(f"\n[!] Error on {action['asset_tag']}: {outcome[1]}")
+                stats.record(FAILED)
+            else:
+                stats.record(outcome[1])
+            progress.update(1)
+
+        run_bounded(lambda action: apply_action(action, model_ids), plan['actions'], on_done,
+                    workers=workers, queue_size=Config.SYNC_QUEUE_SIZE)
+    stats.record(UNCHANGED, plan['summary'][UNCHANGED])
+    stats.record(SKIPPED, plan['summary'][SKIPPED])
+    return stats
+
+def run_plan_command(args, shard=None, shard_by=None):
+    """Runs --snapshot, --plan or --apply. Returns the process exit code."""
+    plan_file = args.plan_file or Config.PLAN_FILE
+    if args.snapshot:
+        if args.snapshot in ("google", "all"):
+            devices = googleAuth.iter_chromeos_devices()
+            if shard:
+                devices = sharding.filter_shard(devices, shard, shard_by)
+            try:
+                count = sync_plan.dump_devices(Config.GOOGLE_SNAPSHOT_FILE, devices)
+            except Exception as error:
+                tqdm.write(f"An error occurred while interacting with the Google API: {error}")
+                return 1
+            tqdm.write(f"Wrote {count} Google devices to {Config.GOOGLE_SNAPSHOT_FILE}")
+        if args.snapshot in ("snipeit", "all"):
+            snapshot = fetch_snipeit_snapshot()
+            if snapshot is None:
+                return 1
+            sync_plan.dump_snipeit_snapshot(Config.SNIPEIT_SNAPSHOT_FILE, snapshot)
+            tqdm.write(f"Wrote {len(snapshot['hardware'])} hardware assets, {len(snapshot['models'])} models "
+                       f"and {len(snapshot['statuslabels'])} status labels to {Config.SNIPEIT_SNAPSHOT_FILE}")
+        get_client().close()
+        return 0
+
+    if args.plan:
+        write_plan(sync_plan.load_devices(Config.GOOGLE_SNAPSHOT_FILE),
+                   sync_plan.load_snipeit_snapshot(Config.SNIPEIT_SNAPSHOT_FILE), plan_file)
+        return 0
+
+    try:
+        plan = sync_plan.load_plan(plan_file)
+    except (OSError, ValueError) as e:
+        print(f"Cannot read plan file: {e}")
+        return 2
+    tqdm.write(sync_plan.format_plan_summary(plan))
+    lookup_cache.load()
+    stats = apply_plan(plan, args.workers or Config.SYNC_WORKERS)
+    lookup_cache.save()
+    get_client().close()
+    tqdm.write(stats.summary())
+    return 1 if stats.counts[FAILED] else 0
+
+def print_merged_summary(count):
+    """Merges the per-shard run summaries, writes the combined one and prints it."""
+    summary = sharding.merge_summaries(Config.RUN_SUMMARY_FILE, count)
+    sharding.write_summary(Config.RUN_SUMMARY_FILE, summary['counts'],
+                           summary['started_at'] or 0, summary['finished_at'] or 0,
+                           failed=summary['failed'])
+    print(json.dumps(summary, indent=2))
+    return summary
+
+if __name__ == '__main__':
+    args = parse_args()
+    if args.category_cache:
+        run_category_cache_command(args)
+        exit(0)
+
+    if args.merge_shards:
+        summary = print_merged_summary(args.merge_shards)
+        exit(1 if summary['failed'] else 0)
+
+    if args.processes:
+        if args.shard:
+            print("--processes starts its own shards; do not combine it with --shard")
+            exit(2)
+        exit_code = sharding.spawn_shards(__file__, sharding.strip_option(sys.argv[1:], '--processes'),
+                                          args.processes, api_tokens=Config.SNIPE_IT_SHARD_API_TOKENS)
+        summary = print_merged_summary(args.processes)
+        # Shards exit 0 even when their listing or devices failed; the merged summary records it
+        exit(exit_code or (1 if summary['failed'] else 0))
+
+    shard = None
+    if args.shard:
+        try:
+            shard = sharding.parse_shard(args.shard)
+        except ValueError as e:
+            print(f"Configuration Error: {e}")
+            exit(2)
+        shard_by = args.shard_by or Config.SYNC_SHARD_BY
+        if shard_by not in sharding.SHARD_KEYS:
+            print(f"Configuration Error: SYNC_SHARD_BY must be one of {sorted(sharding.SHARD_KEYS)}")
+            exit(2)
+        # Per-shard state, so shards never overwrite each other's files
+        Config.SYNC_STATE_FILE = sharding.shard_path(Config.SYNC_STATE_FILE, shard)
+        Config.SYNC_JOURNAL_FILE = sharding.shard_path(Config.SYNC_JOURNAL_FILE, shard)
+        Config.METRICS_TEXTFILE = sharding.shard_path(Config.METRICS_TEXTFILE, shard)
+        Config.RUN_SUMMARY_FILE = sharding.shard_path(Config.RUN_SUMMARY_FILE, shard)
+        metrics.REGISTRY.const_labels = {'shard': sharding.format_shard(shard)}
+        model_creation_lock = sharding.ProcessLock(Config.MODEL_CREATION_LOCK_FILE)
+        if Config.SHARD_RATE_LIMIT_SPLIT:
+            # Shards sharing one API token share its rate limit too
+            rate_limiter.set_share(1.0 / (Config.SHARD_RATE_LIMIT_SHARERS or shard[1]))
+        tqdm.write(f"Running shard {sharding.format_shard(shard)} by {shard_by}")
+        Config.GOOGLE_SNAPSHOT_FILE = sharding.shard_path(Config.GOOGLE_SNAPSHOT_FILE, shard)
+        Config.SNIPEIT_SNAPSHOT_FILE = sharding.shard_path(Config.SNIPEIT_SNAPSHOT_FILE, shard)
+        Config.PLAN_FILE = sharding.shard_path(Config.PLAN_FILE, shard)
+        Config.INVENTORY_SNAPSHOT_FILE = sharding.shard_path(Config.INVENTORY_SNAPSHOT_FILE, shard)
+
+    if args.snapshot or args.plan or args.apply:
+        exit(run_plan_command(args, shard, shard_by if shard else None))
+
+    if Config.DRY_RUN:
+        # Read both sides, plan in memory and write nothing to Snipe-IT
+        tqdm.write("DRY_RUN is set: computing a plan instead of syncing.")
+        snapshot = fetch_snipeit_snapshot()
+        if snapshot is None:
+            exit(1)
+        devices = googleAuth.iter_chromeos_devices()
+        if shard:
+            devices = sharding.filter_shard(devices, shard, shard_by)
+        try:
+            write_plan(devices, snapshot, args.plan_file or Config.PLAN_FILE)
+        except Exception as error:
+            tqdm.write(f"An error occurred while interacting with the Google API: {error}")
+            exit(1)
+        get_client().close()
+        exit(0)
+
+    run_started = time.time()
+    if Config.METRICS_PORT:
+        metrics.REGISTRY.serve(Config.METRICS_PORT, Config.METRICS_ADDR)
+        tqdm.write(f"Serving metrics on {Config.METRICS_ADDR}:{Config.METRICS_PORT}/metrics")
+
+    engine = args.engine or Config.SYNC_ENGINE
+    if engine == "async":
+        try:
+            require_aiohttp()
+        except RuntimeError as e:
+            print(f"Configuration Error: {e}")
+            exit(1)
+
+    inventory_diff = args.inventory_diff or Config.INVENTORY_DIFF
+    if inventory_diff:
+        try:
+            require_pandas()
+        except RuntimeError as e:
+            print(f"Configuration Error: {e}")
+            exit(1)
+
+    sync_state = SyncState(Config.SYNC_STATE_FILE).load()
+    incremental = args.incremental or Config.INCREMENTAL_SYNC
+    since = sync_state.watermark_time if incremental else None
+    if inventory_diff and since is not None:
+        # The diff needs every device listed, or unlisted ones would look removed
+        tqdm.write("Inventory diff is on: listing every device instead of only those since the watermark.")
+        since = None
+    if incremental:
+        tqdm.write(f"Incremental sync since {sync_state.watermark or 'the beginning (no watermark yet)'}")
+
+    lookup_cache.load()
+
+    # Preload existing hardware so create-vs-update is decided locally
+    hardware_index = load_hardware_index()
+    # Preload models so each distinct model is resolved once, before any hardware is written
+    model_table = load_model_table()
+    if model_table is None:
+        tqdm.write("Could not load the Snipe-IT models; falling back to per-device model lookups.")
+    if Config.SNIPE_IT_CHECKOUT_TO_USER:
+        user_index = load_user_index()
+        if user_index is None:
+            tqdm.write("Could not load the Snipe-IT users; assets are not checked out this run.")
+
+    # Outbox journal: every device is planned before its write and marked when done
+    journal = SyncJournal(Config.SYNC_JOURNAL_FILE)
+    resumed = args.resume and journal.resume_run()
+    if args.resume and not resumed:
+        tqdm.write("No interrupted run to resume; starting a new run.")
+    if resumed:
+        tqdm.write(f"Resuming interrupted run: {journal.summary()}.")
+        # Keep the etags of devices synced before the interruption
+        for device in journal.done_devices():
+            sync_state.record_success(device.get('Device ID'), device.get('ETag'), device.get('Last Sync Time'))
+    else:
+        journal.start_run()
+
+    stream = args.stream or Config.STREAM_DEVICES
+    listing_errors = []
+    skipped = [0]
+    already_done = [0]
+    inventory = None
+    if resumed and journal.listing_complete:
+        # Every device was listed before the interruption; replay from the journal only
+        stream = False
+        devicedata = journal.unfinished_devices()
+    else:
+        if stream and engine == "async":
+            # The async engine pulls Google pages in its own executor
+            devicedata = stream_google_devices(since, sync_state, listing_errors)
+        elif stream:
+            # Google paging runs on a producer thread and overlaps with Snipe-IT writes
+            devicedata = stream_through_queue(
+                stream_google_devices(since, sync_state, listing_errors),
+                maxsize=Config.STREAM_QUEUE_SIZE
+            )
+        else:
+            devicedata = stream_google_devices(since, sync_state, listing_errors)
+
+        if shard:
+            devicedata = sharding.filter_shard(devicedata, shard, shard_by)
+        if inventory_diff:
+            # The diff compares whole listings, so the listing is collected before syncing starts
+            stream = False
+            inventory = InventorySnapshot(Config.INVENTORY_SNAPSHOT_FILE, Config.INVENTORY_DIFF_IGNORE)
+            listed = list(devicedata)
+            devicedata = inventory.changed_devices(listed)
+            skipped[0] += len(listed) - len(devicedata)
+            tqdm.write(inventory.summary())
+        if incremental:
+            devicedata = skip_unchanged_devices(devicedata, sync_state, skipped)
+        devicedata = journal.track(devicedata, already_done, listing_ok=lambda: not listing_errors)
+
+    workers = args.workers or Config.SYNC_WORKERS
+    if stream:
+        total_devices = None
+        tqdm.write("Streaming devices from Google...\n")
+        devicedata = resolve_models_in_chunks(devicedata, Config.GOOGLE_CHROMEOS_PAGE_SIZE, workers)
+    else:
+        devicedata = list(devicedata)
+        total_devices = len(devicedata)
+        tqdm.write(f"Found {total_devices} devices to process...\n")
+        resolve_models((device.get('Model') for device in devicedata), workers)
+
+    if engine == "async":
+        tqdm.write(f"Processing with the async engine ({Config.ASYNC_MAX_IN_FLIGHT} requests in flight)...")
+    elif workers > 1:
+        tqdm.write(f"Processing with {workers} worker threads...")
+
+    stats = SyncStats()
+
+    def record_outcome(outcome, count=1):
+        stats.record(outcome, count)
+        metrics.DEVICES.labels(outcome).inc(count)
+
+    with tqdm(total=total_devices, desc="Processing Devices", unit="device") as progress:
+        def on_done(device, outcome, error):
+            serial = device.get('Serial Number')
+            if error is not None:
+                logger.error(f"Unhandled error processing {serial}: {error}", exc_info=error)
+                tqdm.write(f"\n[!] Error on {serial}: {error}")
+                sync_state.record_failure()
+                record_outcome(FAILED)
+                journal.mark(device, False, error)
+                if inventory is not None:
+                    inventory.record_failure(device)
+            else:
+                status_code, result = outcome
+                # Optional: log errors if needed
+                if status_code != 200:
+                    tqdm.write(f"\n[!] Error on {serial}: {result}")
+                    sync_state.record_failure()
+                    record_outcome(FAILED)
+                    journal.mark(device, False, result)
+                    if inventory is not None:
+                        inventory.record_failure(device)
+                else:
+                    sync_state.record_success(device.get('Device ID'), device.get('ETag'),
+                                              device.get('Last Sync Time'))
+                    record_outcome(result if result in OUTCOMES else UPDATED)
+                    journal.mark(device, True, result)
+            progress.update(1)
+
+        if engine == "async":
+            async_client = AsyncSnipeITClient(
+                base_url,
+                api_key,
+                rate_limiter,
+                max_in_flight=Config.ASYNC_MAX_IN_FLIGHT,
+                timeout=(Config.SNIPE_IT_CONNECT_TIMEOUT, Config.SNIPE_IT_READ_TIMEOUT),
+                max_retries=Config.MAX_RETRIES,
+                retry_delay=Config.RETRY_DELAY_SECONDS,
+                backoff_factor=Config.RETRY_BACKOFF_FACTOR,
+                max_delay=Config.RETRY_MAX_DELAY_SECONDS
+            )
+            sync_engine = AsyncSyncEngine(async_client, hardware_index, lookup_cache, resolve_category,
+                                          max_in_flight=Config.ASYNC_MAX_IN_FLIGHT,
+                                          creation_lock=model_creation_lock, model_table=model_table,
+                                          user_index=user_index)
+            asyncio.run(sync_engine.run(devicedata, on_done, chunk_size=Config.GOOGLE_CHROMEOS_PAGE_SIZE))
+        else:
+            run_bounded(
+                lambda device: process_device(device, hardware_index),
+                devicedata,
+                on_done,
+                workers=workers,
+                queue_size=Config.SYNC_QUEUE_SIZE
+            )
+
+    if incremental or inventory_diff:
+        tqdm.write(f"Skipped {skipped[0]} unchanged devices.")
+    if already_done[0]:
+        tqdm.write(f"Skipped {already_done[0]} devices already synced before the interruption.")
+    record_outcome(SKIPPED, skipped[0])
+    tqdm.write(stats.summary())
+    if sync_state.finish_run():
+        tqdm.write(f"Sync watermark advanced to {sync_state.watermark}")
+    sync_state.save()
+
+    if stats.counts[FAILED] or listing_errors:
+        tqdm.write("Some devices were not synced; run with --resume to retry only those.")
+    else:
+        journal.finish_run()
+    journal.close()
+    if inventory is not None and not listing_errors:
+        tqdm.write(f"Inventory snapshot written to {inventory.save()}")
+
+    lookup_cache.save()
+    tqdm.write(lookup_cache.format_stats())
+    tqdm.write(category_rules.format_stats())
+    logger.info(category_rules.format_stats())
+    get_client().close()
+
+    run_finished = time.time()
+    metrics.RUN_DURATION_SECONDS.set(run_finished - run_started)
+    metrics.RUN_LAST_TIMESTAMP.set(run_finished)
+    if not stats.counts[FAILED] and not listing_errors:
+        metrics.RUN_LAST_SUCCESS_TIMESTAMP.set(run_finished)
+    if Config.METRICS_TEXTFILE:
+        metrics.REGISTRY.write_textfile(Config.METRICS_TEXTFILE)
+    sharding.write_summary(Config.RUN_SUMMARY_FILE, stats.counts, run_started, run_finished,
+                           shard=shard, failed=bool(stats.counts[FAILED] or listing_errors))
@@ -0,0 +1,174 @@
+"""
+Snipe-IT API client with a pooled keep-alive HTTP session.
+
+Owns a `requests.Session` so every call reuses TCP/TLS connections to the
+Snipe-IT host, carries default auth headers, and applies per-request
+timeouts. All calls go through the shared rate limiter with retry on 429
+and connection errors.
+"""
+
+import logging
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from tqdm import tqdm
+
+import metrics
+from rate_limiter import backoff_delay, parse_retry_after
+
+logger = logging.getLogger(__name__)
+
+
+class SnipeITClient:
+    """Session-backed client for the Snipe-IT REST API."""
+
+    def __init__(self, base_url, api_key, rate_limiter, pool_size=10, timeout=(10, 60),
+                 max_retries=4, retry_delay=20, backoff_factor=1.0, max_delay=120):
+        """
+        Args:
+            base_url (str): Base URL of the Snipe-IT API (e.g. https://host/api/v1).
+            api_key (str): Snipe-IT API token.
+            rate_limiter (RateLimiter): Limiter shared by all clients in the process.
+            pool_size (int): Keep-alive connections kept open to the host.
+            timeout (tuple): (connect, read) timeout in seconds for each request.
+            max_retries (int): Attempts per request before giving up.
+            retry_delay (float): Base delay for backoff when no Retry-After is sent.
+            backoff_factor (float): Exponential growth of the backoff delay.
+            max_delay (float): Upper bound for a single backoff sleep.
+        """
+        self.base_url = base_url.rstrip('/')
+        self.api_key = api_key
+        self.rate_limiter = rate_limiter
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.backoff_factor = backoff_factor
+        self.max_delay = max_delay
+        self._session = None
+        self._session_lock = threading.Lock()
+
+    @property
+    def session(self):
+        """The underlying `requests.Session`, created on first use (once, even across threads)."""
+        if self._session is not None:
+            return self._session
+        with self._session_lock:
+            if self._session is None:
+                from requests.adapters import HTTPAdapter
+
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                session.headers.update({
+                    'Authorization': f'Bearer {self.api_key}',
+                    'Accept': 'application/json',
+                    'Accept-Encoding': 'gzip, deflate',
+                    'Connection': 'keep-alive',
+                })
+                self._session = session
+        return self._session
+
+    def url(self, path):
+        """Build a full URL from an API path; full URLs are returned unchanged."""
+        if path.startswith('http://') or path.startswith('https://'):
+            return path
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def endpoint(self, path):
+        """Metrics label for a path or full URL, e.g. '/hardware/{id}'."""
+        if path.startswith(self.base_url):
+            path = path[len(self.base_url):]
+        elif path.startswith('http://') or path.startswith('https://'):
+            path = urlsplit(path).path
+        return metrics.endpoint_label('/' + path.lstrip('/'))
+
+    def request(self, method, path, json=None, params=None, headers=None, retries=None, delay=None, timeout=None):
+        """
+        Send a request, retrying on 429 responses and connection errors.
+
+        Args:
+            method (str): HTTP method.
+            path (str): API path (e.g. '/hardware') or full URL.
+            json (dict, optional): JSON body.
+            params (dict, optional): Query parameters.
+            headers (dict, optional): Extra headers merged over the session defaults.
+            retries (int, optional): Attempts before giving up.
+            delay (float, optional): Base backoff in seconds.
+            timeout (tuple, optional): Overrides the client timeout.
+
+        Returns:
+            requests.Response: The response, or None if every attempt failed.
+        """
+        url = self.url(path)
+        endpoint = self.endpoint(path)
+        retries = retries or self.max_retries
+        delay = self.retry_delay if delay is None else delay
+
+        for attempt in range(1, retries + 1):
+            metrics.SNIPEIT_SLEEP_SECONDS.labels('rate_limit').inc(self.rate_limiter.acquire())
+            started = time.monotonic()
+            try:
+                response = self.session.request(method, url, json=json, params=params, headers=headers,
+                                                timeout=timeout or self.timeout)
+            except requests.RequestException as e:
+                metrics.SNIPEIT_REQUEST_SECONDS.labels(endpoint, method).observe(time.monotonic() - started)
+                metrics.SNIPEIT_REQUESTS.labels(endpoint, method, 'error').inc()
+                if attempt == retries:
+                    msg = f"Request error on {method} {url}: {e}. Attempt {attempt} of {retries}."
+                    tqdm.write(msg)
+                    logger.error(msg)
+                    break
+                metrics.SNIPEIT_RETRIES.labels(endpoint, method, 'error').inc()
+                wait = backoff_delay(attempt, delay, self.backoff_factor, self.max_delay)
+                metrics.SNIPEIT_SLEEP_SECONDS.labels('backoff').inc(wait)
+                msg = f"Request error on {method} {url}: {e}. Attempt {attempt} of {retries}. Retrying in {wait:.1f} seconds..."
+                tqdm.write(msg)
+                logger.error(msg)
+                time.sleep(wait)
+                continue
+
+            metrics.SNIPEIT_REQUEST_SECONDS.labels(endpoint, method).observe(time.monotonic() - started)
+            metrics.SNIPEIT_REQUESTS.labels(endpoint, method, response.status_code).inc()
+            self.rate_limiter.observe(response.headers)
+            if response.status_code == 429:
+                metrics.SNIPEIT_RATE_LIMITED.labels(endpoint, method).inc()
+                if attempt == retries:
+                    msg = f"Rate limited on {url}. Attempt {attempt} of {retries}."
+                    tqdm.write(msg)
+                    logger.warning(msg)
+                    break
+                metrics.SNIPEIT_RETRIES.labels(endpoint, method, 'rate_limited').inc()
+                wait = parse_retry_after(response.headers.get('Retry-After'))
+                if wait is None:
+                    wait = backoff_delay(attempt, delay, self.backoff_factor, self.max_delay)
+                msg = f"Rate limited on {url}. Attempt {attempt} of {retries}. Retrying in {wait:.1f} seconds..."
+                tqdm.write(msg)
+                logger.warning(msg)
+                self.rate_limiter.pause(wait)
+                continue
+            return response
+
+        msg = f"Max retries exceeded for {method} {url}"
+        tqdm.write(msg)
+        logger.error(msg)
+        return None
+
+    def get(self, path, params=None, **kwargs):
+        return self.request("GET", path, params=params, **kwargs)
+
+    def post(self, path, json=None, **kwargs):
+        return self.request("POST", path, json=json, **kwargs)
+
+    def patch(self, path, json=None, **kwargs):
+        return self.request("PATCH", path, json=json, **kwargs)
+
+    def close(self):
+        """Close pooled connections."""
+        with self._session_lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
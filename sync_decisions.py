@@ -0,0 +1,175 @@
+"""
+Sync decisions shared by the threaded and async engines.
+
+snipe-IT.py and async_engine.AsyncSyncEngine send their Snipe-IT requests
+differently (worker threads vs one asyncio event loop) but must decide the
+same things: which status and model a device gets, whether a create hit a
+duplicate, what a write's response means and how an asset's assignment is
+brought in line with its Google user. The functions here take what an engine
+already holds (device fields, hardware rows, responses) and return the
+decision without doing any I/O, so each engine only sends the requests.
+"""
+
+from config import Config
+from hardware_payloads import REASSIGN, assignment_change
+from model_table import ModelTable
+from sync_stats import CREATED, FAILED, UNCHANGED, UPDATED
+
+# create_result kind for a POST /hardware rejected as an existing asset
+DUPLICATE = 'duplicate'
+
+CHECKOUT_NOTE = "Most recent Google user (google2snipe sync)"
+CHECKIN_NOTE = "Reassigned to its most recent Google user (google2snipe sync)"
+
+
+def fixed_status_id(status_name):
+    """
+    Returns:
+        int: The status ID a device gets without a lookup (active devices use
+            SNIPE_IT_DEFAULT_STATUS_ID), or None if its status label must be looked up.
+    """
+    return Config.SNIPE_IT_DEFAULT_STATUS_ID if status_name == Config.SNIPE_IT_ACTIVE_STATUS else None
+
+
+def assignee(status_name, user_email):
+    """
+    The user an asset should be checked out to.
+
+    Only active devices are checked out; Snipe-IT refuses checkouts in
+    undeployable statuses.
+    """
+    return user_email if status_name == Config.SNIPE_IT_ACTIVE_STATUS else None
+
+
+def first_id(rows):
+    """ID of the first row of a listing (status labels and categories are looked up by exact name)."""
+    return rows[0]['id'] if rows else None
+
+
+def exact_model_id(rows, model_name):
+    """
+    Picks the model named `model_name` from GET /models rows.
+
+    Names match ignoring case and spacing (see ModelTable); there is no
+    closest-match fallback, so a device never gets a similar but different model.
+
+    Returns:
+        int: The model ID, or None.
+    """
+    return ModelTable(rows).get(model_name)
+
+
+def matching_row(rows, asset_tag):
+    """Returns the GET /hardware search row with exactly this asset tag, or None."""
+    return next((row for row in rows if row.get('asset_tag') == asset_tag), None)
+
+
+def model_create_payload(model_name, category_id):
+    """POST /models payload; the fieldset is set in the same request."""
+    return {'name': model_name, 'category_id': category_id, 'fieldset_id': Config.SNIPE_IT_FIELDSET_ID}
+
+
+def needs_fieldset(model_row):
+    """True if a created model did not get the configured fieldset and needs a PATCH."""
+    return model_row.get('fieldset_id') != Config.SNIPE_IT_FIELDSET_ID
+
+
+def write_result(response, action):
+    """
+    Interprets the response to a Snipe-IT write (POST/PATCH).
+
+    Args:
+        response: The response, or None if every attempt failed.
+        action (str): What was attempted, for the error (e.g. "updating SER123").
+
+    Returns:
+        tuple: (200, payload) on success, or (status_code, error).
+    """
+    if response is None:
+        return 503, f"No response from Snipe-IT {action}"
+    try:
+        data = response.json()
+    except ValueError:
+        return response.status_code, response.text
+    if response.status_code == 200 and data.get("status") == "success":
+        return 200, data.get('payload')
+    return (response.status_code if response.status_code != 200 else 400,
+            data.get("messages") or response.text)
+
+
+def create_result(response, asset_tag):
+    """
+    Interprets the response to POST /hardware.
+
+    Returns:
+        tuple: (CREATED, row) with the created row (None if Snipe-IT sent
+            none), (DUPLICATE, None) if the asset tag or serial already exists,
+            or (FAILED, (status_code, error)).
+    """
+    status_code, result = write_result(response, f"creating {asset_tag}")
+    if status_code == 200:
+        return CREATED, result if result and result.get('id') else None
+    if isinstance(result, dict) and ("asset_tag" in result or "serial" in result):
+        return DUPLICATE, None
+    return FAILED, (status_code, result)
+
+
+def checkout_request(hardware_id, user_id):
+    """(path, payload) of the request checking an asset out to a user."""
+    return (f"/hardware/{hardware_id}/checkout",
+            {'checkout_to_type': 'user', 'assigned_user': user_id, 'note': CHECKOUT_NOTE})
+
+
+def checkin_request(hardware_id):
+    """(path, payload) of the request checking an asset back in."""
+    return f"/hardware/{hardware_id}/checkin", {'note': CHECKIN_NOTE}
+
+
+def assignment_requests(row, user_id):
+    """
+    The requests that bring an asset's assignment in line with its Google user.
+
+    Args:
+        row (dict): The asset's hardware row, or None if it is not known.
+        user_id (int): The Snipe-IT user it should be checked out to, or None.
+
+    Returns:
+        list: (path, payload) pairs to POST in order; empty if nothing changes.
+    """
+    if row is None:
+        return []
+    change = assignment_change(row, user_id)
+    if change is None:
+        return []
+    if change == REASSIGN:
+        return [checkin_request(row['id']), checkout_request(row['id'], user_id)]
+    return [checkout_request(row['id'], user_id)]
+
+
+def mark_checked_out(row, user_id):
+    """Records a successful checkout on the cached row, so a later pass sees it assigned."""
+    row['assigned_to'] = {'id': user_id, 'type': 'user'}
+
+
+def merge_assignment(outcome, assignment):
+    """
+    Combines a device's hardware write with its assignment step.
+
+    Args:
+        outcome (tuple): (status_code, result) of the create/update.
+        assignment (tuple): (200, changed) or (status_code, error) of the
+            assignment, or None if it was not attempted.
+
+    Returns:
+        tuple: The device's (status_code, result). A failed assignment fails
+            the device; an otherwise unchanged asset that was checked out counts
+            as UPDATED.
+    """
+    if outcome[0] != 200 or assignment is None:
+        return outcome
+    status_code, changed = assignment
+    if status_code != 200:
+        return status_code, changed
+    if changed and outcome[1] == UNCHANGED:
+        return 200, UPDATED
+    return outcome
@@ -0,0 +1,224 @@
+"""
+Durable outbox journal for crash-safe resume.
+
+Every device is recorded as `pending` (with its Google record) before its
+Snipe-IT write is attempted, and marked `done` or `failed` once the write
+finishes. If a run dies partway through (timer timeout, OOM, Snipe-IT
+outage), `--resume` picks the same run up again: completed devices are
+skipped and only pending or failed entries are replayed. If the interrupted
+run had already listed every device from Google, the replay comes straight
+from the journal without listing Google again.
+
+The journal is a SQLite database in WAL mode, so each mark is a cheap
+append that survives the process being killed.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+PENDING = 'pending'
+DONE = 'done'
+FAILED = 'failed'
+
+
+def device_key(device):
+    """Journal key for a device record: its Directory device ID, or serial as a fallback."""
+    return device.get('Device ID') or device.get('Serial Number')
+
+
+class SyncJournal:
+    """SQLite journal of per-device sync work for the current run."""
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): SQLite database file. Use ':memory:' for a throwaway journal.
+        """
+        self.path = path
+        self.run_id = None
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connection(self):
+        if self._conn is None:
+            if self.path != ':memory:':
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS runs (
+                       id INTEGER PRIMARY KEY AUTOINCREMENT,
+                       started_at REAL NOT NULL,
+                       finished_at REAL,
+                       listing_complete INTEGER NOT NULL DEFAULT 0
+                   )"""
+            )
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS entries (
+                       run_id INTEGER NOT NULL,
+                       device_key TEXT NOT NULL,
+                       etag TEXT,
+                       device TEXT NOT NULL,
+                       status TEXT NOT NULL,
+                       outcome TEXT,
+                       updated_at REAL NOT NULL,
+                       PRIMARY KEY (run_id, device_key)
+                   )"""
+            )
+            self._conn.commit()
+        return self._conn
+
+    def start_run(self):
+        """Begin a new run, discarding entries from any earlier run."""
+        with self._lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM entries")
+            conn.execute("DELETE FROM runs")
+            self.run_id = conn.execute("INSERT INTO runs (started_at) VALUES (?)", (time.time(),)).lastrowid
+            conn.commit()
+        return self.run_id
+
+    def resume_run(self):
+        """
+        Re-open the latest unfinished run.
+
+        Returns:
+            bool: True if there was a run to resume. Otherwise nothing changes.
+        """
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT id FROM runs WHERE finished_at IS NULL ORDER BY id DESC LIMIT 1"
+            ).fetchone()
+        if row is None:
+            return False
+        self.run_id = row[0]
+        return True
+
+    @property
+    def listing_complete(self):
+        """True once every device of the run was listed from Google and planned."""
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT listing_complete FROM runs WHERE id = ?", (self.run_id,)
+            ).fetchone()
+        return bool(row and row[0])
+
+    def mark_listing_complete(self):
+        with self._lock:
+            conn = self._connection()
+            conn.execute("UPDATE runs SET listing_complete = 1 WHERE id = ?", (self.run_id,))
+            conn.commit()
+
+    def plan(self, device):
+        """Record a device as pending before its Snipe-IT write is attempted."""
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                """INSERT INTO entries (run_id, device_key, etag, device, status, updated_at)
+                   VALUES (?, ?, ?, ?, ?, ?)
+                   ON CONFLICT (run_id, device_key) DO UPDATE SET
+                       etag = excluded.etag, device = excluded.device,
+                       status = excluded.status, updated_at = excluded.updated_at""",
+                (self.run_id, device_key(device), device.get('ETag'), json.dumps(dict(device)), PENDING, time.time())
+            )
+            conn.commit()
+
+    def mark(self, device, ok, outcome=None):
+        """Mark a planned device as done (`ok`) or failed, with its sync outcome or error."""
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "UPDATE entries SET status = ?, outcome = ?, updated_at = ? WHERE run_id = ? AND device_key = ?",
+                (DONE if ok else FAILED, None if outcome is None else str(outcome), time.time(),
+                 self.run_id, device_key(device))
+            )
+            conn.commit()
+
+    def is_done(self, device):
+        """True if the device was synced in this run and has not changed since (same etag)."""
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT status, etag FROM entries WHERE run_id = ? AND device_key = ?",
+                (self.run_id, device_key(device))
+            ).fetchone()
+        return bool(row) and row[0] == DONE and row[1] == device.get('ETag')
+
+    def devices(self, *statuses):
+        """Device records of this run with any of `statuses`, in planning order."""
+        marks = ','.join('?' * len(statuses))
+        with self._lock:
+            rows = self._connection().execute(
+                f"SELECT device FROM entries WHERE run_id = ? AND status IN ({marks}) ORDER BY rowid",
+                (self.run_id, *statuses)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def counts(self):
+        """Number of entries per status in this run."""
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT status, COUNT(*) FROM entries WHERE run_id = ? GROUP BY status", (self.run_id,)
+            ).fetchall()
+        counts = {PENDING: 0, DONE: 0, FAILED: 0}
+        counts.update(dict(rows))
+        return counts
+
+    def done_devices(self):
+        """Devices synced before the run was interrupted."""
+        return self.devices(DONE)
+
+    def unfinished_devices(self):
+        """Devices still to replay: planned but never finished, or failed."""
+        return self.devices(PENDING, FAILED)
+
+    def summary(self):
+        """Return a one-line summary of the run's progress."""
+        counts = self.counts()
+        return (f"{counts[DONE]} devices already synced, "
+                f"{counts[PENDING] + counts[FAILED]} pending or failed")
+
+    def track(self, devices, skipped=None, listing_ok=None):
+        """
+        Plan devices lazily as they are listed, skipping ones already done.
+
+        Once `devices` is exhausted the listing is marked complete, unless
+        `listing_ok()` reports that listing stopped early on an error.
+
+        Args:
+            devices (iterable): Device records, e.g. from Google paging.
+            skipped (list, optional): One-element counter incremented per device skipped as done.
+            listing_ok (callable, optional): Returns False if the listing failed.
+
+        Yields:
+            dict: Devices that still need syncing.
+        """
+        for device in devices:
+            if self.is_done(device):
+                if skipped is not None:
+                    skipped[0] += 1
+                continue
+            self.plan(device)
+            yield device
+        if listing_ok is None or listing_ok():
+            self.mark_listing_complete()
+
+    def finish_run(self):
+        """Close the run and drop its entries; a later --resume has nothing to replay."""
+        with self._lock:
+            conn = self._connection()
+            conn.execute("UPDATE runs SET finished_at = ? WHERE id = ?", (time.time(), self.run_id))
+            conn.execute("DELETE FROM entries WHERE run_id = ?", (self.run_id,))
+            conn.commit()
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,205 @@
+"""
+Offline sync planning from snapshots.
+
+A Google device snapshot (JSON lines of device records) and a Snipe-IT
+snapshot (hardware rows plus the model and status label lists) are enough
+to decide, entirely in memory, what a sync would do: which assets it would
+create, which it would update and with which field changes, which models it
+would create and which devices need nothing. The result is a plan file that
+can be reviewed and later executed with `--apply`.
+
+Decisions use the same payload builders and change detection as a live run
+(hardware_payloads), so a plan matches what the sync would send.
+"""
+
+import json
+import os
+import time
+
+from category_cache import normalize_model_name
+from config import Config
+from hardware_index import HardwareIndex
+from hardware_payloads import build_create_payload, build_update_payload, current_state, diff_payload
+from sync_stats import CREATED, OUTCOMES, SKIPPED, UNCHANGED, UPDATED
+
+PLAN_VERSION = 1
+
+# Plan actions
+CREATE = 'create'
+UPDATE = 'update'
+
+# Hardware row keys change detection reads; the rest of a row is left out of snapshots
+_ROW_KEYS = ('id', 'asset_tag', 'serial', 'model', 'status_label', 'asset_eol_date', 'custom_fields')
+
+
+def _write_json(path, data):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def dump_devices(path, devices):
+    """
+    Write Google device records to a JSON lines snapshot as they arrive.
+
+    Returns:
+        int: Number of devices written.
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    count = 0
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        for device in devices:
+            f.write(json.dumps(dict(device)) + '\n')
+            count += 1
+    os.replace(tmp_path, path)
+    return count
+
+
+def load_devices(path):
+    """Read a Google device snapshot written by `dump_devices`."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def snapshot_row(row):
+    """Reduce a Snipe-IT hardware row to the keys change detection needs."""
+    row = {key: row[key] for key in _ROW_KEYS if key in row}
+    for key in ('model', 'status_label'):
+        if isinstance(row.get(key), dict):
+            row[key] = {'id': row[key].get('id')}
+    return row
+
+
+def make_snipeit_snapshot(hardware_rows, models, statuslabels):
+    """Build a Snipe-IT snapshot from hardware rows, models and status labels."""
+    return {
+        'taken_at': time.time(),
+        'hardware': [snapshot_row(row) for row in hardware_rows],
+        'models': [{'id': m['id'], 'name': m['name']} for m in models],
+        'statuslabels': [{'id': s['id'], 'name': s['name']} for s in statuslabels],
+    }
+
+
+def dump_snipeit_snapshot(path, snapshot):
+    """Write a snapshot from `make_snipeit_snapshot`."""
+    _write_json(path, snapshot)
+
+
+def load_snipeit_snapshot(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _status_id(status_name, statuses):
+    """Mirror of the live status lookup against the snapshot's status labels."""
+    if status_name == Config.SNIPE_IT_ACTIVE_STATUS:
+        return Config.SNIPE_IT_DEFAULT_STATUS_ID
+    return statuses.get(str(status_name or '').strip().lower())
+
+
+def build_plan(devices, snapshot, classify=None):
+    """
+    Decide what a sync of `devices` against `snapshot` would do.
+
+    Devices whose model is not in the snapshot are planned against a model to
+    be created: their payload has `model_id` None and the action names the
+    model, and `apply` fills in the ID once the model exists.
+
+    Args:
+        devices (iterable): Google device records.
+        snapshot (dict): Snipe-IT snapshot from `load_snipeit_snapshot`.
+        classify (callable, optional): Offline `classify(model_name)` returning
+            a category or None, used to pre-classify models to be created.
+
+    Returns:
+        dict: The plan: summary counts, models to create and per-asset actions.
+    """
+    index = HardwareIndex(snapshot.get('hardware', []))
+    models = {normalize_model_name(m['name']): m['id'] for m in snapshot.get('models', [])}
+    statuses = {str(s['name']).strip().lower(): s['id'] for s in snapshot.get('statuslabels', [])}
+
+    counts = {outcome: 0 for outcome in OUTCOMES}
+    new_models, actions, seen = {}, [], set()
+    for device in devices:
+        serial = device.get('Serial Number')
+        if not serial or serial.strip().upper() in seen:
+            counts[SKIPPED] += 1
+            continue
+        seen.add(serial.strip().upper())
+
+        model_name = device.get('Model')
+        pending_model = None
+        if model_name is None:
+            model_id = Config.SNIPE_IT_DEFAULT_MODEL_ID
+        else:
+            model_id = models.get(normalize_model_name(model_name))
+            if model_id is None:
+                pending_model = new_models.setdefault(
+                    normalize_model_name(model_name),
+                    {'name': model_name, 'category': classify(model_name) if classify else None}
+                )['name']
+        status_id = _status_id(device.get('Status'), statuses)
+        fields = (device.get('Mac Address'), device.get('Active Date'),
+                  device.get('Last Known IP Address'), device.get('Device User'))
+
+        existing = index.lookup(asset_tag=serial, serial=serial)
+        if existing is None:
+            action = {'action': CREATE, 'asset_tag': serial,
+                      'payload': build_create_payload(serial, model_id, status_id, *fields,
+                                                     eol=device.get('EOL'))}
+            counts[CREATED] += 1
+        else:
+            changes = diff_payload(build_update_payload(serial, model_id, status_id, *fields,
+                                                        eol=device.get('EOL')), existing)
+            if not changes:
+                counts[UNCHANGED] += 1
+                continue
+            current = current_state(existing)
+            action = {'action': UPDATE, 'asset_tag': serial, 'id': existing['id'], 'payload': changes,
+                      'changes': {key: {'from': current.get(key), 'to': value} for key, value in changes.items()}}
+            counts[UPDATED] += 1
+        if pending_model is not None:
+            action['model'] = pending_model
+        actions.append(action)
+
+    return {
+        'version': PLAN_VERSION,
+        'created_at': time.time(),
+        'snapshot_taken_at': snapshot.get('taken_at'),
+        'summary': counts,
+        'models': list(new_models.values()),
+        'actions': actions,
+    }
+
+
+def write_plan(path, plan):
+    _write_json(path, plan)
+
+
+def load_plan(path):
+    """
+    Read a plan file.
+
+    Raises:
+        ValueError: If the file was written by an incompatible version.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        plan = json.load(f)
+    if plan.get('version') != PLAN_VERSION:
+        raise ValueError(f"Unsupported plan version {plan.get('version')!r} in {path}")
+    return plan
+
+
+def format_plan_summary(plan):
+    """Return a short human readable summary of a plan."""
+    counts = plan['summary']
+    lines = [
+        f"Plan: create {counts[CREATED]}, update {counts[UPDATED]}, unchanged {counts[UNCHANGED]}, "
+        f"skipped {counts[SKIPPED]}; {len(plan['models'])} new models",
+    ]
+    for model in plan['models']:
+        lines.append(f"  + model {model['name']} ({model['category'] or 'category decided at apply'})")
+    return '\n'.join(lines)
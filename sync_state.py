@@ -0,0 +1,116 @@
+"""
+Persistent state for incremental syncs.
+
+Tracks the newest Google `lastSync` timestamp that was fully processed (the
+watermark) and the Directory API `etag` of every device last synced
+successfully, so an incremental run can stop paging at the watermark and
+skip devices that have not changed.
+"""
+
+import json
+import logging
+import os
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+
+def parse_rfc3339(value):
+    """
+    Parse a Google RFC 3339 timestamp (e.g. '2024-05-01T12:34:56.789Z').
+
+    Returns:
+        datetime: Timezone-aware datetime, or None if the value is missing or invalid.
+    """
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+class SyncState:
+    """Watermark and per-device etags persisted between runs."""
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): JSON file holding the state.
+        """
+        self.path = path
+        self.watermark = None
+        self.etags = {}
+        self._run_newest = None
+        self._run_failed = False
+
+    def load(self):
+        """Load state from disk; a missing or unreadable file starts fresh."""
+        if not self.path or not os.path.exists(self.path):
+            return self
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable sync state {self.path}: {e}")
+            return self
+        self.watermark = data.get('watermark')
+        self.etags = data.get('etags', {})
+        return self
+
+    def save(self):
+        """Write state to disk atomically."""
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'watermark': self.watermark, 'etags': self.etags}, f)
+        os.replace(tmp_path, self.path)
+
+    @property
+    def watermark_time(self):
+        """The watermark as a datetime, or None if no run has completed."""
+        return parse_rfc3339(self.watermark)
+
+    def is_unchanged(self, device_id, etag):
+        """True if the device was synced before with the same etag."""
+        return bool(device_id and etag) and self.etags.get(device_id) == etag
+
+    def record_success(self, device_id, etag, last_sync):
+        """Remember a successfully synced device and its lastSync time."""
+        if device_id and etag:
+            self.etags[device_id] = etag
+        self._observe(last_sync)
+
+    def record_skip(self, last_sync):
+        """Count an unchanged device towards the run's newest lastSync."""
+        self._observe(last_sync)
+
+    def record_failure(self):
+        """Mark the run as incomplete so the watermark is not advanced."""
+        self._run_failed = True
+
+    def _observe(self, last_sync):
+        parsed = parse_rfc3339(last_sync)
+        if parsed and (self._run_newest is None or parsed > parse_rfc3339(self._run_newest)):
+            self._run_newest = last_sync
+
+    def finish_run(self):
+        """
+        Advance the watermark to the newest lastSync seen this run, unless any
+        device failed (then the next incremental run re-covers the same window).
+
+        Returns:
+            bool: True if the watermark moved.
+        """
+        if self._run_failed or self._run_newest is None:
+            return False
+        current = self.watermark_time
+        if current is None or parse_rfc3339(self._run_newest) > current:
+            self.watermark = self._run_newest
+            return True
+        return False
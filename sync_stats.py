@@ -0,0 +1,34 @@
+"""
+Per-run sync outcome counters.
+"""
+
+import threading
+
+# Sync outcomes reported per device
+CREATED = 'created'
+UPDATED = 'updated'
+UNCHANGED = 'unchanged'
+SKIPPED = 'skipped'
+FAILED = 'failed'
+
+OUTCOMES = (CREATED, UPDATED, UNCHANGED, SKIPPED, FAILED)
+
+
+class SyncStats:
+    """Thread-safe device counters per outcome."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {outcome: 0 for outcome in OUTCOMES}
+
+    def record(self, outcome, count=1):
+        """Add `count` devices to an outcome."""
+        with self._lock:
+            self.counts[outcome] = self.counts.get(outcome, 0) + count
+
+    def summary(self):
+        """Return a one-line summary, e.g. 'Created 3, updated 10, ...'."""
+        with self._lock:
+            counts = dict(self.counts)
+        return (f"Created {counts[CREATED]}, updated {counts[UPDATED]}, unchanged {counts[UNCHANGED]}, "
+                f"skipped {counts[SKIPPED]}, failed {counts[FAILED]}")
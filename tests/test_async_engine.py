@@ -0,0 +1,246 @@
+import asyncio
+import json
+import os
+import sys
+import types
+import unittest
+from unittest import mock
+
+# Dummy dotenv/tqdm so the engine can be imported without them installed
+dotenv_mod = types.ModuleType('dotenv')
+setattr(dotenv_mod, 'load_dotenv', lambda *args, **kwargs: None)
+sys.modules.setdefault('dotenv', dotenv_mod)
+tqdm_mod = types.ModuleType('tqdm')
+setattr(tqdm_mod, 'tqdm', lambda *args, **kwargs: None)
+sys.modules.setdefault('tqdm', tqdm_mod)
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+
+import async_engine
+from async_engine import AsyncResponse, AsyncSnipeITClient, AsyncSyncEngine
+from config import Config
+from fake_snipeit import FakeSnipeIT, FakeSnipeITClient
+from hardware_index import HardwareIndex
+from lookup_cache import LookupCache
+from rate_limiter import RateLimiter
+from sync_stats import CREATED, UNCHANGED, UPDATED
+from user_index import UserIndex
+
+
+def response(status, data, headers=None):
+    return AsyncResponse(status, headers or {}, json.dumps(data))
+
+
+class FakeClient:
+    """Minimal in-memory Snipe-IT API for the engine."""
+
+    def __init__(self):
+        self.calls = []
+        self.closed = False
+
+    async def get(self, path, params=None):
+        self.calls.append(('GET', path))
+        await asyncio.sleep(0)
+        if path == '/models':
+            return response(200, {'rows': []})
+        return response(200, {'rows': [{'id': 7}]})
+
+    async def post(self, path, json=None):
+        self.calls.append(('POST', path))
+        await asyncio.sleep(0)
+        if path == '/models':
+            return response(200, {'status': 'success', 'payload': {'id': 42, 'name': json['name']}})
+        return response(200, {'status': 'success', 'payload': dict(json, id=100 + len(self.calls))})
+
+    async def patch(self, path, json=None):
+        self.calls.append(('PATCH', path))
+        return response(200, {'status': 'success'})
+
+    async def close(self):
+        self.closed = True
+
+
+class TestAsyncSyncEngine(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(async_engine, 'tqdm')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = FakeClient()
+        self.index = HardwareIndex()
+        self.engine = AsyncSyncEngine(self.client, self.index, LookupCache(), lambda name: 'Chromebook')
+
+    def run_devices(self, devices):
+        results = {}
+
+        def on_done(device, result, error):
+            results[device['Serial Number']] = error or result
+
+        asyncio.run(self.engine.run(devices, on_done, chunk_size=2))
+        return results
+
+    def test_creates_devices_and_shares_one_model_creation(self):
+        devices = [{'Serial Number': f'SER{i}', 'Model': 'New Model', 'Status': Config.SNIPE_IT_ACTIVE_STATUS}
+                   for i in range(5)]
+        results = self.run_devices(devices)
+
+        self.assertEqual(results, {f'SER{i}': (200, CREATED) for i in range(5)})
+        self.assertEqual(self.client.calls.count(('POST', '/models')), 1)
+        self.assertEqual(self.client.calls.count(('POST', '/hardware')), 5)
+        self.assertIn('SER3', self.index)
+        self.assertTrue(self.client.closed)
+
+    def test_concurrent_status_lookups_share_one_request(self):
+        devices = [{'Serial Number': f'SER{i}', 'Status': 'Disabled'} for i in range(6)]
+        results = self.run_devices(devices)
+
+        self.assertEqual(results, {f'SER{i}': (200, CREATED) for i in range(6)})
+        self.assertEqual(self.client.calls.count(('GET', '/statuslabels')), 1)
+
+    def test_unchanged_device_is_not_patched(self):
+        self.index.add({'id': 3, 'asset_tag': 'SER1', 'serial': 'SER1',
+                        'model': {'id': Config.SNIPE_IT_DEFAULT_MODEL_ID},
+                        'status_label': {'id': Config.SNIPE_IT_DEFAULT_STATUS_ID}})
+        results = self.run_devices([{'Serial Number': 'SER1', 'Status': Config.SNIPE_IT_ACTIVE_STATUS}])
+
+        self.assertEqual(results, {'SER1': (200, UNCHANGED)})
+        self.assertEqual(self.client.calls, [])
+
+    def test_reassigns_asset_to_its_google_user(self):
+        self.engine.user_index = UserIndex([{'id': 9, 'email': 'student@example.org'}])
+        row = {'id': 3, 'asset_tag': 'SER1', 'serial': 'SER1', 'assigned_to': {'id': 8, 'type': 'user'},
+               'model': {'id': Config.SNIPE_IT_DEFAULT_MODEL_ID},
+               'status_label': {'id': Config.SNIPE_IT_DEFAULT_STATUS_ID},
+               'custom_fields': {'User': {'field': Config.SNIPE_IT_FIELD_USER, 'value': 'student@example.org'}}}
+        self.index.add(row)
+        device = {'Serial Number': 'SER1', 'Status': Config.SNIPE_IT_ACTIVE_STATUS,
+                  'Device User': 'student@example.org'}
+        results = self.run_devices([device])
+
+        self.assertEqual(results, {'SER1': (200, UPDATED)})
+        self.assertEqual(self.client.calls, [('POST', '/hardware/3/checkin'), ('POST', '/hardware/3/checkout')])
+        self.assertEqual(row['assigned_to']['id'], 9)
+
+        self.client.calls.clear()
+        self.assertEqual(self.run_devices([device]), {'SER1': (200, UNCHANGED)})
+        self.assertEqual(self.client.calls, [])
+
+
+class AsyncFakeSnipeITClient(FakeSnipeITClient):
+    """FakeSnipeITClient with the awaitable interface of AsyncSnipeITClient."""
+
+    async def get(self, path, params=None):
+        return super().get(path, params=params)
+
+    async def post(self, path, json=None):
+        return super().post(path, json=json)
+
+    async def patch(self, path, json=None):
+        return super().patch(path, json=json)
+
+    async def close(self):
+        pass
+
+
+class TestAsyncSyncEngineAgainstFake(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(async_engine, 'tqdm')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.api = FakeSnipeIT()
+        self.user = self.api.add_user('student@example.org')
+        self.api.add_hardware({'asset_tag': 'SER1', 'serial': 'SER1'})
+        self.engine = AsyncSyncEngine(AsyncFakeSnipeITClient(self.api), HardwareIndex(), LookupCache(),
+                                      lambda name: 'Chromebook', user_index=UserIndex(self.api.users.values()))
+
+    def test_duplicate_asset_is_updated_and_checked_out(self):
+        results = []
+        device = {'Serial Number': 'SER1', 'Status': Config.SNIPE_IT_ACTIVE_STATUS,
+                  'Device User': 'student@example.org'}
+        asyncio.run(self.engine.run([device], lambda device, result, error: results.append(error or result)))
+
+        self.assertEqual(results, [(200, UPDATED)])
+        self.assertEqual(self.api.stats['POST /hardware'], 1)
+        self.assertEqual(self.api.by_tag['ser1']['assigned_to']['id'], self.user['id'])
+
+    def test_models_are_matched_by_exact_name_only(self):
+        similar = self.api.add_model('Dell Chromebook 3180')
+        device = {'Serial Number': 'SER2', 'Model': 'Dell Chromebook', 'Status': Config.SNIPE_IT_ACTIVE_STATUS}
+        asyncio.run(self.engine.run([device], lambda device, result, error: None))
+
+        self.assertEqual(self.api.stats['POST /models'], 1)
+        self.assertNotEqual(self.api.by_tag['ser2']['model']['id'], similar['id'])
+        self.assertEqual(self.api.by_tag['ser2']['model']['name'], 'Dell Chromebook')
+
+
+class FakeResponse:
+    def __init__(self, status, headers=None):
+        self.status = status
+        self.headers = headers or {}
+
+    async def text(self):
+        return '{}'
+
+
+class FakeSession:
+    def __init__(self, statuses):
+        self.statuses = list(statuses)
+        self.active = 0
+        self.peak = 0
+
+    def request(self, method, url, **kwargs):
+        session = self
+
+        class Context:
+            async def __aenter__(self):
+                session.active += 1
+                session.peak = max(session.peak, session.active)
+                await asyncio.sleep(0.01)
+                status = session.statuses.pop(0) if session.statuses else 200
+                return FakeResponse(status, {'Retry-After': '0'} if status == 429 else {})
+
+            async def __aexit__(self, *exc):
+                session.active -= 1
+
+        return Context()
+
+
+class TestAsyncSnipeITClient(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(async_engine, 'tqdm')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def make_client(self, session, max_in_flight):
+        client = AsyncSnipeITClient("https://snipe.example/api/v1", "token", RateLimiter(60000, burst=100),
+                                    max_in_flight=max_in_flight, retry_delay=0.01)
+        client._session = session
+        return client
+
+    def test_limits_requests_in_flight(self):
+        session = FakeSession([])
+        client = self.make_client(session, max_in_flight=3)
+
+        async def main():
+            return await asyncio.gather(*(client.get('/hardware') for _ in range(10)))
+
+        responses = asyncio.run(main())
+        self.assertEqual([r.status_code for r in responses], [200] * 10)
+        self.assertEqual(session.peak, 3)
+
+    def test_retries_429(self):
+        session = FakeSession([429, 200])
+        client = self.make_client(session, max_in_flight=1)
+        result = asyncio.run(client.get('/models'))
+        self.assertEqual(result.status_code, 200)
+        self.assertEqual(session.statuses, [])
+
+    def test_last_429_is_not_waited_out(self):
+        session = FakeSession([429, 429])
+        client = self.make_client(session, max_in_flight=1)
+        with mock.patch.object(client.rate_limiter, 'pause') as pause:
+            self.assertIsNone(asyncio.run(client.get('/models', retries=2)))
+        self.assertEqual(pause.call_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from category_cache import CategoryCache, SingleFlight
+
+CATEGORIES = "Chromebook,Tablets,Desktop"
+
+
+class TestCategoryCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = CategoryCache(':memory:')
+
+    def test_resolve_classifies_once_per_normalized_name(self):
+        calls = []
+
+        def classify():
+            calls.append(1)
+            return "**chromebook**"
+
+        self.assertEqual(self.cache.resolve("Dell  Chromebook 3180", CATEGORIES, classify), "Chromebook")
+        self.assertEqual(self.cache.resolve("dell chromebook 3180", CATEGORIES, classify), "Chromebook")
+        self.assertEqual(len(calls), 1)
+
+    def test_answer_outside_category_list_is_not_cached(self):
+        self.assertEqual(self.cache.resolve("Thing", CATEGORIES, lambda: "Toaster"), "Toaster")
+        self.assertIsNone(self.cache.get("Thing", CATEGORIES))
+
+    def test_prune_drops_entries_for_other_category_lists(self):
+        self.cache.put("A", "Chromebook,Desktop", "Desktop")
+        self.cache.put("B", CATEGORIES, "Tablets")
+        self.assertEqual(self.cache.prune(categories=CATEGORIES), 1)
+        self.assertEqual([e['model'] for e in self.cache.dump()], ["B"])
+
+    def test_seed_from_mapping(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'seed.json')
+            with open(path, 'w') as f:
+                json.dump({"iPad": "tablets", "Bogus": "Toaster"}, f)
+            self.assertEqual(self.cache.seed(path, CATEGORIES), 1)
+        self.assertEqual(self.cache.get("ipad", CATEGORIES), "Tablets")
+
+
+    def test_resolve_many_batches_misses_and_caches_only_valid_answers(self):
+        self.cache.put("Known", CATEGORIES, "Desktop")
+        batches = []
+
+        def classify_batch(batch):
+            batches.append(list(batch))
+            return {"acer chromebook 311": "chromebook", "iPad 9": "Toaster"}
+
+        resolved = self.cache.resolve_many(
+            ["Known", "Acer Chromebook 311", "acer  chromebook 311", "iPad 9", "Mystery", None],
+            CATEGORIES, classify_batch, batch_size=2)
+
+        self.assertEqual(batches, [["Acer Chromebook 311", "iPad 9"], ["Mystery"]])
+        self.assertEqual(resolved, {"Known": "Desktop", "Acer Chromebook 311": "Chromebook"})
+        self.assertIsNone(self.cache.get("iPad 9", CATEGORIES))
+        self.assertEqual(self.cache.resolve("iPad 9", CATEGORIES, lambda: "Tablets"), "Tablets")
+
+
+class TestSingleFlight(unittest.TestCase):
+    def test_concurrent_callers_share_one_call(self):
+        flight = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+        results = []
+
+        def slow():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return "done"
+
+        leader = threading.Thread(target=lambda: results.append(flight.do("k", slow)))
+        leader.start()
+        started.wait(5)
+        followers = [threading.Thread(target=lambda: results.append(flight.do("k", slow))) for _ in range(3)]
+        for t in followers:
+            t.start()
+        time.sleep(0.1)  # let followers block on the in-flight call
+        release.set()
+        for t in [leader] + followers:
+            t.join(5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ["done"] * 4)
+
+if __name__ == '__main__':
+    unittest.main()
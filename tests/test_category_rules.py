@@ -0,0 +1,48 @@
+import json
+import os
+import tempfile
+import unittest
+
+from category_rules import DEFAULT_RULES, CategoryRules, load_rules
+
+CATEGORIES = "IMac,Tablets,Mobile Devices,Servers,Networking Equipment,Printers & Scanners,Desktop,Chromebook"
+
+
+class TestCategoryRules(unittest.TestCase):
+    def setUp(self):
+        self.rules = CategoryRules(DEFAULT_RULES, CATEGORIES)
+
+    def test_default_rules_classify_common_models(self):
+        cases = {
+            "Dell Chromebook 11 (3180)": "Chromebook",
+            "Lenovo 10e Chromebook Tablet": "Tablets",
+            "ASUS Chromebox 4": "Desktop",
+            "Apple iMac 24": "IMac",
+            "HP LaserJet Pro M404": "Printers & Scanners",
+        }
+        for model, category in cases.items():
+            self.assertEqual(self.rules.classify(model), category, model)
+        self.assertIsNone(self.rules.classify("Mystery Device 9000"))
+        self.assertEqual((self.rules.hits, self.rules.misses), (5, 1))
+        self.assertIn("5/6 models matched locally (83%)", self.rules.format_stats())
+
+    def test_match_does_not_count(self):
+        self.rules.match("Dell Chromebook 3100")
+        self.assertEqual((self.rules.hits, self.rules.misses), (0, 0))
+
+    def test_rules_outside_category_list_or_invalid_are_skipped(self):
+        rules = CategoryRules([(r"chromebook", "Laptops"), (r"(", "Desktop"), (r"box", "desktop")], CATEGORIES)
+        self.assertEqual(len(rules), 1)
+        self.assertEqual(rules.classify("Chromebox"), "Desktop")
+
+    def test_load_rules_keeps_file_order(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'rules.json')
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump([["chromebook", "Chromebook"], {"pattern": "tablet", "category": "Tablets"}], f)
+            rules = CategoryRules(load_rules(path), CATEGORIES)
+        self.assertEqual(rules.classify("Chromebook Tablet"), "Chromebook")
+
+
+if __name__ == '__main__':
+    unittest.main()
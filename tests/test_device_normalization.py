@@ -0,0 +1,48 @@
+import sys
+import types
+import unittest
+
+# Dummy dotenv so config can be imported without it installed
+dotenv_mod = types.ModuleType('dotenv')
+setattr(dotenv_mod, 'load_dotenv', lambda *args, **kwargs: None)
+sys.modules.setdefault('dotenv', dotenv_mod)
+
+from device_normalization import normalize_batches, normalize_device, normalize_devices
+from hardware_payloads import format_mac
+
+
+def record(mac, status='ACTIVE', ip='10.0.0.1', user='a@example.org', eol='2030-06-01T00:00:00.000Z'):
+    return {'Serial Number': 'SER1', 'Mac Address': mac, 'Status': status, 'Last Known IP Address': ip,
+            'Device User': user, 'Active Date': '2025-01-01', 'EOL': eol, 'Last Sync Time': 'untouched'}
+
+
+class TestNormalization(unittest.TestCase):
+    MACS = ['a81d166742f7', 'a8:1d:16:67:42:f7', None, '', 'A8-1D-16-67-42-F7', ' A81D166742F7 ', 'a81d16']
+
+    def test_macs_match_format_mac(self):
+        self.assertEqual([normalize_device(record(mac))['Mac Address'] for mac in self.MACS],
+                         [format_mac(mac) for mac in self.MACS])
+        self.assertEqual(normalize_device(record('a81d166742f7'))['Mac Address'], 'a8:1d:16:67:42:f7')
+
+    def test_fields_are_trimmed_and_dates_cut(self):
+        device = normalize_device(record('a81d166742f7', status=' disabled ', ip='', user=' A@Example.org'))
+        self.assertEqual((device['Status'], device['Last Known IP Address'], device['Device User'], device['EOL']),
+                         ('DISABLED', None, 'a@example.org', '2030-06-01'))
+        self.assertEqual(device['Last Sync Time'], 'untouched')
+
+    def test_batch_matches_per_device(self):
+        devices = [record(mac, status=s, ip=ip, user=u, eol=e)
+                   for mac, s, ip, u, e in zip(self.MACS, ['ACTIVE', 'disabled', None, ' x ', '', 'A', 'b'],
+                                               ['1.2.3.4', '', None, ' 5.6.7.8', 'x', ' ', '9'],
+                                               [None, 'A@B.org', '', ' c@d.org ', 'e', 'F', None],
+                                               [None, '', '2030-06-01', '2030-06-01T00:00:00Z', 'x', None, ''])]
+        expected = [normalize_device(dict(d)) for d in devices]
+        self.assertEqual(normalize_devices([dict(d) for d in devices]), expected)
+        self.assertEqual(list(normalize_batches(iter([dict(d) for d in devices]), batch_size=3)), expected)
+
+    def test_missing_fields_are_left_out(self):
+        self.assertEqual(normalize_devices([{'Serial Number': 'SER1'}]), [{'Serial Number': 'SER1'}])
+
+
+if __name__ == '__main__':
+    unittest.main()
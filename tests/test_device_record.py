@@ -0,0 +1,39 @@
+import copy
+import json
+import pickle
+import unittest
+
+from device_record import ATTRIBUTES, DeviceRecord
+
+DEVICE = {'Device ID': 'dev-1', 'Serial Number': 'SER1', 'Mac Address': 'a8:1d:16:67:42:f7',
+          'Active Date': '2025-01-01', 'Status': 'ACTIVE', 'Raw Extra': [1, 2, 3]}
+
+
+class TestDeviceRecord(unittest.TestCase):
+    def setUp(self):
+        self.record = DeviceRecord.from_dict(DEVICE)
+
+    def test_reads_like_a_dict_record(self):
+        self.assertEqual(self.record['Serial Number'], 'SER1')
+        self.assertEqual(self.record.serial, 'SER1')
+        self.assertIsNone(self.record.get('Device User'))
+        self.assertEqual(self.record.get('Raw Extra', 'dropped'), 'dropped')
+        self.assertEqual(list(self.record), list(ATTRIBUTES))
+        self.assertFalse(hasattr(self.record, '__dict__'))
+
+    def test_is_read_only(self):
+        with self.assertRaises(AttributeError):
+            self.record.serial = 'SER2'
+        with self.assertRaises(TypeError):
+            self.record['Serial Number'] = 'SER2'
+
+    def test_serializes_through_dict(self):
+        expected = {key: DEVICE.get(key) for key in ATTRIBUTES}
+        self.assertEqual(json.loads(json.dumps(dict(self.record))), expected)
+        self.assertEqual(self.record, expected)
+        self.assertEqual(pickle.loads(pickle.dumps(self.record)), self.record)
+        self.assertEqual(copy.deepcopy(self.record).device_id, 'dev-1')
+
+
+if __name__ == '__main__':
+    unittest.main()
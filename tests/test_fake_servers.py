@@ -0,0 +1,89 @@
+import json
+import os
+import sys
+import unittest
+import urllib.error
+import urllib.request
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+
+from fake_directory import FakeDirectoryService, parse_fleet_size
+from fake_snipeit import FakeSnipeIT, FakeSnipeITServer
+
+
+class TestFakeSnipeIT(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeSnipeITServer(FakeSnipeIT()).start()
+        self.addCleanup(self.server.stop)
+
+    def call(self, method, path, body=None):
+        data = json.dumps(body).encode() if body is not None else None
+        request = urllib.request.Request(self.server.base_url + path, data=data, method=method,
+                                         headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(request) as response:
+                return response.status, json.loads(response.read()), response.headers
+        except urllib.error.HTTPError as e:
+            return e.code, json.loads(e.read()), e.headers
+
+    def test_create_duplicate_page_and_patch(self):
+        for i in range(5):
+            status, data, _ = self.call('POST', '/hardware', {'asset_tag': f'T{i}', 'serial': f'T{i}',
+                                                              '_snipeit_mac_address_1': 'aa'})
+            self.assertEqual(data['status'], 'success')
+        _, duplicate, _ = self.call('POST', '/hardware', {'asset_tag': 'T1'})
+        self.assertIn('asset_tag', duplicate['messages'])
+
+        _, page, _ = self.call('GET', '/hardware?limit=2&offset=4')
+        self.assertEqual(page['total'], 5)
+        self.assertEqual([row['asset_tag'] for row in page['rows']], ['T4'])
+        self.assertEqual(page['rows'][0]['custom_fields']['MAC Address']['field'], '_snipeit_mac_address_1')
+
+        row_id = page['rows'][0]['id']
+        status, patched, _ = self.call('PATCH', f'/hardware/{row_id}', {'status_id': 3})
+        self.assertEqual(patched['payload']['status_label']['id'], 3)
+        self.assertEqual(self.server.api.stats['PATCH /hardware/{id}'], 1)
+
+    def test_users_checkout_and_checkin(self):
+        api = self.server.api
+        users = [api.add_user(f'user{i}@example.org') for i in range(3)]
+        _, page, _ = self.call('GET', '/users?limit=2&offset=2')
+        self.assertEqual((page['total'], page['rows'][0]['id']), (3, users[2]['id']))
+
+        _, created, _ = self.call('POST', '/hardware', {'asset_tag': 'T1'})
+        row_id = created['payload']['id']
+        _, data, _ = self.call('POST', f'/hardware/{row_id}/checkout',
+                               {'checkout_to_type': 'user', 'assigned_user': users[0]['id']})
+        self.assertEqual(data['payload']['assigned_to']['id'], users[0]['id'])
+        _, again, _ = self.call('POST', f'/hardware/{row_id}/checkout', {'assigned_user': users[1]['id']})
+        self.assertEqual(again['status'], 'error')
+        _, data, _ = self.call('POST', f'/hardware/{row_id}/checkin', {})
+        self.assertIsNone(data['payload']['assigned_to'])
+
+    def test_injects_429_with_retry_after(self):
+        self.server.api.rate_429 = 1.0
+        status, _, headers = self.call('GET', '/models?search=x')
+        self.assertEqual(status, 429)
+        self.assertEqual(headers['Retry-After'], '1')
+        self.assertEqual(self.server.api.throttled, 1)
+
+
+class TestFakeDirectory(unittest.TestCase):
+    def test_pages_through_fleet_newest_first(self):
+        service = FakeDirectoryService(parse_fleet_size('1k'))
+        devices, token = [], None
+        while True:
+            page = service.chromeosdevices().list(customerId='my_customer', maxResults=300,
+                                                  pageToken=token).execute()
+            devices.extend(page['chromeosdevices'])
+            token = page.get('nextPageToken')
+            if not token:
+                break
+        self.assertEqual(len(devices), 1000)
+        self.assertEqual(service.pages_served, 4)
+        self.assertEqual(len({d['serialNumber'] for d in devices}), 1000)
+        self.assertGreater(devices[0]['lastSync'], devices[-1]['lastSync'])
+
+
+if __name__ == '__main__':
+    unittest.main()
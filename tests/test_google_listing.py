@@ -0,0 +1,94 @@
+import importlib.util
+import sys
+import types
+import unittest
+from datetime import datetime, timezone
+from pathlib import Path
+from unittest import mock
+
+# Dummy dotenv so config can be imported without it installed
+dotenv_mod = types.ModuleType('dotenv')
+setattr(dotenv_mod, 'load_dotenv', lambda *args, **kwargs: None)
+sys.modules.setdefault('dotenv', dotenv_mod)
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / 'benchmarks'))
+
+from config import Config
+from fake_directory import FakeDirectoryService
+
+
+def load_google_auth(service):
+    """Fresh googleAuth (other tests stub the module) listing from `service`."""
+    spec = importlib.util.spec_from_file_location('fresh_googleAuth', ROOT / 'googleAuth.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.auth = lambda: object()
+    module.build = lambda *args, **kwargs: service
+    return module
+
+
+class TestPartitionedListing(unittest.TestCase):
+    def setUp(self):
+        self.service = FakeDirectoryService(1000)
+        self.googleAuth = load_google_auth(self.service)
+        for name, value in [('GOOGLE_LIST_CONCURRENCY', 3), ('GOOGLE_LIST_RATE_LIMIT_PER_MINUTE', 60000),
+                            ('GOOGLE_CHROMEOS_PAGE_SIZE', 100), ('GOOGLE_CHROMEOS_FIELDS', 'auto')]:
+            patcher = mock.patch.object(Config, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def serials(self, **config):
+        with mock.patch.multiple(Config, **config):
+            return [d['Serial Number'] for d in self.googleAuth.iter_chromeos_devices()]
+
+    def test_authentication_failure_is_raised(self):
+        self.googleAuth.auth = lambda: None
+        with self.assertRaises(RuntimeError):
+            list(self.googleAuth.iter_chromeos_devices())
+        self.assertEqual(self.service.pages_served, 0)
+
+    def test_orgunit_partitions_cover_the_fleet_once(self):
+        serials = self.serials(GOOGLE_LIST_PARTITION_BY='orgunit', GOOGLE_LIST_ORG_UNITS=[])
+        self.assertEqual(len(serials), 1000)
+        self.assertEqual(set(serials), {f'BENCH{i:08d}' for i in range(1000)})
+        self.assertGreater(self.service.pages_served, 40)
+
+    def test_overlapping_queries_are_deduplicated(self):
+        serials = self.serials(GOOGLE_LIST_PARTITION_BY='query',
+                               GOOGLE_LIST_QUERIES=['status:ACTIVE', 'status:DISABLED', 'status:ACTIVE'])
+        self.assertEqual(len(serials), 1000)
+        self.assertEqual(len(set(serials)), 1000)
+
+    def test_watermark_applies_per_partition(self):
+        since = datetime(2024, 12, 31, 23, 0, tzinfo=timezone.utc)  # the 60 newest devices
+        with mock.patch.multiple(Config, GOOGLE_LIST_PARTITION_BY='orgunit',
+                                 GOOGLE_LIST_ORG_UNITS=['/Students/School 0', '/Students/School 1']):
+            devices = list(self.googleAuth.iter_chromeos_devices(since=since))
+        self.assertEqual(sorted(d['Serial Number'] for d in devices),
+                         [f'BENCH{i:08d}' for i in range(61) if i % 40 in (0, 1)])
+
+    def test_listed_records_are_normalized(self):
+        with mock.patch.object(Config, 'GOOGLE_LIST_PARTITION_BY', 'none'):
+            device = next(iter(self.googleAuth.iter_chromeos_devices()))
+        self.assertEqual(device['Mac Address'], 'a8:1d:16:00:00:00')
+        self.assertEqual(device['EOL'], '2030-06-01')
+        self.assertEqual(list(device), list(self.googleAuth.DEVICE_FIELDS))
+        self.assertEqual(device.serial, 'BENCH00000000')
+
+    def test_only_query_partitions_are_deduplicated(self):
+        with mock.patch.object(self.googleAuth, 'unique_devices', side_effect=lambda devices: devices) as unique:
+            self.serials(GOOGLE_LIST_PARTITION_BY='none')
+            self.serials(GOOGLE_LIST_PARTITION_BY='orgunit', GOOGLE_LIST_ORG_UNITS=[])
+            unique.assert_not_called()
+            self.serials(GOOGLE_LIST_PARTITION_BY='query', GOOGLE_LIST_QUERIES=['status:ACTIVE', 'status:DISABLED'])
+            unique.assert_called_once()
+
+    def test_unpartitioned_listing_is_one_chain(self):
+        serials = self.serials(GOOGLE_LIST_PARTITION_BY='none')
+        self.assertEqual(serials, [f'BENCH{i:08d}' for i in range(1000)])
+        self.assertEqual(self.service.pages_served, 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,26 @@
+import unittest
+
+from hardware_index import HardwareIndex
+
+
+class TestHardwareIndex(unittest.TestCase):
+    def setUp(self):
+        self.row = {'id': 7, 'asset_tag': 'ABC123', 'serial': 'abc123'}
+        self.index = HardwareIndex([self.row])
+
+    def test_lookup_by_asset_tag_is_case_insensitive(self):
+        self.assertIs(self.index.lookup(asset_tag='abc123 '), self.row)
+
+    def test_lookup_by_serial(self):
+        self.assertIs(self.index.lookup(serial='ABC123'), self.row)
+
+    def test_missing_returns_none(self):
+        self.assertIsNone(self.index.lookup(asset_tag='nope', serial=None))
+
+    def test_add_counts_rows_once(self):
+        self.index.add({'id': 8, 'asset_tag': 'XYZ', 'serial': 'XYZ'})
+        self.assertEqual(len(self.index), 2)
+        self.assertIn('xyz', self.index)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import os
+import sys
+import types
+import unittest
+
+# Dummy dotenv so config can be imported without python-dotenv installed
+dotenv_mod = types.ModuleType('dotenv')
+setattr(dotenv_mod, 'load_dotenv', lambda *args, **kwargs: None)
+sys.modules.setdefault('dotenv', dotenv_mod)
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+
+from config import Config
+from fake_snipeit import FakeSnipeIT
+from hardware_payloads import (CHECKOUT, REASSIGN, assignment_change, build_create_payload, build_update_payload,
+                               current_state, diff_payload)
+
+ROW = {
+    'id': 12,
+    'asset_tag': 'SER123',
+    'model': {'id': 5, 'name': 'Chromebook 3180'},
+    'status_label': {'id': 2, 'name': 'Ready'},
+    'asset_eol_date': {'date': '2027-06-01', 'formatted': '06/01/2027'},
+    'custom_fields': {
+        'MAC Address': {'field': Config.SNIPE_IT_FIELD_MAC_ADDRESS, 'value': 'A8:1D:16:67:42:F7'},
+        'Sync Date': {'field': Config.SNIPE_IT_FIELD_SYNC_DATE, 'value': '2024-05-01'},
+        'IP Address': {'field': Config.SNIPE_IT_FIELD_IP_ADDRESS, 'value': '10.0.0.5'},
+        'User': {'field': Config.SNIPE_IT_FIELD_USER, 'value': 'Student@example.org'},
+    },
+}
+
+
+def desired(**overrides):
+    values = dict(asset_tag='SER123', model_id=5, status_id=2, mac_address='a81d166742f7',
+                  sync_date='2024-05-01', ip_address='10.0.0.5', user_email='student@example.org',
+                  eol='2027-06-01T00:00:00.000Z')
+    values.update(overrides)
+    return build_update_payload(**values)
+
+
+class TestDiffPayload(unittest.TestCase):
+    def test_current_state_reads_custom_fields_by_column(self):
+        state = current_state(ROW)
+        self.assertEqual(state['model_id'], 5)
+        self.assertEqual(state[Config.SNIPE_IT_FIELD_IP_ADDRESS], '10.0.0.5')
+
+    def test_unchanged_asset_produces_empty_diff(self):
+        self.assertEqual(diff_payload(desired(), ROW), {})
+
+    def test_only_changed_fields_are_returned(self):
+        diff = diff_payload(desired(ip_address='10.0.0.9', status_id=3), ROW)
+        self.assertEqual(diff, {'status_id': 3, Config.SNIPE_IT_FIELD_IP_ADDRESS: '10.0.0.9'})
+
+    def test_missing_custom_fields_are_sent(self):
+        row = dict(ROW, custom_fields={})
+        diff = diff_payload(desired(), row)
+        self.assertIn(Config.SNIPE_IT_FIELD_MAC_ADDRESS, diff)
+        self.assertEqual(diff[Config.SNIPE_IT_FIELD_MAC_ADDRESS], 'a8:1d:16:67:42:f7')
+
+    def test_created_asset_diffs_as_unchanged(self):
+        values = dict(asset_tag='SER123', model_id=5, status_id=2, mac_address='a81d166742f7',
+                      sync_date='2024-05-01', ip_address='10.0.0.5', user_email='student@example.org',
+                      eol='2027-06-01')
+        row = FakeSnipeIT().add_hardware(build_create_payload(**values))
+        self.assertEqual(row['asset_eol_date']['date'], '2027-06-01')
+        self.assertEqual(diff_payload(build_update_payload(**values), row), {})
+
+
+class TestAssignmentChange(unittest.TestCase):
+    def test_unassigned_asset_is_checked_out(self):
+        self.assertEqual(assignment_change(dict(ROW, assigned_to=None), 7), CHECKOUT)
+
+    def test_only_a_different_user_triggers_reassignment(self):
+        self.assertIsNone(assignment_change(dict(ROW, assigned_to={'id': 7, 'type': 'user'}), 7))
+        self.assertEqual(assignment_change(dict(ROW, assigned_to={'id': 8, 'type': 'user'}), 7), REASSIGN)
+
+    def test_unknown_users_and_non_user_assignments_are_left_alone(self):
+        self.assertIsNone(assignment_change(dict(ROW, assigned_to=None), None))
+        self.assertIsNone(assignment_change(dict(ROW, assigned_to={'id': 7, 'type': 'location'}), 8))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import importlib.util
+import os
+import tempfile
+import unittest
+
+import inventory_snapshot
+
+HAVE_PANDAS = importlib.util.find_spec('pandas') is not None
+
+
+def device(i, ip='10.0.0.1', etag='"v1"'):
+    return {'Device ID': f'dev-{i}', 'Serial Number': f'SER{i}', 'Model': 'Dell Chromebook 3180',
+            'Status': 'ACTIVE', 'ETag': etag, 'Last Sync Time': f'2025-01-0{i}T00:00:00.000Z',
+            'Last Known IP Address': ip, 'Device User': None}
+
+
+@unittest.skipUnless(HAVE_PANDAS, "pandas is not installed")
+class TestInventorySnapshot(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        # gzip CSV so the tests do not need pyarrow
+        self.path = os.path.join(tmp.name, 'state', 'inventory.csv.gz')
+
+    def run_sync(self, devices, failed=()):
+        inventory = inventory_snapshot.InventorySnapshot(self.path)
+        changed = inventory.changed_devices(devices)
+        for device_record in changed:
+            if device_record['Serial Number'] in failed:
+                inventory.record_failure(device_record)
+        inventory.save()
+        return inventory, [d['Serial Number'] for d in changed]
+
+    def test_first_run_syncs_everything(self):
+        _, changed = self.run_sync([device(1), device(2)])
+        self.assertEqual(changed, ['SER1', 'SER2'])
+
+    def test_only_added_and_changed_devices_are_synced(self):
+        self.run_sync([device(1), device(2), device(3)])
+
+        inventory, changed = self.run_sync([device(1, etag='"v2"'), device(2, ip='10.0.0.9'), device(4)])
+
+        self.assertEqual(changed, ['SER2', 'SER4'])
+        self.assertEqual(list(inventory.removed.index), ['dev-3'])
+        self.assertIn("1 added, 1 changed, 1 removed, 1 unchanged", inventory.summary())
+
+    def test_repeated_and_keyless_devices(self):
+        keyless = dict(device(3), **{'Device ID': None, 'Serial Number': None})
+        repeat = dict(device(1), Model='Acer Chromebook 311')
+        _, changed = self.run_sync([device(1), keyless, repeat, device(2)])
+        self.assertEqual(changed, ['SER1', 'SER2'])
+
+        frame = inventory_snapshot.to_frame([dict(device(1), Tags=['a', 'b'])])
+        self.assertEqual(frame.loc['dev-1', 'Tags'], ['a', 'b'])
+        self.assertEqual(frame.loc['dev-1', 'Model'], 'Dell Chromebook 3180')
+
+    def test_missing_values_round_trip_as_unchanged(self):
+        self.run_sync([device(1)])
+        inventory, changed = self.run_sync([device(1)])
+        self.assertEqual(changed, [])
+        self.assertIsNone(inventory.current.loc['dev-1', 'Device User'])
+
+    def test_failed_devices_are_retried_next_run(self):
+        self.run_sync([device(1), device(2)])
+        self.run_sync([device(1, ip='10.0.0.9'), device(2), device(3)], failed={'SER1', 'SER3'})
+
+        _, changed = self.run_sync([device(1, ip='10.0.0.9'), device(2), device(3)])
+
+        self.assertEqual(changed, ['SER1', 'SER3'])
+
+
+if __name__ == '__main__':
+    unittest.main()
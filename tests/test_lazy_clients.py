@@ -0,0 +1,93 @@
+import importlib.util
+import json
+import os
+import sys
+import tempfile
+import types
+import unittest
+from pathlib import Path
+from unittest import mock
+
+# Dummy dotenv so config can be imported without it installed
+dotenv_mod = types.ModuleType('dotenv')
+setattr(dotenv_mod, 'load_dotenv', lambda *args, **kwargs: None)
+sys.modules.setdefault('dotenv', dotenv_mod)
+
+from config import Config
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def load_module(name):
+    """Load a fresh copy of a top-level module (other tests replace some with stubs)."""
+    spec = importlib.util.spec_from_file_location(f'fresh_{name}', ROOT / f'{name}.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class TestLazyGemini(unittest.TestCase):
+    def test_sdk_is_configured_on_first_prompt_only(self):
+        genai = types.ModuleType('google.generativeai')
+        genai.configure = mock.Mock()
+        genai.GenerativeModel = mock.Mock()
+        google = types.ModuleType('google')
+        google.generativeai = genai
+
+        with mock.patch.dict(sys.modules, {'google': google, 'google.generativeai': genai}):
+            gemini = load_module('gemini')
+            genai.configure.assert_not_called()
+
+            gemini.gemini_prompt("first")
+            gemini.gemini_prompt("second")
+
+        genai.configure.assert_called_once()
+        genai.GenerativeModel.assert_called_once_with(Config.GEMINI_MODEL)
+        self.assertEqual(genai.GenerativeModel.return_value.generate_content.call_count, 2)
+
+
+class TestDiscoveryCache(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.cache_file = os.path.join(tmp.name, 'state', 'discovery.json')
+        patcher = mock.patch.object(Config, 'GOOGLE_DISCOVERY_CACHE_FILE', self.cache_file)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.discovery = types.ModuleType('googleapiclient.discovery')
+        self.discovery.build = mock.Mock(return_value=mock.Mock(_rootDesc={'name': 'admin'}))
+        self.discovery.build_from_document = mock.Mock(return_value='from-cache')
+        package = types.ModuleType('googleapiclient')
+        package.discovery = self.discovery
+        modules = mock.patch.dict(sys.modules, {'googleapiclient': package,
+                                                'googleapiclient.discovery': self.discovery})
+        modules.start()
+        self.addCleanup(modules.stop)
+        self.googleAuth = load_module('googleAuth')
+
+    def test_first_build_caches_document_and_later_builds_use_it(self):
+        self.googleAuth.build('admin', 'directory_v1', credentials='creds')
+        self.discovery.build.assert_called_once()
+        with open(self.cache_file, encoding='utf-8') as f:
+            self.assertEqual(json.load(f), {'name': 'admin'})
+
+        service = self.googleAuth.build('admin', 'directory_v1', credentials='creds')
+
+        self.assertEqual(service, 'from-cache')
+        self.discovery.build.assert_called_once()
+        self.discovery.build_from_document.assert_called_once_with('{"name": "admin"}', credentials='creds')
+
+    def test_unusable_cached_document_falls_back_to_build(self):
+        os.makedirs(os.path.dirname(self.cache_file))
+        with open(self.cache_file, 'w', encoding='utf-8') as f:
+            f.write('not json')
+        self.discovery.build_from_document.side_effect = ValueError("bad document")
+
+        self.googleAuth.build('admin', 'directory_v1')
+
+        self.discovery.build.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
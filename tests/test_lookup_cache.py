@@ -0,0 +1,93 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from lookup_cache import LookupCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestLookupCache(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = LookupCache(ttls={'models': 60}, clock=self.clock)
+
+    def test_memoize_hits_after_first_call(self):
+        calls = []
+
+        @self.cache.memoize('models')
+        def lookup(name):
+            calls.append(name)
+            return 42
+
+        self.assertEqual(lookup('Dell 3180'), 42)
+        self.assertEqual(lookup('  dell 3180 '), 42)
+        self.assertEqual(calls, ['Dell 3180'])
+        self.assertEqual(self.cache.stats()['models'], {'hits': 1, 'misses': 1})
+
+    def test_concurrent_misses_share_one_lookup(self):
+        calls = []
+        barrier = threading.Barrier(8)
+
+        @self.cache.memoize('statuslabels')
+        def lookup(name):
+            calls.append(name)
+            time.sleep(0.05)
+            return 3
+
+        def worker():
+            barrier.wait()
+            results.append(lookup('DISABLED'))
+
+        results = []
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(calls, ['DISABLED'])
+        self.assertEqual(results, [3] * 8)
+
+    def test_none_is_not_cached(self):
+        @self.cache.memoize('models')
+        def lookup(name):
+            return None
+
+        lookup('x')
+        self.assertEqual(self.cache.get('models', 'x'), (False, None))
+
+    def test_entries_expire_after_ttl(self):
+        self.cache.set('models', 'a', 1)
+        self.clock.now += 61
+        self.assertEqual(self.cache.get('models', 'a'), (False, None))
+
+    def test_invalidate(self):
+        self.cache.set('models', 'a', 1)
+        self.cache.invalidate('models', 'A')
+        self.assertEqual(self.cache.get('models', 'a'), (False, None))
+
+    def test_save_and_load_round_trip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'state', 'cache.json')
+            self.cache.path = path
+            self.cache.set('models', 'a', 1)
+            self.cache.save()
+            with open(path) as f:
+                self.assertIn('models', json.load(f))
+
+            warm = LookupCache(path=path, clock=self.clock)
+            warm.load()
+            self.assertEqual(warm.get('models', 'a'), (True, 1))
+
+if __name__ == '__main__':
+    unittest.main()
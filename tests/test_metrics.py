@@ -0,0 +1,58 @@
+import os
+import tempfile
+import unittest
+
+from metrics import Registry, endpoint_label
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.registry = Registry()
+
+    def test_counter_and_gauge_render(self):
+        requests = self.registry.counter('x_requests_total', 'Requests.', ['endpoint', 'status'])
+        requests.labels('/hardware', 200).inc()
+        requests.labels('/hardware', 200).inc(2)
+        self.registry.gauge('x_duration_seconds', 'Duration.').set(1.5)
+
+        text = self.registry.render()
+        self.assertIn('# TYPE x_requests_total counter', text)
+        self.assertIn('x_requests_total{endpoint="/hardware",status="200"} 3', text)
+        self.assertIn('x_duration_seconds 1.5', text)
+
+    def test_histogram_buckets_are_cumulative(self):
+        latency = self.registry.histogram('x_seconds', 'Latency.', buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 5.0):
+            latency.observe(value)
+
+        text = self.registry.render()
+        self.assertIn('x_seconds_bucket{le="0.1"} 1', text)
+        self.assertIn('x_seconds_bucket{le="1.0"} 2', text)
+        self.assertIn('x_seconds_bucket{le="+Inf"} 3', text)
+        self.assertIn('x_seconds_sum 5.55', text)
+        self.assertIn('x_seconds_count 3', text)
+
+    def test_label_values_are_escaped_and_checked(self):
+        counter = self.registry.counter('x_total', 'X.', ['reason'])
+        counter.labels('say "hi"\n').inc()
+        self.assertIn('x_total{reason="say \\"hi\\"\\n"} 1', self.registry.render())
+        with self.assertRaises(ValueError):
+            counter.labels()
+
+    def test_write_textfile(self):
+        self.registry.counter('x_total', 'X.').inc()
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'collector', 'sync.prom')
+            self.registry.write_textfile(path)
+            with open(path) as f:
+                self.assertIn('x_total 1', f.read())
+            self.assertEqual(os.listdir(os.path.dirname(path)), ['sync.prom'])
+
+    def test_endpoint_label_collapses_ids(self):
+        self.assertEqual(endpoint_label('/hardware/123'), '/hardware/{id}')
+        self.assertEqual(endpoint_label('/models/7/checkout?x=1'), '/models/{id}/checkout')
+        self.assertEqual(endpoint_label('/statuslabels'), '/statuslabels')
+
+
+if __name__ == '__main__':
+    unittest.main()
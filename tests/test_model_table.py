@@ -0,0 +1,30 @@
+import unittest
+
+from model_table import ModelTable
+
+ROWS = [{'id': 5, 'name': 'Dell Chromebook 3180'}, {'id': 6, 'name': 'Dell Chromebook 3180 2-in-1'},
+        {'id': 7, 'name': 'dell  chromebook 3180'}]
+
+
+class TestModelTable(unittest.TestCase):
+    def setUp(self):
+        self.table = ModelTable(ROWS)
+
+    def test_exact_normalized_matches_only(self):
+        self.assertEqual(self.table.get(' DELL Chromebook  3180'), 5)
+        self.assertEqual(self.table.get('Dell Chromebook 3180 2-in-1'), 6)
+        self.assertIsNone(self.table.get('Dell Chromebook'))
+        self.assertEqual(len(self.table), 2)
+
+    def test_missing_lists_each_new_model_once(self):
+        names = ['Acer Chromebook 311', None, 'Dell Chromebook 3180', 'acer chromebook 311', '', 'HP 11 G9']
+        self.assertEqual(self.table.missing(names), ['Acer Chromebook 311', 'HP 11 G9'])
+
+    def test_added_models_are_found(self):
+        self.table.add('Acer Chromebook 311', 12)
+        self.assertIn('ACER chromebook 311', self.table)
+        self.assertEqual(self.table.missing(['Acer Chromebook 311']), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+
+import time
+
+from pipeline import merge_through_queue, stream_through_queue
+
+
+class TestStreamThroughQueue(unittest.TestCase):
+    def test_yields_items_in_order(self):
+        self.assertEqual(list(stream_through_queue(iter(range(50)), maxsize=3)), list(range(50)))
+
+    def test_producer_error_reaches_consumer(self):
+        def pages():
+            yield 1
+            raise RuntimeError("page failed")
+
+        stream = stream_through_queue(pages(), maxsize=2)
+        self.assertEqual(next(stream), 1)
+        with self.assertRaises(RuntimeError):
+            next(stream)
+
+    def test_producer_is_bounded_and_stops_when_consumer_closes(self):
+        produced = []
+
+        def pages():
+            for i in range(1000):
+                produced.append(i)
+                yield i
+
+        stream = stream_through_queue(pages(), maxsize=5)
+        self.assertEqual(next(stream), 0)
+        stream.close()
+        self.assertLess(len(produced), 20)
+
+
+class TestMergeThroughQueue(unittest.TestCase):
+    def test_yields_every_item_and_keeps_each_source_in_order(self):
+        sources = [iter(range(start, start + 100)) for start in (0, 1000, 2000, 3000, 4000)]
+        items = list(merge_through_queue(sources, maxsize=7, concurrency=3))
+        self.assertCountEqual(items, [i for start in (0, 1000, 2000, 3000, 4000) for i in range(start, start + 100)])
+        for start in (0, 1000, 2000, 3000, 4000):
+            self.assertEqual([i for i in items if start <= i < start + 100], list(range(start, start + 100)))
+
+    def test_runs_at_most_concurrency_sources_at_once(self):
+        active, peak = [0], [0]
+
+        def source():
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+            time.sleep(0.02)
+            yield 1
+            active[0] -= 1
+
+        self.assertEqual(sum(merge_through_queue([source() for _ in range(6)], concurrency=2)), 6)
+        self.assertLessEqual(peak[0], 2)
+
+    def test_source_error_reaches_consumer(self):
+        def failing():
+            yield 1
+            raise RuntimeError("partition failed")
+
+        with self.assertRaises(RuntimeError):
+            list(merge_through_queue([failing(), iter(range(10))], maxsize=2, concurrency=2))
+
+    def test_no_sources(self):
+        self.assertEqual(list(merge_through_queue([])), [])
+
+if __name__ == '__main__':
+    unittest.main()
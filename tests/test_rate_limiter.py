@@ -0,0 +1,64 @@
+import random
+import unittest
+
+from rate_limiter import RateLimiter, backoff_delay, parse_retry_after
+
+
+class FakeTime:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def clock(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class TestRateLimiter(unittest.TestCase):
+    def setUp(self):
+        self.time = FakeTime()
+        self.limiter = RateLimiter(60, burst=2, safety_factor=1.0,
+                                   clock=self.time.clock, sleep=self.time.sleep)
+
+    def test_paces_after_burst(self):
+        for _ in range(4):
+            self.limiter.acquire()
+        # 2 burst tokens, then one request per second
+        self.assertAlmostEqual(self.time.now, 2.0)
+
+    def test_pause_blocks_until_elapsed(self):
+        self.limiter.pause(30)
+        self.limiter.acquire()
+        self.assertGreaterEqual(self.time.now, 30)
+
+    def test_remaining_zero_pauses_for_retry_after(self):
+        self.limiter.observe({'x-ratelimit-remaining': '0', 'Retry-After': '12'})
+        self.limiter.acquire()
+        self.assertGreaterEqual(self.time.now, 12)
+
+    def test_limit_header_retunes_rate(self):
+        self.limiter.observe({'X-RateLimit-Limit': '120', 'X-RateLimit-Remaining': '0', 'Retry-After': '0'})
+        for _ in range(3):
+            self.limiter.acquire()
+        self.assertAlmostEqual(self.time.now, 1.5)
+
+
+class TestHelpers(unittest.TestCase):
+    def test_parse_retry_after(self):
+        self.assertEqual(parse_retry_after('7'), 7.0)
+        self.assertIsNone(parse_retry_after(None))
+        self.assertIsNone(parse_retry_after('soon'))
+        self.assertEqual(parse_retry_after('Thu, 01 Jan 1970 00:01:40 GMT', now=40), 60.0)
+
+    def test_backoff_is_jittered_and_capped(self):
+        rng = random.Random(1)
+        for attempt in range(1, 8):
+            delay = backoff_delay(attempt, 2, 2.0, 30, rng)
+            expected = min(30, 2 * 2 ** (attempt - 1))
+            self.assertTrue(expected / 2 <= delay <= expected)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from rate_limiter import RateLimiter
+from sharding import (ProcessLock, filter_shard, merge_summaries, parse_shard, shard_path,
+                      spawn_shards, strip_option, write_summary)
+
+
+def device(i, ou='/Students'):
+    return {'Serial Number': f'SER{i:05d}', 'Org Unit Path': ou}
+
+
+class TestShardSelection(unittest.TestCase):
+    def test_parse_shard(self):
+        self.assertEqual(parse_shard('2/8'), (2, 8))
+        for bad in ('8/8', '-1/4', '1', 'a/b', '0/0'):
+            with self.assertRaises(ValueError):
+                parse_shard(bad)
+
+    def test_shards_partition_every_device_exactly_once(self):
+        devices = [device(i) for i in range(1000)]
+        seen = []
+        for index in range(4):
+            shard = list(filter_shard(devices, (index, 4)))
+            self.assertGreater(len(shard), 150)
+            seen.extend(d['Serial Number'] for d in shard)
+        self.assertCountEqual(seen, [d['Serial Number'] for d in devices])
+
+    def test_assignment_is_stable_and_orgunit_keeps_ous_together(self):
+        devices = [device(i, ou=f'/School {i % 3}') for i in range(60)]
+        first = [d['Serial Number'] for d in filter_shard(devices, (1, 3))]
+        self.assertEqual(first, [d['Serial Number'] for d in filter_shard(devices, (1, 3))])
+
+        by_ou = {}
+        for index in range(3):
+            for d in filter_shard(devices, (index, 3), by='orgunit'):
+                by_ou.setdefault(d['Org Unit Path'], set()).add(index)
+        self.assertTrue(all(len(shards) == 1 for shards in by_ou.values()))
+
+    def test_shard_path(self):
+        self.assertEqual(shard_path('state/sync_state.json', (0, 4)), 'state/sync_state.shard0of4.json')
+        self.assertEqual(shard_path('state/sync_state.json', None), 'state/sync_state.json')
+        self.assertEqual(shard_path('', (0, 4)), '')
+
+    def test_strip_option(self):
+        argv = ['--processes', '4', '--workers=8', '--processes=2', '--stream']
+        self.assertEqual(strip_option(argv, '--processes'), ['--workers=8', '--stream'])
+
+
+class TestSummaries(unittest.TestCase):
+    def test_merge_sums_counts_and_reports_missing_and_failed_shards(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'run_summary.json')
+            write_summary(shard_path(path, (0, 3)), {'created': 2, 'failed': 0}, 100.0, 160.0, shard=(0, 3))
+            write_summary(shard_path(path, (1, 3)), {'created': 1, 'failed': 1}, 90.0, 150.0,
+                          shard=(1, 3), failed=True)
+
+            merged = merge_summaries(path, 3)
+
+        self.assertEqual(merged['counts'], {'created': 3, 'failed': 1})
+        self.assertEqual(merged['duration_seconds'], 70.0)
+        self.assertEqual(merged['missing_shards'], ['2/3'])
+        self.assertEqual(merged['failed_shards'], ['1/3'])
+        self.assertTrue(merged['failed'])
+
+
+class TestProcessLock(unittest.TestCase):
+    def test_lock_serializes_holders(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'state', 'model_create.lock')
+            inside, overlaps = [0], []
+
+            def hold():
+                with ProcessLock(path):
+                    inside[0] += 1
+                    overlaps.append(inside[0])
+                    time.sleep(0.01)
+                    inside[0] -= 1
+
+            threads = [threading.Thread(target=hold) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(overlaps, [1, 1, 1, 1])
+
+
+class TestRateLimiterShare(unittest.TestCase):
+    def test_share_splits_the_rate(self):
+        limiter = RateLimiter(120, safety_factor=1.0)
+        limiter.set_share(0.25)
+        self.assertAlmostEqual(limiter._rate, 0.5)
+
+
+class TestSpawnShards(unittest.TestCase):
+    def spawn(self, count, api_tokens):
+        envs = []
+
+        def popen(command, env):
+            envs.append(env)
+            return mock.Mock(pid=len(envs), wait=mock.Mock(return_value=0))
+
+        with mock.patch('sharding.subprocess.Popen', side_effect=popen):
+            self.assertEqual(spawn_shards('snipe-IT.py', [], count, api_tokens, env={}), 0)
+        return envs
+
+    def test_rate_is_split_among_shards_sharing_a_token(self):
+        envs = self.spawn(5, ['a', 'b'])
+        self.assertEqual([env['API_TOKEN'] for env in envs], ['a', 'b', 'a', 'b', 'a'])
+        self.assertEqual([env.get('SHARD_RATE_LIMIT_SHARERS') for env in envs], ['3', '2', '3', '2', '3'])
+
+    def test_one_token_per_shard_keeps_the_full_rate(self):
+        envs = self.spawn(2, ['a', 'b', 'c'])
+        self.assertEqual([env.get('SHARD_RATE_LIMIT_SPLIT') for env in envs], ['false', 'false'])
+        self.assertNotIn('SHARD_RATE_LIMIT_SHARERS', envs[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import sys
+import types
+import unittest
+from unittest import mock
+
+# Provide a dummy requests module when it is not installed
+requests_mod = sys.modules.setdefault('requests', types.ModuleType('requests'))
+if not hasattr(requests_mod, 'RequestException'):
+    requests_mod.RequestException = type('RequestException', (Exception,), {})
+tqdm_mod = types.ModuleType('tqdm')
+setattr(tqdm_mod, 'tqdm', lambda *args, **kwargs: None)
+sys.modules.setdefault('tqdm', tqdm_mod)
+
+import metrics
+import snipeit_client
+from rate_limiter import RateLimiter
+from snipeit_client import SnipeITClient
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class FakeSession:
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = []
+
+    def request(self, method, url, **kwargs):
+        self.calls.append((method, url, kwargs))
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+class TestSnipeITClient(unittest.TestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.sleeps = []
+        limiter = RateLimiter(6000, burst=10, clock=lambda: self.now, sleep=self.sleep)
+        self.client = SnipeITClient("https://snipe.example/api/v1/", "token", limiter,
+                                    timeout=(1, 2), max_retries=3, retry_delay=0.01)
+        patcher = mock.patch.object(snipeit_client, 'tqdm')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+    def test_paths_are_joined_to_base_url(self):
+        self.assertEqual(self.client.url('/hardware'), "https://snipe.example/api/v1/hardware")
+        self.assertEqual(self.client.url('https://other/x'), "https://other/x")
+
+    def test_retries_429_honoring_retry_after_and_sets_timeout(self):
+        rate_limited = metrics.SNIPEIT_RATE_LIMITED.labels('/models', 'GET').value()
+        self.client._session = FakeSession([FakeResponse(429, {'Retry-After': '3'}), FakeResponse(200)])
+        response = self.client.get('/models', params={'search': 'x'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self.client._session.calls), 2)
+        self.assertEqual(self.client._session.calls[0][2]['timeout'], (1, 2))
+        self.assertGreaterEqual(sum(self.sleeps), 2.9)
+        self.assertEqual(metrics.SNIPEIT_RATE_LIMITED.labels('/models', 'GET').value(), rate_limited + 1)
+
+    def test_gives_up_after_max_retries(self):
+        error = requests_mod.RequestException("down")
+        self.client._session = FakeSession([error, error, error])
+        with mock.patch.object(snipeit_client.time, 'sleep') as sleep:
+            self.assertIsNone(self.client.post('/hardware', json={}))
+        self.assertEqual(len(self.client._session.calls), 3)
+        # No backoff after the last attempt
+        self.assertEqual(sleep.call_count, 2)
+
+    def test_last_429_is_not_waited_out(self):
+        self.client._session = FakeSession([FakeResponse(429, {'Retry-After': '5'})] * 3)
+        self.assertIsNone(self.client.get('/models'))
+        self.assertEqual(sum(self.sleeps), 10)
+        # The final Retry-After doesn't hold up the next request
+        self.assertLess(self.client.rate_limiter.acquire(), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import json
+import sys
+import types
+import unittest
+
+# Dummy dotenv so config can be imported without python-dotenv installed
+dotenv_mod = types.ModuleType('dotenv')
+setattr(dotenv_mod, 'load_dotenv', lambda *args, **kwargs: None)
+sys.modules.setdefault('dotenv', dotenv_mod)
+
+from sync_decisions import (DUPLICATE, assignment_requests, create_result, exact_model_id, merge_assignment,
+                            write_result)
+from sync_stats import CREATED, FAILED, UNCHANGED, UPDATED
+
+
+class Response:
+    def __init__(self, status_code, data):
+        self.status_code = status_code
+        self.text = data if isinstance(data, str) else json.dumps(data)
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class TestWriteResult(unittest.TestCase):
+    def test_success_returns_payload(self):
+        response = Response(200, {'status': 'success', 'payload': {'id': 4}})
+        self.assertEqual(write_result(response, 'updating SER1'), (200, {'id': 4}))
+
+    def test_error_with_status_200_is_a_failure(self):
+        response = Response(200, {'status': 'error', 'messages': 'Invalid model'})
+        self.assertEqual(write_result(response, 'updating SER1'), (400, 'Invalid model'))
+
+    def test_missing_or_unparsable_response(self):
+        self.assertEqual(write_result(None, 'updating SER1'), (503, 'No response from Snipe-IT updating SER1'))
+        self.assertEqual(write_result(Response(502, 'Bad Gateway'), 'updating SER1'), (502, 'Bad Gateway'))
+
+
+class TestCreateResult(unittest.TestCase):
+    def test_created_and_duplicate(self):
+        created = Response(200, {'status': 'success', 'payload': {'id': 9, 'asset_tag': 'SER1'}})
+        self.assertEqual(create_result(created, 'SER1'), (CREATED, {'id': 9, 'asset_tag': 'SER1'}))
+        duplicate = Response(200, {'status': 'error', 'messages': {'asset_tag': ['taken']}})
+        self.assertEqual(create_result(duplicate, 'SER1'), (DUPLICATE, None))
+        self.assertEqual(create_result(None, 'SER1')[0], FAILED)
+
+
+class TestModelMatching(unittest.TestCase):
+    def test_no_closest_match(self):
+        rows = [{'id': 1, 'name': 'Dell Chromebook 3180'}, {'id': 2, 'name': 'dell  chromebook'}]
+        self.assertEqual(exact_model_id(rows, 'Dell Chromebook'), 2)
+        self.assertIsNone(exact_model_id(rows[:1], 'Dell Chromebook'))
+
+
+class TestAssignment(unittest.TestCase):
+    def test_requests(self):
+        self.assertEqual(assignment_requests(None, 5), [])
+        self.assertEqual([path for path, _ in assignment_requests({'id': 3}, 5)], ['/hardware/3/checkout'])
+        reassign = assignment_requests({'id': 3, 'assigned_to': {'id': 4, 'type': 'user'}}, 5)
+        self.assertEqual([path for path, _ in reassign], ['/hardware/3/checkin', '/hardware/3/checkout'])
+        self.assertEqual(reassign[1][1]['assigned_user'], 5)
+        self.assertEqual(assignment_requests({'id': 3, 'assigned_to': {'id': 5, 'type': 'user'}}, 5), [])
+
+    def test_merge(self):
+        self.assertEqual(merge_assignment((200, UNCHANGED), (200, True)), (200, UPDATED))
+        self.assertEqual(merge_assignment((200, CREATED), (200, True)), (200, CREATED))
+        self.assertEqual(merge_assignment((200, UNCHANGED), (409, 'Not deployable')), (409, 'Not deployable'))
+        self.assertEqual(merge_assignment((503, 'down'), None), (503, 'down'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import os
+import tempfile
+import unittest
+
+from sync_journal import SyncJournal
+
+
+def device(i, etag='v1'):
+    return {'Device ID': f'dev-{i}', 'Serial Number': f'SER{i}', 'ETag': etag}
+
+
+class TestSyncJournal(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, 'state', 'journal.sqlite3')
+
+    def interrupted_run(self, listed=3, synced=2, failed=()):
+        """Simulate a run killed after syncing `synced` of `listed` devices."""
+        journal = SyncJournal(self.path)
+        journal.start_run()
+        tracked = journal.track(device(i) for i in range(listed))
+        for i, d in enumerate(tracked):
+            if i < synced:
+                journal.mark(d, i not in failed, 'created')
+        journal.close()
+
+    def test_resume_replays_unfinished_devices_from_journal(self):
+        self.interrupted_run(listed=4, synced=3, failed={1})
+
+        journal = SyncJournal(self.path)
+        self.assertTrue(journal.resume_run())
+        self.assertTrue(journal.listing_complete)
+        self.assertEqual([d['Serial Number'] for d in journal.unfinished_devices()], ['SER1', 'SER3'])
+        self.assertEqual([d['Serial Number'] for d in journal.done_devices()], ['SER0', 'SER2'])
+        self.assertEqual(journal.summary(), "2 devices already synced, 2 pending or failed")
+
+    def test_relisting_skips_done_devices_unless_changed(self):
+        journal = SyncJournal(self.path)
+        journal.start_run()
+        listing = journal.track([device(0), device(1)], listing_ok=lambda: False)
+        journal.mark(next(listing), True)
+        journal.close()
+
+        journal = SyncJournal(self.path)
+        self.assertTrue(journal.resume_run())
+        self.assertFalse(journal.listing_complete)
+        skipped = [0]
+        remaining = list(journal.track([device(0), device(1), device(2)], skipped))
+        self.assertEqual([d['Serial Number'] for d in remaining], ['SER1', 'SER2'])
+        self.assertEqual(skipped, [1])
+        self.assertTrue(journal.listing_complete)
+
+        # A device that changed since it was synced is planned again
+        self.assertEqual(len(list(journal.track([device(0, etag='v2')]))), 1)
+
+    def test_finished_run_has_nothing_to_resume(self):
+        self.interrupted_run()
+        journal = SyncJournal(self.path)
+        journal.resume_run()
+        journal.finish_run()
+        self.assertFalse(SyncJournal(self.path).resume_run())
+
+    def test_new_run_discards_previous_entries(self):
+        self.interrupted_run()
+        journal = SyncJournal(self.path)
+        journal.start_run()
+        self.assertEqual(journal.counts(), {'pending': 0, 'done': 0, 'failed': 0})
+
+
+if __name__ == '__main__':
+    unittest.main()
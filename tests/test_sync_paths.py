@@ -0,0 +1,183 @@
+import importlib.util
+import os
+import sys
+import types
+import unittest
+from pathlib import Path
+from unittest import mock
+
+# Provide dummy modules for external dependencies so snipe-IT.py can be imported
+for name in ['requests', 'googleAuth', 'gemini']:
+    sys.modules.setdefault(name, types.ModuleType(name))
+dotenv_mod = types.ModuleType('dotenv')
+setattr(dotenv_mod, 'load_dotenv', lambda *args, **kwargs: None)
+sys.modules.setdefault('dotenv', dotenv_mod)
+tqdm_mod = types.ModuleType('tqdm')
+setattr(tqdm_mod, 'tqdm', lambda *args, **kwargs: None)
+sys.modules.setdefault('tqdm', tqdm_mod)
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+import sync_plan  # noqa: E402
+from category_cache import CategoryCache  # noqa: E402
+from config import Config  # noqa: E402
+from fake_snipeit import FakeSnipeIT, FakeSnipeITClient  # noqa: E402
+from sync_stats import CREATED, UNCHANGED, UPDATED  # noqa: E402
+
+spec = importlib.util.spec_from_file_location('snipe_it_sync_paths', ROOT / 'snipe-IT.py')
+snipe = importlib.util.module_from_spec(spec)
+# Every Snipe-IT call goes to the fake, so the API/Google settings need not be set
+with mock.patch.object(Config, 'validate', return_value=(True, [])):
+    spec.loader.exec_module(snipe)
+
+
+class QuietProgress:
+    """tqdm stand-in: a silent progress bar with a no-op write."""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def update(self, n=1):
+        pass
+
+    @staticmethod
+    def write(*args, **kwargs):
+        pass
+
+
+class SyncPathTestCase(unittest.TestCase):
+    """Runs snipe-IT.py functions against an in-process FakeSnipeIT."""
+
+    def setUp(self):
+        self.api = FakeSnipeIT()
+        client = FakeSnipeITClient(self.api)
+        patches = [
+            mock.patch.object(snipe, 'get_client', lambda *args, **kwargs: client),
+            mock.patch.object(snipe, 'tqdm', QuietProgress),
+            mock.patch.object(snipe, 'category_cache', CategoryCache(':memory:')),
+            mock.patch.object(snipe, 'model_table', None),
+            mock.patch.object(snipe, 'user_index', None),
+            mock.patch.object(snipe, 'model_creation_lock', None),
+            mock.patch.object(Config, 'GEMINI_API_KEY', None),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        for entity in ('models', 'statuslabels', 'categories', 'users'):
+            snipe.lookup_cache.invalidate(entity)
+
+    def requests(self, route):
+        return self.api.stats.get(route, 0)
+
+    def hardware_row(self, asset_tag):
+        """The asset as a sync run would see it (a copy, like a listing response)."""
+        rows = snipe.get_client().get('/hardware', params={'search': asset_tag}).json()['rows']
+        return next(row for row in rows if row['asset_tag'] == asset_tag)
+
+
+class TestResolveModels(SyncPathTestCase):
+    def test_creates_each_missing_model_once(self):
+        existing = self.api.add_model('Dell Chromebook 3180')
+        snipe.model_table = snipe.load_model_table()
+
+        failed = snipe.resolve_models(['Acer Chromebook 311', 'acer  chromebook 311', 'Dell Chromebook 3180', None],
+                                      workers=4)
+
+        self.assertEqual(failed, [])
+        self.assertEqual(self.requests('POST /models'), 1)
+        self.assertEqual(snipe.model_table.get('Dell Chromebook 3180'), existing['id'])
+        created = self.api.models[snipe.model_table.get('ACER Chromebook 311')]
+        self.assertEqual(created['fieldset_id'], Config.SNIPE_IT_FIELDSET_ID)
+        self.assertEqual(snipe.get_or_create_model_id('Acer Chromebook 311'), created['id'])
+
+
+class TestSyncAssignment(SyncPathTestCase):
+    def setUp(self):
+        super().setUp()
+        self.first = self.api.add_user('first@example.org')
+        self.second = self.api.add_user('second@example.org')
+        self.api.add_hardware({'asset_tag': 'SER1', 'serial': 'SER1'})
+        snipe.user_index = snipe.load_user_index()
+
+    def test_checks_out_only_when_the_user_changed(self):
+        row = self.hardware_row('SER1')
+        self.assertEqual(snipe.with_assignment((200, UNCHANGED), row, 'First@example.org'), (200, UPDATED))
+        self.assertEqual(self.api.by_tag['ser1']['assigned_to']['id'], self.first['id'])
+
+        self.assertEqual(snipe.with_assignment((200, UNCHANGED), row, 'first@example.org'), (200, UNCHANGED))
+        self.assertEqual(snipe.with_assignment((200, UNCHANGED), row, 'stranger@example.org'), (200, UNCHANGED))
+        self.assertEqual(self.requests('POST /hardware/{id}/checkout'), 1)
+
+        self.assertEqual(snipe.with_assignment((200, CREATED), row, 'second@example.org'), (200, CREATED))
+        self.assertEqual(self.requests('POST /hardware/{id}/checkin'), 1)
+        self.assertEqual(self.api.by_tag['ser1']['assigned_to']['id'], self.second['id'])
+
+    def test_duplicate_asset_is_updated_and_checked_out(self):
+        # Not in the preloaded index (existing=None), so the POST reports a duplicate
+        result = snipe.create_hardware('SER1', Config.SNIPE_IT_ACTIVE_STATUS, None, 'a81d166742f7', '2024-05-01',
+                                       userEmail='first@example.org')
+
+        self.assertEqual(result, (200, UPDATED))
+        self.assertEqual(self.requests('POST /hardware'), 1)
+        self.assertEqual(self.api.by_tag['ser1']['assigned_to']['id'], self.first['id'])
+
+    def test_failed_write_is_not_followed_by_a_checkout(self):
+        outcome = (503, 'No response')
+        self.assertEqual(snipe.with_assignment(outcome, self.hardware_row('SER1'), 'first@example.org'), outcome)
+        self.assertEqual(self.requests('POST /hardware/{id}/checkout'), 0)
+
+
+class TestApplyPlan(SyncPathTestCase):
+    def snapshot(self):
+        return snipe.fetch_snipeit_snapshot()
+
+    def test_snapshot_lists_every_status_label(self):
+        snapshot = self.snapshot()
+        self.assertEqual({s['name']: s['id'] for s in snapshot['statuslabels']}, self.api.status_labels)
+
+        plan = sync_plan.build_plan([{'Serial Number': 'SER1', 'Status': 'DISABLED'}], snapshot)
+        self.assertEqual(plan['actions'][0]['payload']['status_id'], self.api.status_labels['DISABLED'])
+
+    def test_creates_new_models_and_sends_every_action(self):
+        model = self.api.add_model('Dell Chromebook 3180')
+        self.api.add_hardware({'asset_tag': 'SER1', 'serial': 'SER1', 'model_id': model['id'],
+                               'status_id': Config.SNIPE_IT_DEFAULT_STATUS_ID})
+        devices = [
+            {'Serial Number': 'SER1', 'Model': 'Dell Chromebook 3180', 'Status': Config.SNIPE_IT_ACTIVE_STATUS,
+             'Last Known IP Address': '10.0.0.9'},
+            {'Serial Number': 'SER2', 'Model': 'Acer Chromebook 311', 'Status': Config.SNIPE_IT_ACTIVE_STATUS},
+        ]
+        plan = sync_plan.build_plan(devices, self.snapshot())
+
+        stats = snipe.apply_plan(plan, workers=2)
+
+        self.assertEqual((stats.counts[CREATED], stats.counts[UPDATED]), (1, 1))
+        self.assertEqual(self.requests('POST /models'), 1)
+        created = self.api.by_tag['ser2']
+        self.assertEqual(created['model']['name'], 'Acer Chromebook 311')
+        self.assertEqual(self.api.by_tag['ser1']['custom_fields']['IP Address']['value'], '10.0.0.9')
+
+    def test_models_are_matched_by_exact_name_only(self):
+        similar = self.api.add_model('Dell Chromebook 3180')
+        devices = [{'Serial Number': 'SER1', 'Model': 'Dell Chromebook', 'Status': Config.SNIPE_IT_ACTIVE_STATUS}]
+        plan = sync_plan.build_plan(devices, self.snapshot())
+        self.api.add_model('dell  chromebook')  # created after the plan was written
+        self.api.stats.clear()
+
+        snipe.apply_plan(plan, workers=1)
+
+        self.assertEqual(self.requests('GET /models'), 1)
+        self.assertEqual(self.requests('POST /models'), 0)
+        self.assertNotEqual(self.api.by_tag['ser1']['model']['id'], similar['id'])
+        self.assertEqual(self.api.by_tag['ser1']['model']['name'], 'dell  chromebook')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import os
+import sys
+import tempfile
+import types
+import unittest
+
+# Dummy dotenv so config can be imported without python-dotenv installed
+dotenv_mod = types.ModuleType('dotenv')
+setattr(dotenv_mod, 'load_dotenv', lambda *args, **kwargs: None)
+sys.modules.setdefault('dotenv', dotenv_mod)
+
+from config import Config
+import sync_plan
+from sync_stats import CREATED, SKIPPED, UNCHANGED, UPDATED
+
+HARDWARE = [{
+    'id': 12,
+    'asset_tag': 'SER1',
+    'serial': 'SER1',
+    'model': {'id': 5, 'name': 'Dell Chromebook 3180'},
+    'status_label': {'id': 2, 'name': 'Ready'},
+    'notes': 'not needed for planning',
+    'custom_fields': {
+        'MAC Address': {'field': Config.SNIPE_IT_FIELD_MAC_ADDRESS, 'value': 'a8:1d:16:00:00:01'},
+        'Sync Date': {'field': Config.SNIPE_IT_FIELD_SYNC_DATE, 'value': '2024-05-01'},
+        'IP Address': {'field': Config.SNIPE_IT_FIELD_IP_ADDRESS, 'value': '10.0.0.1'},
+        'User': {'field': Config.SNIPE_IT_FIELD_USER, 'value': 'a@example.org'},
+    },
+}]
+MODELS = [{'id': 5, 'name': 'Dell Chromebook 3180', 'category': {'id': 1}}]
+STATUSES = [{'id': 2, 'name': 'Ready'}, {'id': 7, 'name': 'Disabled'}]
+
+
+def device(serial, ip='10.0.0.1', model='Dell Chromebook 3180', status=None):
+    return {'Serial Number': serial, 'Model': model, 'Status': status or Config.SNIPE_IT_ACTIVE_STATUS,
+            'Mac Address': 'a81d16000001', 'Active Date': '2024-05-01', 'Last Known IP Address': ip,
+            'Device User': 'a@example.org'}
+
+
+class TestBuildPlan(unittest.TestCase):
+    def setUp(self):
+        self.snapshot = sync_plan.make_snipeit_snapshot(HARDWARE, MODELS, STATUSES)
+
+    def test_snapshot_keeps_only_planning_fields(self):
+        row = self.snapshot['hardware'][0]
+        self.assertNotIn('notes', row)
+        self.assertEqual(row['model'], {'id': 5})
+        self.assertEqual(self.snapshot['models'], [{'id': 5, 'name': 'Dell Chromebook 3180'}])
+
+    def test_unchanged_device_needs_no_action(self):
+        plan = sync_plan.build_plan([device('SER1')], self.snapshot)
+        self.assertEqual(plan['actions'], [])
+        self.assertEqual(plan['summary'][UNCHANGED], 1)
+
+    def test_update_carries_only_changed_fields_with_diff(self):
+        plan = sync_plan.build_plan([device('SER1', ip='10.0.0.9', status='DISABLED')], self.snapshot)
+        [action] = plan['actions']
+        self.assertEqual(action['action'], sync_plan.UPDATE)
+        self.assertEqual(action['id'], 12)
+        self.assertEqual(action['payload'], {'status_id': 7, Config.SNIPE_IT_FIELD_IP_ADDRESS: '10.0.0.9'})
+        self.assertEqual(action['changes'][Config.SNIPE_IT_FIELD_IP_ADDRESS], {'from': '10.0.0.1', 'to': '10.0.0.9'})
+        self.assertEqual(action['changes']['status_id'], {'from': 2, 'to': 7})
+        self.assertEqual(plan['summary'][UPDATED], 1)
+
+    def test_new_models_are_planned_once_and_referenced_by_creates(self):
+        devices = [device('SER2', model='Acer Chromebook 311'), device('SER3', model='acer chromebook  311'),
+                   device(None), device('SER2')]
+        plan = sync_plan.build_plan(devices, self.snapshot, classify=lambda name: 'Chromebook')
+
+        self.assertEqual(plan['models'], [{'name': 'Acer Chromebook 311', 'category': 'Chromebook'}])
+        creates = [a for a in plan['actions'] if a['action'] == sync_plan.CREATE]
+        self.assertEqual([a['asset_tag'] for a in creates], ['SER2', 'SER3'])
+        self.assertTrue(all(a['model'] == 'Acer Chromebook 311' and a['payload']['model_id'] is None
+                            for a in creates))
+        self.assertEqual(plan['summary'][CREATED], 2)
+        self.assertEqual(plan['summary'][SKIPPED], 2)
+        self.assertIn("Acer Chromebook 311 (Chromebook)", sync_plan.format_plan_summary(plan))
+
+    def test_files_round_trip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            devices_path = os.path.join(tmp, 'state', 'google.jsonl')
+            snapshot_path = os.path.join(tmp, 'state', 'snipeit.json')
+            plan_path = os.path.join(tmp, 'state', 'plan.json')
+            self.assertEqual(sync_plan.dump_devices(devices_path, iter([device('SER1'), device('SER4')])), 2)
+            sync_plan.dump_snipeit_snapshot(snapshot_path, self.snapshot)
+
+            plan = sync_plan.build_plan(sync_plan.load_devices(devices_path),
+                                        sync_plan.load_snipeit_snapshot(snapshot_path))
+            sync_plan.write_plan(plan_path, plan)
+
+            self.assertEqual(sync_plan.load_plan(plan_path)['actions'], plan['actions'])
+            self.assertEqual([a['asset_tag'] for a in plan['actions']], ['SER4'])
+
+
+if __name__ == '__main__':
+    unittest.main()
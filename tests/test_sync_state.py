@@ -0,0 +1,38 @@
+import os
+import tempfile
+import unittest
+
+from sync_state import SyncState, parse_rfc3339
+
+
+class TestSyncState(unittest.TestCase):
+    def test_parse_rfc3339(self):
+        parsed = parse_rfc3339('2024-05-01T12:34:56.789Z')
+        self.assertEqual((parsed.year, parsed.second), (2024, 56))
+        self.assertIsNone(parse_rfc3339('not a date'))
+        self.assertIsNone(parse_rfc3339(None))
+
+    def test_watermark_advances_and_round_trips(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'state.json')
+            state = SyncState(path)
+            state.record_success('dev1', 'etag1', '2024-05-01T10:00:00.000Z')
+            state.record_skip('2024-05-02T10:00:00.000Z')
+            self.assertTrue(state.finish_run())
+            state.save()
+
+            loaded = SyncState(path).load()
+            self.assertEqual(loaded.watermark, '2024-05-02T10:00:00.000Z')
+            self.assertTrue(loaded.is_unchanged('dev1', 'etag1'))
+            self.assertFalse(loaded.is_unchanged('dev1', 'etag2'))
+
+    def test_failure_keeps_watermark(self):
+        state = SyncState(None)
+        state.watermark = '2024-01-01T00:00:00Z'
+        state.record_success('dev1', 'etag1', '2024-05-01T10:00:00Z')
+        state.record_failure()
+        self.assertFalse(state.finish_run())
+        self.assertEqual(state.watermark, '2024-01-01T00:00:00Z')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,26 @@
+import unittest
+
+from user_index import UserIndex
+
+ROWS = [{'id': 3, 'email': 'Student@Example.org', 'username': 'student'},
+        {'id': 4, 'email': '', 'username': 'teacher@example.org'},
+        {'id': 5, 'email': 'teacher@example.org', 'username': 'tteacher'},
+        {'id': None, 'email': 'ghost@example.org'}]
+
+
+class TestUserIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = UserIndex(ROWS)
+
+    def test_emails_match_case_insensitively(self):
+        self.assertEqual(self.index.get(' student@EXAMPLE.org'), 3)
+        self.assertIsNone(self.index.get('student'))
+        self.assertIsNone(self.index.get(None))
+
+    def test_email_wins_over_email_like_username(self):
+        self.assertEqual(self.index.get('teacher@example.org'), 5)
+        self.assertEqual(len(self.index), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import threading
+import time
+import unittest
+
+from worker_pool import run_bounded
+
+
+class TestRunBounded(unittest.TestCase):
+    def test_sequential_reports_results_and_errors(self):
+        def work(item):
+            if item == 2:
+                raise ValueError("boom")
+            return item * 10
+
+        seen = []
+        run_bounded(work, [1, 2, 3], lambda item, result, error: seen.append((item, result, type(error))))
+        self.assertEqual(seen, [(1, 10, type(None)), (2, None, ValueError), (3, 30, type(None))])
+
+    def test_pool_bounds_items_in_flight(self):
+        lock = threading.Lock()
+        in_flight = [0]
+        peak = [0]
+        done = []
+        caller = threading.current_thread()
+        callback_threads = set()
+
+        def work(item):
+            with lock:
+                in_flight[0] += 1
+                peak[0] = max(peak[0], in_flight[0])
+            time.sleep(0.01)
+            with lock:
+                in_flight[0] -= 1
+            return item
+
+        def on_done(item, result, error):
+            callback_threads.add(threading.current_thread())
+            done.append(result)
+
+        run_bounded(work, iter(range(40)), on_done, workers=4, queue_size=4)
+
+        self.assertEqual(sorted(done), list(range(40)))
+        self.assertLessEqual(peak[0], 4)
+        self.assertEqual(callback_threads, {caller})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+"""
+In-memory index of Snipe-IT users.
+
+Built once per run from a paged listing of /users when assets are checked
+out to their Google user, so matching a device's recent user to a Snipe-IT
+user never needs a per-device search.
+"""
+
+
+def _normalize_email(value):
+    """Normalize an email or username for case-insensitive lookups."""
+    if not value:
+        return None
+    value = str(value).strip().lower()
+    return value or None
+
+
+class UserIndex:
+    """Snipe-IT user IDs keyed by email, and by username where it is an email address."""
+
+    def __init__(self, rows=None):
+        self.by_email = {}
+        for row in rows or []:
+            self.add(row)
+
+    def add(self, row):
+        """
+        Add a user row to the index.
+
+        A username that looks like an email address is indexed too, for
+        instances whose users are synced with usernames but without emails.
+        Email matches take precedence over username matches.
+
+        Args:
+            row (dict): A user row as returned by the Snipe-IT API.
+        """
+        user_id = row.get('id')
+        if user_id is None:
+            return
+        email = _normalize_email(row.get('email'))
+        username = _normalize_email(row.get('username'))
+        if username and '@' in username:
+            self.by_email.setdefault(username, user_id)
+        if email:
+            self.by_email[email] = user_id
+
+    def get(self, email):
+        """
+        Returns:
+            int: The ID of the Snipe-IT user with this email, or None.
+        """
+        return self.by_email.get(_normalize_email(email))
+
+    def __len__(self):
+        return len(self.by_email)
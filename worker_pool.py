@@ -0,0 +1,52 @@
+"""
+Bounded thread pool for per-device sync work.
+
+Fans work out over a fixed number of threads while keeping at most
+`queue_size` items in flight, so large (or streamed) inventories never pile
+up as pending futures. Completion callbacks run on the calling thread, which
+keeps tqdm progress updates and logging single-threaded.
+"""
+
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+def run_bounded(func, items, on_done, workers=1, queue_size=None):
+    """
+    Calls `func(item)` for every item, optionally on a thread pool.
+
+    Args:
+        func (callable): Work function taking one item.
+        items (iterable): Items to process. Consumed lazily.
+        on_done (callable): Called as `on_done(item, result, error)` on the
+            calling thread once each item finishes. `error` is the exception
+            raised by `func`, or None.
+        workers (int): Number of worker threads. 1 runs inline without a pool.
+        queue_size (int, optional): Maximum items submitted but not yet
+            finished. Defaults to twice the worker count.
+    """
+    if workers <= 1:
+        for item in items:
+            try:
+                result, error = func(item), None
+            except Exception as e:
+                result, error = None, e
+            on_done(item, result, error)
+        return
+
+    queue_size = max(queue_size or workers * 2, workers)
+    pending = {}
+
+    def drain(return_when):
+        done, _ = wait(pending, return_when=return_when)
+        for future in done:
+            item = pending.pop(future)
+            error = future.exception()
+            on_done(item, None if error else future.result(), error)
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sync-worker") as executor:
+        for item in items:
+            while len(pending) >= queue_size:
+                drain(FIRST_COMPLETED)
+            pending[executor.submit(func, item)] = item
+        while pending:
+            drain(FIRST_COMPLETED)